@@ -0,0 +1,122 @@
+// Live report page of reportTools/live_report.py. The server pushes the test events as server-sent events:
+// - snapshot: the state when the page connects (counts, running test, recent tests and failures).
+// - start: a test started; result: a test finished; done: the run ended (exit code, final report).
+// Only the last entries are kept on the page, like on the server, so a long run does not grow the DOM.
+
+var liveReport = document.getElementById('live-report');
+var liveTotal = parseInt(liveReport.dataset.total) || 0;
+var liveCounts = {passed: 0, failed: 0, skipped: 0};
+var liveStarted = Date.now();
+var liveElapsedTimer = null;
+
+// Number of rows and failures kept on the page, the same as kept by the server.
+var LIVE_RECENT_SHOWN = parseInt(liveReport.dataset.recentShown);
+var LIVE_FAILURES_KEPT = parseInt(liveReport.dataset.failuresKept);
+
+// Map a test status to the bootstrap class of its row.
+var LIVE_STATUS_CLASSES = {passed: 'success', failed: 'danger', skipped: 'warning'};
+
+function setText(id, text) {
+  document.getElementById(id).textContent = text;
+}
+
+// Update the counters and the progress bar.
+function updateCounts() {
+  var finished = liveCounts.passed + liveCounts.failed + liveCounts.skipped;
+  setText('live-count-passed', liveCounts.passed);
+  setText('live-count-failed', liveCounts.failed);
+  setText('live-count-skipped', liveCounts.skipped);
+  setText('live-count-finished', finished);
+  var total = Math.max(liveTotal, finished);
+  for (var status in liveCounts) {
+    var width = total > 0 ? 100.0 * liveCounts[status] / total : 0;
+    document.getElementById('live-progress-' + status).style.width = width + '%';
+  }
+}
+
+// Prepend an element to a container and drop the oldest children beyond `limit`.
+function prependBounded(container, element, limit) {
+  container.insertBefore(element, container.firstChild);
+  while (container.children.length > limit) {
+    container.removeChild(container.lastChild);
+  }
+}
+
+function addRecent(result) {
+  var row = document.createElement('tr');
+  row.className = 'table-' + (LIVE_STATUS_CLASSES[result.status] || 'secondary');
+  for (var text of [result.test, result.time.toFixed(3), result.status]) {
+    var cell = document.createElement('td');
+    cell.textContent = text;
+    row.appendChild(cell);
+  }
+  prependBounded(document.getElementById('live-recent'), row, LIVE_RECENT_SHOWN);
+}
+
+function addFailure(result) {
+  var failure = document.createElement('div');
+  failure.className = 'live-failure';
+  var title = document.createElement('strong');
+  title.textContent = result.test + ' (' + result.time.toFixed(3) + ' sec)';
+  var output = document.createElement('pre');
+  output.textContent = result.output || '-';
+  failure.appendChild(title);
+  failure.appendChild(output);
+  prependBounded(document.getElementById('live-failures'), failure, LIVE_FAILURES_KEPT);
+}
+
+function handleResult(result) {
+  if (result.status in liveCounts) {
+    liveCounts[result.status]++;
+  }
+  addRecent(result);
+  if (result.status == 'failed') {
+    addFailure(result);
+  }
+  setText('live-current', '-');
+  updateCounts();
+}
+
+function handleSnapshot(snapshot) {
+  var data = JSON.parse(snapshot.data);
+  liveTotal = data.total || 0;
+  liveCounts = data.counts;
+  liveStarted = Date.now() - 1000 * data.elapsed;
+  setText('live-count-total', data.total == null ? '?' : data.total);
+  setText('live-current', data.current || '-');
+  document.getElementById('live-recent').innerHTML = '';
+  document.getElementById('live-failures').innerHTML = '';
+  for (var result of data.recent) {
+    addRecent(result);
+  }
+  for (var failure of data.failures) {
+    addFailure(failure);
+  }
+  updateCounts();
+  setText('live-status', data.done ? 'Finished.' : 'Running...');
+}
+
+var liveEvents = new EventSource('events');
+liveEvents.addEventListener('snapshot', handleSnapshot);
+liveEvents.addEventListener('start', function(event) {
+  setText('live-current', JSON.parse(event.data).test);
+});
+liveEvents.addEventListener('result', function(event) {
+  handleResult(JSON.parse(event.data));
+});
+liveEvents.addEventListener('done', function(event) {
+  var data = JSON.parse(event.data);
+  liveEvents.close();
+  clearInterval(liveElapsedTimer);
+  setText('live-current', '-');
+  setText('live-status', 'Finished with exit code ' + data.exit_code + '.' +
+    (data.report ? ' Final report: ' + data.report : ''));
+});
+liveEvents.onerror = function() {
+  setText('live-status', 'Connection lost, reconnecting...');
+};
+// The browser reconnects by itself; the next snapshot restores the page.
+
+liveElapsedTimer = setInterval(function() {
+  setText('live-elapsed', Math.round((Date.now() - liveStarted) / 1000));
+}, 1000);
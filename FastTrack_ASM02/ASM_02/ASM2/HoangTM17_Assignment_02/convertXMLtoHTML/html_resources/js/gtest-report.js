@@ -1,84 +1,70 @@
-class TagManager {
-  constructor() {
-    this.availableTags = new Set([]);
-    this.tagElementsMap = {};
-    this.tagContainers = {};
-    this.tagElementsMap['none'] = [];
-    this.badgeElements = {};
-
-    this.enabledTags = new Set([]);
-
-    this.tagContainerTagsMap = {};
-
-    this.initialize();
-    this.insertTagBades();
+// Decode a base64 row bitset of the tag index (bit i of byte i >> 3 is set for row i).
+function decodeBitset(encoded, byteCount) {
+  var bitset = new Uint8Array(byteCount);
+  var decoded = atob(encoded);
+  for (var idx = 0; idx < decoded.length; idx++) {
+    bitset[idx] = decoded.charCodeAt(idx);
   }
-
-  initialize() {
-    var self = this;
-    $('.single-testsuite-container').each(function(){
-      var parentContainer = $(this);
-      var parentContainerId = parentContainer.attr('id');
-      self.tagContainers[parentContainerId] = parentContainer;
-      self.tagContainerTagsMap[parentContainerId] = new Set([]);
-
-      parentContainer.find('tr[data-tags], th[data-tags]').each(function(){
-        var tagElement = $(this);
-        var tagsAttr = tagElement.attr("data-tags");
-
-        // Get available tags.
-        var tagItem = {};
-        tagItem.tagElement = tagElement;
-        tagItem.parentId = parentContainerId;
-        tagItem.enabledTags = [];
-
-        if (tagsAttr != '') {
-          var tagsArray = tagsAttr.split(';');
-          for(let tag of tagsArray) {
-            self.availableTags.add(tag);
-            self.tagContainerTagsMap[parentContainerId].add(tag);
-
-            if(self.tagElementsMap[tag] == null) {
-              self.tagElementsMap[tag] = [];
-            }
-            self.tagElementsMap[tag].push(tagItem);
-
-            // Add badges to the tag element.
-            var badgeElement = $(document.createElement("span"));
-            badgeElement.addClass("badge badge-pill badge-light");
-            badgeElement.attr('style', 'margin-left: 5px;');
-            badgeElement.append(tag);
-            tagElement.find('.testcase-badges').append(badgeElement);
-          }
-        } else {
-          self.tagElementsMap['none'].push(tagItem);
-        }
-      });
-    });
+  return bitset;
+}
+
+// True if any row in [start, end) is set in the bitset.
+function anyBitInRange(bitset, start, end) {
+  for (var row = start; row < end; row++) {
+    if (bitset[row >> 3] == 0) {
+      row |= 7;
+      continue;
+    }
+    if (bitset[row >> 3] & (1 << (row & 7))) {
+      return true;
+    }
   }
+  return false;
+}
 
-  insertTagBades() {
-    var self = this;
-    $('.tags-container').each(function() {
-      for(let tag of self.availableTags.values()) {
-        var button = $(document.createElement("button"));
-        button.addClass("btn btn-sm btn-secondary tag-button");
-        button.attr("tag", tag);
-        button.text(tag + " ");
-
-        var badgeItem = $(document.createElement("span"));
-        badgeItem.addClass("badge badge-pill badge-light");
-        badgeItem.text(self.tagElementsMap[tag].length / 2);
+class TagManager {
+  // Filters the testcase rows by the tag index the HTML converter writes into the page
+  // (script#tag-index: the tags, one row bitset per tag and the first row of every testsuite).
+  // The tag buttons and row badges are rendered by the converter, so the rows are never scanned for tags.
+  constructor() {
+    var indexElement = document.getElementById('tag-index');
+    this.index = indexElement == null ? {row_count: 0, tags: [], bitsets: [], suite_ids: [], suite_first_row: [0]} :
+      JSON.parse(indexElement.textContent);
+    this.byteCount = (this.index.row_count + 7) >> 3;
+
+    this.bitsets = {};
+    for (var idx = 0; idx < this.index.tags.length; idx++) {
+      this.bitsets[this.index.tags[idx]] = decodeBitset(this.index.bitsets[idx], this.byteCount);
+    }
 
-        button.append(badgeItem);
+    // Rows in page order; row i of the index is rows[i].
+    this.rows = Array.from(document.querySelectorAll('table.testcase-table:not(.small-only) > tbody > tr.testcase-row'));
+
+    // The stacktable adds one stacked table before every testcase table (table.small-only.testcase-stackable).
+    // A testcase row becomes a block of rows in it: a head row (th.st-head-row with the name cell) followed by
+    // one key/value row per cell, all with the class of the original row. stackRows[i] are the block rows of
+    // row i (empty without stacktable, e.g. with the CSS-only layout).
+    this.stackRows = this.rows.map(() => []);
+    var stackedRows = document.querySelectorAll('table.small-only.testcase-stackable > tbody > tr.testcase-row');
+    var row = -1;
+    for (var idx = 0; idx < stackedRows.length; idx++) {
+      if (stackedRows[idx].querySelector(':scope > th.st-head-row') != null) {
+        row++;
+      }
+      if (row >= 0 && row < this.stackRows.length) {
+        this.stackRows[row].push(stackedRows[idx]);
+      }
+    }
 
-        var badgeElement = {};
-        badgeElement.element = button;
-        badgeElement.isClicked = false;
-        self.badgeElements[tag] = badgeElement;
+    this.allRows = new Uint8Array(this.byteCount).fill(0xff);
+    this.visibleRows = this.allRows;
+    this.visibleSuites = this.index.suite_ids.map(() => true);
+    this.enabledTags = new Set([]);
 
-        $(this).append(button);
-      }
+    this.badgeElements = {};
+    var self = this;
+    $('.tag-button').each(function() {
+      self.badgeElements[$(this).attr('tag')] = {element: $(this), isClicked: false};
     });
   }
 
@@ -97,21 +83,15 @@ class TagManager {
       badgeElement.element.removeClass("btn-success").addClass("btn-secondary");
     }
 
-    var tagElementsArray = self.tagElementsMap[tag]
-    for(var tagElementIdx in tagElementsArray) {
-      var tagElement = tagElementsArray[tagElementIdx];
+    self.updateView();
+  }
 
-      if(badgeElement.isClicked) {
-        tagElement.enabledTags.push(tag);
-      } else {
-        var index = tagElement.enabledTags.indexOf(tag);
-        if(index != -1) {
-          tagElement.enabledTags.splice(index, 1);
-        }
-      }
+  setRowVisible(row, visible) {
+    var display = visible ? '' : 'none';
+    this.rows[row].style.display = display;
+    for (let stackedRow of this.stackRows[row]) {
+      stackedRow.style.display = display;
     }
-
-    self.updateView();
   }
 
   updateView() {
@@ -126,68 +106,242 @@ class TagManager {
       $('.single-test-summary').hide();
     }
 
-    var containerEnabledTagItemsCount = {};
-    for(var tag in self.tagElementsMap) {
-      var tagElementsArray = self.tagElementsMap[tag];
-      for(var tagElementIdx in tagElementsArray) {
-        var tagItem = tagElementsArray[tagElementIdx];
-
-        if(containerEnabledTagItemsCount[tagItem.parentId] == null) {
-          containerEnabledTagItemsCount[tagItem.parentId] = 0;
+    // Visible rows: all rows without enabled tag, otherwise the rows with any enabled tag (OR of the bitsets).
+    var visibleRows = self.allRows;
+    if (self.enabledTags.size > 0) {
+      visibleRows = new Uint8Array(self.byteCount);
+      for (let tag of self.enabledTags) {
+        var bitset = self.bitsets[tag];
+        for (var idx = 0; idx < self.byteCount; idx++) {
+          visibleRows[idx] |= bitset[idx];
         }
+      }
+    }
 
-        if(tagItem.enabledTags.length > 0 || self.enabledTags.size == 0) {
-          tagItem.tagElement.show();
-          containerEnabledTagItemsCount[tagItem.parentId]++;
-        } else  {
-          tagItem.tagElement.hide();
+    // Only the rows whose visibility changed are touched (XOR of the old and new bitsets).
+    for (var idx = 0; idx < self.byteCount; idx++) {
+      var changed = self.visibleRows[idx] ^ visibleRows[idx];
+      while (changed) {
+        var bit = 31 - Math.clz32(changed & -changed);
+        var row = (idx << 3) + bit;
+        if (row < self.index.row_count) {
+          self.setRowVisible(row, (visibleRows[idx] >> bit) & 1);
         }
+        changed &= changed - 1;
       }
     }
-
-    for(var containerId in self.tagContainers) {
-      if(containerEnabledTagItemsCount[containerId] == null ||
-        containerEnabledTagItemsCount[containerId] == 0) {
-        self.tagContainers[containerId].hide();
-      } else {
-        self.tagContainers[containerId].show();
+    self.visibleRows = visibleRows;
+
+    // Hide the testsuites (and their sidebar links) without visible rows.
+    for (var suite = 0; suite < self.index.suite_ids.length; suite++) {
+      var visible = anyBitInRange(visibleRows, self.index.suite_first_row[suite], self.index.suite_first_row[suite + 1]);
+      if (visible != self.visibleSuites[suite]) {
+        var suiteId = self.index.suite_ids[suite];
+        $(document.getElementById(suiteId)).toggle(visible);
+        $('.nav a[href="#' + suiteId + '"]').toggle(visible);
+        self.visibleSuites[suite] = visible;
       }
     }
+  }
+};
 
-    for(var tagContainerId in self.tagContainerTagsMap) {
-      var containingTags = Array.from(self.tagContainerTagsMap[tagContainerId]);
-      var filteredTags = containingTags.filter(element => self.enabledTags.has(element));
+// Failure details of the failing testcases, by testcase id. The HTML converter writes them to the
+// chunk files <report name>_failures/failures_<n>.js, which call gtestReportFailureChunk() when loaded.
+var gtestReportFailures = {};
+// Search index over the testcase rows, written to <report name>_search.js (gtestReportSearchIndex()).
+var gtestReportSearch = null;
+// State of every loaded script: the callbacks waiting for it while it loads, true once it was loaded.
+var reportScriptStates = {};
+
+function gtestReportFailureChunk(chunk) {
+  Object.assign(gtestReportFailures, chunk);
+}
+
+function gtestReportSearchIndex(index) {
+  gtestReportSearch = index;
+}
+
+function loadReportScript(src, callback) {
+  var state = reportScriptStates[src];
+  if (state === true) {
+    callback();
+    return;
+  }
+  if (state != null) {
+    state.push(callback);
+    return;
+  }
 
-      var navElements = $('.nav a[href="#' + tagContainerId + '"]')
-      console.log(self.enabledTags);
-      if(filteredTags.length == 0 && self.enabledTags.size > 0) {
-        navElements.hide();
-      } else {
-        navElements.show();
+  // The files are loaded as scripts, which also works for reports opened from the local disk.
+  reportScriptStates[src] = [callback];
+  var script = document.createElement('script');
+  script.src = src;
+  script.onload = function() {
+    var callbacks = reportScriptStates[src];
+    reportScriptStates[src] = true;
+    for (let waiting of callbacks) {
+      waiting();
+    }
+  };
+  script.onerror = function() {
+    var callbacks = reportScriptStates[src];
+    delete reportScriptStates[src];
+    for (let waiting of callbacks) {
+      waiting();
+    }
+  };
+  document.head.appendChild(script);
+}
+
+// Failure details toggles of the testcase tables and of their stacktable copies, in page order, read on the first click.
+var failureToggles = null;
+
+// Testcase id and failure details file of a failure details toggle. The rows have no data for it: the
+// converter writes the failing testcases in page order, data-failure-chunk-size per file, to
+// <report name>_failures/failures_<n>.js (failure_chunk_name()), so the n-th failing row is found in
+// file n / chunk size, and the n-th toggle of the stacktable copies belongs to the n-th failing row.
+function failureToggleSource(toggle) {
+  if (failureToggles == null) {
+    failureToggles = {
+      rows: Array.from(document.querySelectorAll('table.testcase-table:not(.small-only) .failure-summary > a')),
+      copies: Array.from(document.querySelectorAll('table.small-only .failure-summary > a')),
+    };
+  }
+  var ordinal = failureToggles.rows.indexOf(toggle);
+  if (ordinal < 0) {
+    ordinal = failureToggles.copies.indexOf(toggle);
+  }
+  var row = failureToggles.rows[ordinal].closest('tr');
+  var main = $('main');
+  return {
+    caseId: row.id.substring('testcase-'.length),
+    src: main.attr('data-failure-src') + 'failures_' + Math.floor(ordinal / parseInt(main.attr('data-failure-chunk-size'))) + '.js',
+  };
+}
+
+function renderFailureDetails(container, failures) {
+  var list = $(document.createElement("ul"));
+  for (let failure of failures) {
+    var item = $(document.createElement("li"));
+    item.text(failure.message + (failure.type ? ' (type = ' + failure.type + ')' : ''));
+    if (failure.text) {
+      var text = $(document.createElement("pre"));
+      text.addClass("failure-text");
+      text.text(failure.text);
+      item.append(text);
+    }
+    list.append(item);
+  }
+  container.empty().append(list);
+}
+
+// Search tokens of a query: lower case runs of letters and digits, like the index tokens.
+function searchTokens(query) {
+  return query.toLowerCase().split(/[^a-z0-9]+/).filter(token => token.length > 0);
+}
+
+// Position of the first index token not smaller than `prefix` (binary search over the sorted tokens).
+function lowerBound(tokens, prefix) {
+  var low = 0, high = tokens.length;
+  while (low < high) {
+    var middle = (low + high) >> 1;
+    if (tokens[middle] < prefix) {
+      low = middle + 1;
+    } else {
+      high = middle;
+    }
+  }
+  return low;
+}
+
+// Ids of the testcases with a token starting with `prefix`. The posting lists are delta-encoded.
+function prefixPostings(index, prefix) {
+  var caseIds = new Set();
+  for (var idx = lowerBound(index.tokens, prefix); idx < index.tokens.length && index.tokens[idx].startsWith(prefix); idx++) {
+    var caseId = 0;
+    for (let delta of index.postings[idx]) {
+      caseId += delta;
+      caseIds.add(caseId);
+    }
+  }
+  return caseIds;
+}
+
+// Testcase ids and lower case texts (name cell with the first failure lines, tags) of the testcase rows,
+// read from the page on the first search with a limited index.
+var searchRowTexts = null;
+
+function rowSearchTexts() {
+  if (searchRowTexts == null) {
+    searchRowTexts = [];
+    for (let row of document.querySelectorAll('table.testcase-table:not(.small-only) > tbody > tr.testcase-row')) {
+      var name = row.querySelector('.testcase-name');
+      var text = (name == null ? '' : name.textContent) + ' ' + (row.getAttribute('data-tags') || '');
+      searchRowTexts.push([parseInt(row.id.substring('testcase-'.length)), text.toLowerCase()]);
+    }
+  }
+  return searchRowTexts;
+}
+
+// Ids of the testcases matching all tokens of the query (each as prefix), in report order.
+// If the converter dropped tokens to limit the size of the index (index.dropped), the rows of the page are
+// searched for the token as well, so a dropped token still finds its testcases.
+function searchIndex(index, query) {
+  var result = null;
+  for (let token of searchTokens(query)) {
+    var caseIds = prefixPostings(index, token);
+    if (index.dropped) {
+      for (let [caseId, text] of rowSearchTexts()) {
+        if (text.includes(token)) {
+          caseIds.add(caseId);
+        }
       }
     }
+    result = result == null ? caseIds : new Set(Array.from(result).filter(caseId => caseIds.has(caseId)));
+    if (result.size == 0) {
+      break;
+    }
+  }
+  return result == null ? [] : Array.from(result).sort((a, b) => a - b);
+}
+
+// Number of search results listed below the search box.
+var SEARCH_RESULTS_SHOWN = 50;
+
+function showSearchResults(query) {
+  var results = $('#testcase-search-results');
+  var status = $('#testcase-search-status');
+  results.empty();
+  if (searchTokens(query).length == 0) {
+    status.text('');
+    return;
   }
-};
+
+  var caseIds = searchIndex(gtestReportSearch, query);
+  status.text(caseIds.length + ' testcase(s) found' + (caseIds.length > SEARCH_RESULTS_SHOWN ? ', first ' + SEARCH_RESULTS_SHOWN + ' listed' : '') +
+              (gtestReportSearch.dropped ? '; the search index was limited (no ' + gtestReportSearch.dropped.join(', ') +
+               '), so the rows of the page were searched as well' : ''));
+  for (let caseId of caseIds.slice(0, SEARCH_RESULTS_SHOWN)) {
+    // Only the rows of the results are looked up, by their id.
+    var row = $(document.getElementById('testcase-' + caseId));
+    var link = $(document.createElement("a"));
+    link.addClass("list-group-item list-group-item-action search-result");
+    link.attr('href', '#testcase-' + caseId);
+    link.addClass(row.hasClass('table-danger') ? 'list-group-item-danger' : row.hasClass('table-warning') ? 'list-group-item-warning' : '');
+    link.text(row.find('.testcase-name').contents().first().text().trim());
+    results.append(link);
+  }
+}
 
 $(document).ready(function() {
-  // Initialize the stacktable for responsive tables.
-  $('.testcase-table').stacktable({myClass: 'testcase-stackable', headIndex: 1});
+  // Initialize the stacktable for responsive tables. Tables of the CSS-only layout (testcase-table-css)
+  // are restyled by media queries instead of being copied.
+  $('.testcase-table:not(.testcase-table-css)').stacktable({myClass: 'testcase-stackable', headIndex: 1});
 
   // Make the height of the testcase-sidebar-list fix, so that removing and adding items by clicking
   // the tag badges not influences the height.
   var testcaseSidebarList = $('#testcase-sidebar-list');
   testcaseSidebarList.attr('style', 'height: ' + testcaseSidebarList.height() + 'px;');
-  // Add the data tags to the stacktable.
-  $('.single-testsuite-container').each(function() {
-    var container = $(this);
-    var untaggedElements = container.find('.stacktable.small-only .st-head-row:not(.st-head-row-main)');
-
-    var idx = 0;
-    var taggedElements = container.find('.testcase-table.large-only tr.testcase-row').each(function(){
-      $(untaggedElements[idx]).attr('data-tags', $(this).attr('data-tags'));
-      idx++;
-    });
-  });
 
   // Overwrite the default on-page link behaviour for nav-links to fix the scrolling behaviour.
   $(".nav-link").click(function(e) {
@@ -196,6 +350,88 @@ $(document).ready(function() {
       $(window).scrollTop($(id).offset().top - 76);
   });
 
+  // Sort the metrics tables by the clicked column; a second click reverses the order.
+  // Cells without value (data-sort-value="") are always listed last.
+  $('.metrics-sortable').click(function() {
+    var header = $(this);
+    var column = parseInt(header.attr('data-column'));
+    var ascending = header.attr('data-sort-order') != 'asc';
+    header.closest('tr').find('.metrics-sortable').removeAttr('data-sort-order');
+    header.attr('data-sort-order', ascending ? 'asc' : 'desc');
+
+    var tbody = header.closest('table').find('tbody');
+    var rows = tbody.find('tr').get();
+    rows.sort(function(rowA, rowB) {
+      var valueA = $(rowA).children('td').eq(column).attr('data-sort-value');
+      var valueB = $(rowB).children('td').eq(column).attr('data-sort-value');
+      if (valueA === '' || valueB === '') {
+        return (valueA === '') - (valueB === '');
+      }
+      var order = column == 0 ? valueA.localeCompare(valueB) : parseFloat(valueA) - parseFloat(valueB);
+      return ascending ? order : -order;
+    });
+    tbody.append(rows);
+  });
+
+  // Expand the failure details of a testcase; its chunk file is loaded on the first click.
+  // Delegated, so the copies of the rows in the stacktable work as well.
+  $(document).on('click', '.failure-summary > a', function(e) {
+    e.preventDefault();
+    var toggle = $(this);
+    var summary = toggle.closest('.failure-summary');
+    var details = summary.find('.failure-details');
+    if (details.length == 0) {
+      details = $(document.createElement("div"));
+      details.addClass("failure-details");
+      summary.append(details);
+    }
+
+    if (details.attr('data-expanded') == 'true') {
+      details.attr('data-expanded', 'false').hide();
+      toggle.text('Show details');
+      return;
+    }
+
+    var source = failureToggleSource(this);
+    var src = source.src;
+    loadReportScript(src, function() {
+      var failures = gtestReportFailures[source.caseId];
+      if (failures == null) {
+        details.text('The failure details could not be loaded from ' + src + '.');
+      } else {
+        renderFailureDetails(details, failures);
+      }
+      details.attr('data-expanded', 'true').show();
+      toggle.text('Hide details');
+    });
+  });
+
+  // Search the testcases with the prebuilt index, loaded when the search box is used first.
+  var searchTimer = null;
+  $('#testcase-search-input').on('input', function() {
+    var input = $(this);
+    clearTimeout(searchTimer);
+    searchTimer = setTimeout(function() {
+      var src = input.attr('data-search-src');
+      loadReportScript(src, function() {
+        if (gtestReportSearch == null) {
+          $('#testcase-search-status').text('The search index could not be loaded from ' + src + '.');
+        } else {
+          showSearchResults(input.val());
+        }
+      });
+    }, 150);
+  });
+
+  // Scroll to the row of a search result and highlight it.
+  $(document).on('click', '.search-result', function(e) {
+    e.preventDefault();
+    var row = $($(this).attr('href'));
+    $('.search-hit').removeClass('search-hit');
+    row.addClass('search-hit');
+    $(window).scrollTop(row.offset().top - 76);
+  });
+
   var tagManager = new TagManager();
 
   $('.tag-button').click(function(event){
@@ -1,8 +1,18 @@
 # Template parameters:
 #   test_navbar                 : The navigation bar.
 #   tmpl_test_sidebar           : The sidebar.
+#   search_box                  : HTML for the testcase search.
 #   total_test_result           : HTML for total test results.
+#   failure_causes_panel        : HTML for the failures grouped by signature (may be empty).
+#   performance_panel           : HTML for the performance panel (may be empty).
+#   metrics_section             : HTML for the RecordProperty metrics of the testcases (may be empty).
+#   trend_section               : HTML for the trend of previous runs (may be empty).
+#   diff_section                : HTML for the changes against a baseline report (may be empty).
 #   single_test_result_listing  : HTML for single test result listing.
+#   tag_index                   : HTML for the tag index of the testcase rows.
+#   resource_prefix             : Location of the html_resources files ('' when they are copied next to the report).
+#   failure_src                 : Path of the failure details directory, relative to the report (empty with inline failures).
+#   failure_chunk_size          : Failing testcases per failure details file.
 tmpl_main_html = '''
 <!doctype html>
 <html lang="en">
@@ -13,11 +23,11 @@ tmpl_main_html = '''
     <!-- Bootstrap CSS -->
     <link rel="stylesheet" href="https://maxcdn.bootstrapcdn.com/bootstrap/4.0.0/css/bootstrap.min.css" integrity="sha384-Gn5384xqQ1aoWXA+058RXPxPg6fy4IWvTNh0E263XmFcJlSAwiGgFAW/dAiS6JXm" crossorigin="anonymous">
     <!-- Icons -->
-    <link href="open-iconic/font/css/open-iconic-bootstrap.css" rel="stylesheet">
+    <link href="{resource_prefix}open-iconic/font/css/open-iconic-bootstrap.css" rel="stylesheet">
     <!-- Stacktable CSS ->
-    <link href="stacktable/css/stacktable.css" rel="stylesheet">
+    <link href="{resource_prefix}stacktable/css/stacktable.css" rel="stylesheet">
     <!-- Custom CSS -->
-    <link href="css/gtest-report.css" rel="stylesheet">
+    <link href="{resource_prefix}css/gtest-report.css" rel="stylesheet">
     <title>Googletest HTML-Report</title>
   </head>
   <body>
@@ -29,27 +39,39 @@ tmpl_main_html = '''
       <div class="row">
 
         <nav class="col-md-4 col-md-mw-230 col-xl-mw-300 bg-light sidebar">
+          {search_box}
           {test_sidebar}
         </nav>
 
-        <main role="main" class="col col-md-8 col-lg-8 mx-auto pt-3">
+        <main role="main" class="col col-md-8 col-lg-8 mx-auto pt-3" data-failure-src="{failure_src}" data-failure-chunk-size="{failure_chunk_size}">
           {total_test_result}
 
+          {failure_causes_panel}
+
+          {performance_panel}
+
+          {metrics_section}
+
+          {trend_section}
+
+          {diff_section}
+
           <h4 id="single_test_results">Test Results</h4>
           {single_test_result_listing}
         </main>
 
       </div>
     </div>
+    {tag_index}
     <!-- Optional JavaScript -->
     <!-- jQuery first, then Popper.js, then Bootstrap JS -->
     <script src="https://code.jquery.com/jquery-3.2.1.slim.min.js" integrity="sha384-KJ3o2DKtIkvYIK3UENzmM7KCkRr/rE9/Qpg6aAZGJwFDMVNA/GpGFF93hXpG5KkN" crossorigin="anonymous"></script>
     <script src="https://cdnjs.cloudflare.com/ajax/libs/popper.js/1.12.9/umd/popper.min.js" integrity="sha384-ApNbgh9B+Y1QKtv3Rn7W3mgPxhU9K/ScQsAP7hUibX39j7fakFPskvXusvfa0b4Q" crossorigin="anonymous"></script>
     <script src="https://maxcdn.bootstrapcdn.com/bootstrap/4.0.0/js/bootstrap.min.js" integrity="sha384-JZR6Spejh4U02d8jOt6vLEHfe/JQGiRRSQQxSfFWpi1MquVdAyjUar5+76PVCmYl" crossorigin="anonymous"></script>
     <!-- Stacktable -->
-    <script src="stacktable/js/stacktable.js"></script>
+    <script src="{resource_prefix}stacktable/js/stacktable.js"></script>
     <!-- Custom javascript -->
-    <script src="js/gtest-report.js"></script>
+    <script src="{resource_prefix}js/gtest-report.js"></script>
   </body>
 </html>
 '''
@@ -64,6 +86,7 @@ tmpl_test_navbar = '''
 
 # Template parameters:
 #   single_testsuite_links           : HTML code with links to single testsuites.
+#   html_tag_buttons                 : HTML code with one filter button per tag.
 tmpl_test_sidebar = '''
 <h3 class="md-sidebar-header">Content</h3>
 <div class="sidebar-sticky">
@@ -88,24 +111,60 @@ tmpl_test_sidebar = '''
         <span class="oi oi-tags"></span>Tags
       </a>
       <ul class="nav flex-column">
-        <li class="tags-container"></li>
+        <li class="tags-container">{html_tag_buttons}</li>
       </ul>
     </li>
   </ul>
 </div>
 '''
 
+# Template parameters:
+#   tag       : The tag.
+#   tag_count : Number of testcase rows with this tag.
+tmpl_tag_button = '''
+<button class="btn btn-sm btn-secondary tag-button" tag="{tag}">{tag} <span class="badge badge-pill badge-light">{tag_count}</span></button>
+'''
+
+# Template parameters:
+#   tag : The tag.
+tmpl_tag_badge = '''<span class="badge badge-pill badge-light" style="margin-left: 5px;">{tag}</span>'''
+
+# Template parameters:
+#   tag_index_json : JSON of the tag index (tags, base64 row bitsets, testsuite row offsets).
+tmpl_tag_index = '''
+<script type="application/json" id="tag-index">{tag_index_json}</script>
+'''
+
+# Template parameters:
+#   search_src : Path of the search index file, relative to the report.
+tmpl_search_box = '''
+<div class="testcase-search">
+  <input type="search" class="form-control form-control-sm" id="testcase-search-input" placeholder="Search tests, tags, failures" autocomplete="off" data-search-src="{search_src}">
+  <small class="text-secondary" id="testcase-search-status"></small>
+  <div class="list-group" id="testcase-search-results"></div>
+</div>
+'''
+
 # Template parameters:
 #   testsuite_html_id       : html id
 #   testsuite_name          : name of the testsuite
+#   testsuite_badge         : HTML code with the passed count badge (empty if all testcases are listed).
 tmpl_single_testsuite_link = '''
 <small>
     <a class="nav-link" href="#{testsuite_html_id}">
-      <span class="oi oi-magnifying-glass"></span>{testsuite_name}
+      <span class="oi oi-magnifying-glass"></span>{testsuite_name}{testsuite_badge}
     </a>
 </small>
 '''
 
+# Template parameters:
+#   badge_html_class : HTML class of the badge ['success', 'danger'].
+#   passed_count     : Count of the passed tests of the testsuite.
+#   test_count       : Count of all tests of the testsuite.
+tmpl_testsuite_count_badge = '''
+<span class="badge badge-pill badge-{badge_html_class}" style="margin-left: 5px;" title="Passed / all tests">{passed_count}/{test_count}</span>
+'''
+
 # Template parameters:
 #   html_class      : HTML class, one of ['success', 'danger', 'warning']
 #   percentage_rate : The percentage rate.
@@ -186,6 +245,10 @@ tmpl_total_test_result = '''
 #   testsuite_abs_fails_count      : Count of all fails of this testsuite (absolute).
 #   testsuite_abs_disabled_count   : Count of all disabled tests of this testsuite (absolute).
 #   testsuite_execution_time       : Execution time of the testsuite.
+#   testsuite_fixture_overhead     : Wall time of the testsuite not spent in its testcases (sec and percent).
+#   testsuite_overhead_html_class  : HTML class of the fixture overhead, highlighted above the threshold.
+#   resource_header_cells          : HTML code with the resource usage header cells (empty without measurements).
+#   testcase_table_class           : Extra HTML class of the testcase table (' testcase-table-css' for the CSS-only layout).
 #   html_single_test_rows          : The html code with table rows for each test.
 tmpl_single_test_result_listing = '''
 <!-- Single Test Result Listing Begin -->
@@ -222,18 +285,23 @@ tmpl_single_test_result_listing = '''
           <p class="font-weight-bold">Execution time:</p>
           <p>{testsuite_execution_time} sec</p>
         </div>
+        <div class="col-sm-auto">
+          <p class="font-weight-bold">Fixture overhead:</p>
+          <p class="{testsuite_overhead_html_class}">{testsuite_fixture_overhead}</p>
+        </div>
       </div>
       <hr/>
     </div>
     <h5 class="font-weight-bold">Testcases:</h5>
     <div class="container">
       <div class="table-responsive">
-        <table class="testcase-table table table-bordered">
+        <table class="testcase-table table table-bordered{testcase_table_class}">
           <thead class="testcase-header">
             <tr class="table-active text-center testcase-header-row">
               <th scope="col" class="testcase-header-id">#</th>
               <th scope="col" class="testcase-header-name">Name</th>
               <th scope="col" class="testcase-header-time">Time (sec)</th>
+              {resource_header_cells}
               <th scope="col" class="textcase-header-status">Status</th>
             </tr>
           </thead>
@@ -249,28 +317,63 @@ tmpl_single_test_result_listing = '''
 '''
 
 # Template paramters:
+#   case_id                    : Id of the testcase (in the search index and the failure details).
 #   test_number                : Number of the test.
 #   test_classname             : The classname of the test.
 #   test_name                  : Name of the test.
 #   test_tags                  : Tags for this testcase.
+#   test_tag_badges            : HTML code with one badge per tag.
 #   test_execution_time        : Execution time of the test.
 #   test_html_class            : The HTML class to colorize the row ['success', 'danger', 'warning']
 #   test_icon_name             : Name of the icon to use ['check', 'x', 'warning']
+#   test_flaky_badge           : HTML code with the flaky badge (empty if the test is not flaky).
+#   test_resource_cells        : HTML code with the resource usage cells (empty if the report has no measurements).
 #   html_error_message_list    : HTML code with error message list.
 tmpl_single_test_row = '''
 <!-- Single Test Row Begin -->
-<tr class="table-{test_html_class} testcase-row" data-tags="{test_tags}">
+<tr id="testcase-{case_id}" class="table-{test_html_class} testcase-row" data-tags="{test_tags}">
   <th class="text-center testcase-id" scope="row">{test_number}</th>
   <td class="testcase-name">
-    {test_classname}::{test_name}<span class="testcase-badges"></span><br>
+    {test_classname}::{test_name}{test_flaky_badge}<span class="testcase-badges">{test_tag_badges}</span><br>
     {html_error_message_list}
   </td>
   <td class="text-right testcase-time">{test_execution_time}</td>
+  {test_resource_cells}
   <td class="text-center testcase-icon"><span class="oi oi-{test_icon_name}"/></td>
 </tr>
 <!-- Single Test Row End -->
 '''
 
+# Template parameters:
+#   column_count   : Number of columns of the testcase table.
+#   omitted_count  : Number of testcases without row.
+#   omitted_kind   : Kind of the omitted testcases, e.g. 'passed ' (empty if all testcases are omitted).
+#   only_mode      : The --only mode of the report ['failing', 'summary'].
+tmpl_omitted_testcases_row = '''
+<tr class="table-light testcase-omitted-row">
+  <td colspan="{column_count}" class="text-center text-secondary"><small>{omitted_count} {omitted_kind}testcase(s) not listed (--only {only_mode})</small></td>
+</tr>
+'''
+
+# Template parameters:
+#   resource_title : Title of the resource usage column, e.g. 'CPU user (sec)'.
+tmpl_resource_header_cell = '''
+<th scope="col" class="testcase-header-resource">{resource_title}</th>
+'''
+
+# Template parameters:
+#   resource_value : Measured value of the testcase (empty if not measured).
+tmpl_resource_cell = '''
+<td class="text-right testcase-resource">{resource_value}</td>
+'''
+
+# Template parameters:
+#   flip_count : Number of outcome flips across the recent runs of the same build.
+#   flip_rate  : Share of the recent runs in which the outcome flipped (percent).
+tmpl_flaky_badge = '''
+<span class="badge badge-pill badge-warning testcase-flaky-badge" style="margin-left: 5px;" title="Outcome flipped {flip_count} time(s) across recent runs of the same build">flaky {flip_rate}%</span>
+'''
+
 # Template parameters:
 #   html_error_message_items : HTML code with list items
 tmpl_error_message_listing = '''
@@ -289,3 +392,556 @@ tmpl_error_message_listing = '''
 tmpl_error_message_item = '''
 <li>{error_message} {error_type}</li>
 '''
+
+# Template parameters:
+#   error_first_line : First line of the first error message of the testcase (HTML escaped).
+#   failure_count    : Number of failures of the testcase.
+# The markup is repeated on every failing row, so it has no comments, inline styles, classes or data attributes
+# besides the summary class: the styles are in gtest-report.css and the page finds the failure details of the
+# row by its position.
+tmpl_error_message_summary = '''
+<small class="failure-summary">{error_first_line} <span>{failure_count} failure(s)</span> <a href="#">Show details</a></small>
+'''
+
+
+# Template parameters:
+#   html_metrics_tables : HTML code with one metrics table per testsuite.
+tmpl_metrics_section = '''
+<!-- Metrics Section Begin -->
+<div style="margin-bottom:50px;" class="card" id="test-metrics">
+  <h4 class="card-header">Metrics</h4>
+  <div class="card-body">
+    <p><small class="text-secondary">Numeric values recorded with RecordProperty(). Click a column header to sort.</small></p>
+    {html_metrics_tables}
+  </div>
+</div>
+<!-- Metrics Section End -->
+'''
+
+# Template parameters:
+#   testsuite_name              : Name of the testsuite.
+#   html_metrics_header_cells   : HTML code with one header cell per metric.
+#   html_metrics_rows           : HTML code with one row per testcase.
+#   html_metrics_aggregate_rows : HTML code with the mean/min/max rows of the testsuite.
+tmpl_metrics_table = '''
+<h5 class="font-weight-bold">{testsuite_name}</h5>
+<div class="table-responsive">
+  <table class="metrics-table table table-bordered table-sm">
+    <thead>
+      <tr class="table-active text-center">
+        <th scope="col" class="metrics-sortable" data-column="0">Testcase</th>
+        {html_metrics_header_cells}
+      </tr>
+    </thead>
+    <tbody>
+      {html_metrics_rows}
+    </tbody>
+    <tfoot>
+      {html_metrics_aggregate_rows}
+    </tfoot>
+  </table>
+</div>
+'''
+
+# Template parameters:
+#   column_index : Index of the column inside the table (used for sorting).
+#   metric_name  : Name of the recorded property.
+tmpl_metrics_header_cell = '''
+<th scope="col" class="metrics-sortable" data-column="{column_index}">{metric_name}</th>
+'''
+
+# Template parameters:
+#   test_name          : Name of the testcase.
+#   html_metrics_cells : HTML code with one cell per metric.
+tmpl_metrics_row = '''
+<tr>
+  <td data-sort-value="{test_name}">{test_name}</td>
+  {html_metrics_cells}
+</tr>
+'''
+
+# Template parameters:
+#   sort_value   : Raw value of the metric (used for sorting).
+#   metric_value : Formatted value of the metric.
+#   sparkline    : SVG code with the metric across the previous runs (may be empty).
+tmpl_metrics_cell = '''
+<td class="text-right" data-sort-value="{sort_value}">{metric_value} {sparkline}</td>
+'''
+
+# Template parameters: none. Used when a testcase did not record a metric.
+tmpl_metrics_empty_cell = '''
+<td class="text-center" data-sort-value="">-</td>
+'''
+
+# Template parameters:
+#   aggregate_name     : Name of the aggregate ('mean', 'min', 'max').
+#   html_metrics_cells : HTML code with one aggregate cell per metric.
+tmpl_metrics_aggregate_row = '''
+<tr class="table-active">
+  <th scope="row">{aggregate_name}</th>
+  {html_metrics_cells}
+</tr>
+'''
+
+# Template parameters:
+#   metric_value : Formatted aggregate of the metric.
+tmpl_metrics_aggregate_cell = '''
+<td class="text-right">{metric_value}</td>
+'''
+
+# Template parameters:
+#   svg_width, svg_height : Size of the SVG.
+#   svg_points            : Points of the polyline, e.g. '1.0,19.0 40.0,1.0'.
+#   sparkline_title       : Tooltip of the sparkline.
+tmpl_sparkline_svg = '''<svg class="metric-sparkline" width="{svg_width}" height="{svg_height}" viewBox="0 0 {svg_width} {svg_height}"><title>{sparkline_title}</title><polyline points="{svg_points}" fill="none" stroke="#007bff" stroke-width="1.5"/></svg>'''
+
+# Template parameters:
+#   trend_run_count         : Number of runs shown in the trend.
+#   html_trend_header_cells : HTML code with one header cell per run.
+#   html_trend_rows         : HTML code with one row per testsuite.
+tmpl_trend_section = '''
+<!-- Trend Section Begin -->
+<div style="margin-bottom:50px;" class="card" id="test-trend">
+  <h4 class="card-header">Trend of the last {trend_run_count} runs</h4>
+  <div class="card-body">
+    <div class="table-responsive">
+      <table class="trend-table table table-bordered table-sm">
+        <thead>
+          <tr class="table-active text-center">
+            <th scope="col">Testsuite</th>
+            {html_trend_header_cells}
+          </tr>
+        </thead>
+        <tbody>
+          {html_trend_rows}
+        </tbody>
+      </table>
+    </div>
+  </div>
+</div>
+<!-- Trend Section End -->
+'''
+
+# Template parameters:
+#   run_id        : Id of the run inside the history database.
+#   run_timestamp : Timestamp of the run.
+tmpl_trend_header_cell = '''
+<th scope="col" title="{run_timestamp}">#{run_id}<br><small>{run_timestamp}</small></th>
+'''
+
+# Template parameters:
+#   testsuite_name   : Name of the testsuite.
+#   html_trend_cells : HTML code with one cell per run.
+tmpl_trend_row = '''
+<tr>
+  <th scope="row">{testsuite_name}</th>
+  {html_trend_cells}
+</tr>
+'''
+
+# Template parameters:
+#   html_class : HTML class to colorize the cell ['success', 'danger']
+#   pass_rate  : Pass rate of the testsuite in this run (percent).
+#   duration   : Sum of the testcase times of the testsuite in this run.
+tmpl_trend_cell = '''
+<td class="text-center table-{html_class}">{pass_rate}%<br><small>{duration} sec</small></td>
+'''
+
+# Template parameters: none. Used when a testsuite was not part of a run.
+tmpl_trend_empty_cell = '''
+<td class="text-center">-</td>
+'''
+
+# Template parameters:
+#   baseline_file_path   : Path to the baseline report.
+#   html_diff_summary    : HTML code with one count badge per diff category.
+#   html_diff_categories : HTML code with one table per non-empty diff category.
+tmpl_diff_section = '''
+<!-- Diff Section Begin -->
+<div style="margin-bottom:50px;" class="card" id="test-diff">
+  <h4 class="card-header">Changes since baseline</h4>
+  <div class="card-body">
+    <p><span class="font-weight-bold">Baseline file: </span>{baseline_file_path}</p>
+    <p>{html_diff_summary}</p>
+    {html_diff_categories}
+  </div>
+</div>
+<!-- Diff Section End -->
+'''
+
+# Template parameters:
+#   html_class     : HTML class of the badge ['danger', 'success', 'primary', 'secondary', 'warning']
+#   category_title : Title of the diff category.
+#   category_count : Number of testcases in the diff category.
+tmpl_diff_summary_badge = '''
+<span class="badge badge-{html_class}" style="margin-right: 5px;">{category_title}: {category_count}</span>
+'''
+
+# Template parameters:
+#   category_title : Title of the diff category.
+#   html_diff_rows : HTML code with one row per testcase.
+tmpl_diff_category = '''
+<h5 class="font-weight-bold">{category_title}</h5>
+<div class="table-responsive">
+  <table class="diff-table table table-bordered table-sm">
+    <thead>
+      <tr class="table-active text-center">
+        <th scope="col">Name</th>
+        <th scope="col">Baseline status</th>
+        <th scope="col">Current status</th>
+        <th scope="col">Baseline time (sec)</th>
+        <th scope="col">Current time (sec)</th>
+      </tr>
+    </thead>
+    <tbody>
+      {html_diff_rows}
+    </tbody>
+  </table>
+</div>
+'''
+
+# Template parameters:
+#   html_class       : HTML class to colorize the row.
+#   test_key         : 'classname::name' of the testcase.
+#   baseline_status  : Status in the baseline report ('-' if missing).
+#   current_status   : Status in the current report ('-' if missing).
+#   baseline_time    : Time in the baseline report ('-' if missing).
+#   current_time     : Time in the current report ('-' if missing).
+tmpl_diff_row = '''
+<tr class="table-{html_class}">
+  <td>{test_key}</td>
+  <td class="text-center">{baseline_status}</td>
+  <td class="text-center">{current_status}</td>
+  <td class="text-right">{baseline_time}</td>
+  <td class="text-right">{current_time}</td>
+</tr>
+'''
+
+# Template parameters:
+#   cause_count             : Number of distinct failure signatures.
+#   failure_count           : Number of failures.
+#   html_failure_cause_rows : HTML code with one row per listed failure signature.
+tmpl_failure_causes_panel = '''
+<!-- Failure Causes Panel Begin -->
+<div style="margin-bottom:50px;" class="card" id="test-failure-causes">
+  <h4 class="card-header">Top failure causes</h4>
+  <div class="card-body">
+    <p><small class="text-secondary">{failure_count} failure(s) grouped into {cause_count} signature(s): numbers, strings and printed values of the messages are masked.</small></p>
+    <div class="table-responsive">
+      <table class="failure-causes-table table table-bordered table-sm">
+        <thead>
+          <tr class="table-active text-center">
+            <th scope="col">#</th>
+            <th scope="col">Signature</th>
+            <th scope="col">Failures</th>
+            <th scope="col">Tests</th>
+            <th scope="col">Affected tests</th>
+          </tr>
+        </thead>
+        <tbody>
+          {html_failure_cause_rows}
+        </tbody>
+      </table>
+    </div>
+  </div>
+</div>
+<!-- Failure Causes Panel End -->
+'''
+
+# Template parameters:
+#   rank                : Rank of the signature (most failures first).
+#   signature           : The normalized failure message (HTML escaped).
+#   failure_count       : Number of failures with this signature.
+#   test_count          : Number of testcases with this signature.
+#   html_affected_tests : HTML code with links to the first affected testcases.
+tmpl_failure_cause_row = '''
+<tr>
+  <td class="text-center">{rank}</td>
+  <td><pre class="failure-signature">{signature}</pre></td>
+  <td class="text-right">{failure_count}</td>
+  <td class="text-right">{test_count}</td>
+  <td><small>{html_affected_tests}</small></td>
+</tr>
+'''
+
+# Template parameters:
+#   testsuite_html_id : HTML id of the testsuite of the testcase.
+#   test_label        : 'classname::name' of the testcase.
+tmpl_affected_test_link = '''
+<a href="#{testsuite_html_id}">{test_label}</a><br>
+'''
+
+# Template parameters:
+#   top_k                       : Number of entries in the slowest lists.
+#   html_slowest_testcase_rows  : HTML code with rows of the slowest testcases.
+#   html_slowest_testsuite_rows : HTML code with rows of the slowest testsuites.
+#   histogram_bucket_labels     : Labels of the histogram buckets.
+#   html_distribution_rows      : HTML code with one duration distribution row per testsuite.
+#   html_fixture_overhead       : HTML code with the fixture overhead ranking.
+tmpl_performance_panel = '''
+<!-- Performance Panel Begin -->
+<div style="margin-bottom:50px;" class="card" id="test-performance">
+  <h4 class="card-header">Performance</h4>
+  <div class="card-body">
+    <div class="row">
+      <div class="col-xl-6">
+        <h5 class="font-weight-bold">Top {top_k} slowest testcases</h5>
+        <table class="performance-table table table-bordered table-sm">
+          <thead>
+            <tr class="table-active text-center">
+              <th scope="col">#</th>
+              <th scope="col">Name</th>
+              <th scope="col">Time (sec)</th>
+            </tr>
+          </thead>
+          <tbody>
+            {html_slowest_testcase_rows}
+          </tbody>
+        </table>
+      </div>
+      <div class="col-xl-6">
+        <h5 class="font-weight-bold">Top {top_k} slowest testsuites</h5>
+        <table class="performance-table table table-bordered table-sm">
+          <thead>
+            <tr class="table-active text-center">
+              <th scope="col">#</th>
+              <th scope="col">Name</th>
+              <th scope="col">Time (sec)</th>
+            </tr>
+          </thead>
+          <tbody>
+            {html_slowest_testsuite_rows}
+          </tbody>
+        </table>
+      </div>
+    </div>
+    <h5 class="font-weight-bold">Duration distribution per testsuite</h5>
+    <div class="table-responsive">
+      <table class="performance-table table table-bordered table-sm">
+        <thead>
+          <tr class="table-active text-center">
+            <th scope="col">Testsuite</th>
+            <th scope="col">Tests</th>
+            <th scope="col">p50 (sec)</th>
+            <th scope="col">p90 (sec)</th>
+            <th scope="col">p99 (sec)</th>
+            <th scope="col" title="{histogram_bucket_labels}">Histogram</th>
+          </tr>
+        </thead>
+        <tbody>
+          {html_distribution_rows}
+        </tbody>
+      </table>
+    </div>
+    {html_fixture_overhead}
+  </div>
+</div>
+<!-- Performance Panel End -->
+'''
+
+# Template parameters:
+#   rank           : Rank in the slowest list.
+#   name           : Name of the testcase or testsuite.
+#   execution_time : Execution time.
+tmpl_slowest_row = '''
+<tr>
+  <td class="text-center">{rank}</td>
+  <td>{name}</td>
+  <td class="text-right">{execution_time}</td>
+</tr>
+'''
+
+# Template parameters:
+#   testsuite_name     : Name of the testsuite.
+#   test_count         : Number of testcases with a valid time.
+#   p50, p90, p99      : Percentiles of the testcase times.
+#   html_histogram_svg : Inline SVG with the duration histogram.
+tmpl_distribution_row = '''
+<tr>
+  <td>{testsuite_name}</td>
+  <td class="text-right">{test_count}</td>
+  <td class="text-right">{p50}</td>
+  <td class="text-right">{p90}</td>
+  <td class="text-right">{p99}</td>
+  <td class="text-center">{html_histogram_svg}</td>
+</tr>
+'''
+
+# Template parameters:
+#   svg_width, svg_height : Size of the SVG.
+#   html_histogram_bars   : SVG code with one rect per bucket.
+tmpl_histogram_svg = '''<svg class="duration-histogram" width="{svg_width}" height="{svg_height}" viewBox="0 0 {svg_width} {svg_height}">{html_histogram_bars}</svg>'''
+
+# Template parameters:
+#   bar_x, bar_y, bar_width, bar_height : Geometry of the bar.
+#   bucket_label                        : Label of the histogram bucket.
+#   bucket_count                        : Number of testcases in the bucket.
+tmpl_histogram_bar = '''<rect x="{bar_x}" y="{bar_y}" width="{bar_width}" height="{bar_height}" fill="#007bff"><title>{bucket_label}: {bucket_count}</title></rect>'''
+
+# Template parameters:
+#   overhead_threshold         : Threshold (percent of the wall time) above which testsuites are highlighted.
+#   run_suite_overhead         : Sum of the fixture overheads of all testsuites.
+#   run_global_overhead        : Wall time of the run outside of all testsuites.
+#   run_overhead_rate          : Share of the run wall time spent in fixtures (percent).
+#   html_fixture_overhead_rows : HTML code with one row per testsuite, ranked by overhead.
+tmpl_fixture_overhead = '''
+<h5 class="font-weight-bold">Fixture overhead (testsuite wall time - sum of testcase times)</h5>
+<p>
+  <small class="text-secondary">
+    Testsuite fixtures: {run_suite_overhead} sec, outside of testsuites: {run_global_overhead} sec,
+    {run_overhead_rate}% of the run. Testsuites above {overhead_threshold}% of their wall time are highlighted.
+  </small>
+</p>
+<div class="table-responsive">
+  <table class="performance-table table table-bordered table-sm">
+    <thead>
+      <tr class="table-active text-center">
+        <th scope="col">#</th>
+        <th scope="col">Testsuite</th>
+        <th scope="col">Wall time (sec)</th>
+        <th scope="col">Testcase time (sec)</th>
+        <th scope="col">Overhead (sec)</th>
+        <th scope="col">Overhead (%)</th>
+      </tr>
+    </thead>
+    <tbody>
+      {html_fixture_overhead_rows}
+    </tbody>
+  </table>
+</div>
+'''
+
+# Template parameters:
+#   html_class     : HTML class to colorize the row ('danger' above the threshold, otherwise empty).
+#   rank           : Rank by overhead.
+#   testsuite_name : Name of the testsuite.
+#   wall_time      : Wall time of the testsuite.
+#   testcase_time  : Sum of the testcase times.
+#   overhead       : Fixture overhead.
+#   overhead_rate  : Fixture overhead in percent of the wall time.
+tmpl_fixture_overhead_row = '''
+<tr class="table-{html_class}">
+  <td class="text-center">{rank}</td>
+  <td>{testsuite_name}</td>
+  <td class="text-right">{wall_time}</td>
+  <td class="text-right">{testcase_time}</td>
+  <td class="text-right">{overhead}</td>
+  <td class="text-right">{overhead_rate}</td>
+</tr>
+'''
+
+# Template parameters:
+#   binary_name   : File name of the running gtest binary.
+#   test_total    : Number of tests to run ('' if unknown, e.g. with a --gtest_filter).
+#   recent_shown  : Number of recently finished tests listed.
+#   failures_kept : Number of failures listed.
+tmpl_live_report_html = '''
+<!doctype html>
+<html lang="en">
+  <head>
+    <!-- Required meta tags -->
+    <meta charset="utf-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1, shrink-to-fit=no">
+    <!-- Bootstrap CSS -->
+    <link rel="stylesheet" href="https://maxcdn.bootstrapcdn.com/bootstrap/4.0.0/css/bootstrap.min.css" integrity="sha384-Gn5384xqQ1aoWXA+058RXPxPg6fy4IWvTNh0E263XmFcJlSAwiGgFAW/dAiS6JXm" crossorigin="anonymous">
+    <!-- Custom CSS -->
+    <link href="css/gtest-report.css" rel="stylesheet">
+    <title>Googletest Live Report - {binary_name}</title>
+  </head>
+  <body>
+    <nav class="navbar navbar-dark sticky-top bg-dark">
+      <span class="navbar-brand">Live: {binary_name}</span>
+    </nav>
+
+    <main role="main" class="container pt-3 live-report" id="live-report" data-total="{test_total}"
+          data-recent-shown="{recent_shown}" data-failures-kept="{failures_kept}">
+      <p class="live-status" id="live-status">Connecting...</p>
+      <div class="progress live-progress">
+        <div class="progress-bar bg-success" id="live-progress-passed" role="progressbar" style="width: 0%"></div>
+        <div class="progress-bar bg-danger" id="live-progress-failed" role="progressbar" style="width: 0%"></div>
+        <div class="progress-bar bg-warning" id="live-progress-skipped" role="progressbar" style="width: 0%"></div>
+      </div>
+      <p class="mt-2">
+        <span class="badge badge-success" id="live-count-passed">0</span> passed,
+        <span class="badge badge-danger" id="live-count-failed">0</span> failed,
+        <span class="badge badge-warning" id="live-count-skipped">0</span> skipped,
+        <span id="live-count-finished">0</span> of <span id="live-count-total">{test_total}</span> finished
+        in <span id="live-elapsed">0</span> sec
+      </p>
+      <p>Running: <code id="live-current">-</code></p>
+
+      <h5 class="font-weight-bold">Failures <small class="text-secondary">(the last {failures_kept})</small></h5>
+      <div id="live-failures"></div>
+
+      <h5 class="font-weight-bold">Recently finished <small class="text-secondary">(the last {recent_shown})</small></h5>
+      <table class="table table-bordered table-sm">
+        <thead>
+          <tr class="table-active text-center">
+            <th scope="col">Test</th>
+            <th scope="col">Time (sec)</th>
+            <th scope="col">Status</th>
+          </tr>
+        </thead>
+        <tbody id="live-recent"></tbody>
+      </table>
+    </main>
+    <!-- Custom javascript -->
+    <script src="js/gtest-live.js"></script>
+  </body>
+</html>
+'''
+
+# Template parameters:
+#   directory_name  : The listed directory, relative to the root of the report server.
+#   report_count    : Number of reports found below the directory.
+#   report_rows     : HTML for the reports (tmpl_report_index_row).
+#   resource_prefix : Location of the html_resources files.
+tmpl_report_index_html = '''
+<!doctype html>
+<html lang="en">
+  <head>
+    <!-- Required meta tags -->
+    <meta charset="utf-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1, shrink-to-fit=no">
+    <!-- Bootstrap CSS -->
+    <link rel="stylesheet" href="https://maxcdn.bootstrapcdn.com/bootstrap/4.0.0/css/bootstrap.min.css" integrity="sha384-Gn5384xqQ1aoWXA+058RXPxPg6fy4IWvTNh0E263XmFcJlSAwiGgFAW/dAiS6JXm" crossorigin="anonymous">
+    <!-- Custom CSS -->
+    <link href="{resource_prefix}css/gtest-report.css" rel="stylesheet">
+    <title>Googletest Reports - {directory_name}</title>
+  </head>
+  <body>
+    <nav class="navbar navbar-dark sticky-top bg-dark">
+      <span class="navbar-brand">Reports in {directory_name}</span>
+    </nav>
+
+    <main role="main" class="container pt-3">
+      <p>{report_count} report(s) found.</p>
+      <table class="table table-bordered table-sm">
+        <thead>
+          <tr class="table-active text-center">
+            <th scope="col">Report</th>
+            <th scope="col">Modified</th>
+            <th scope="col">Size (KiB)</th>
+          </tr>
+        </thead>
+        <tbody>
+          {report_rows}
+        </tbody>
+      </table>
+    </main>
+  </body>
+</html>
+'''
+
+# Template parameters:
+#   report_url  : URL of the rendered report.
+#   report_path : Path of the report file, relative to the listed directory.
+#   modified    : Modification time of the report file.
+#   size        : Size of the report file in KiB.
+tmpl_report_index_row = '''
+<tr>
+  <td><a href="{report_url}">{report_path}</a></td>
+  <td class="text-center">{modified}</td>
+  <td class="text-right">{size}</td>
+</tr>
+'''
@@ -3,31 +3,62 @@ import os
 import shutil
 import glob
 import math
-import xml.etree.ElementTree as ET
+import re
+import heapq
+import bisect
+import argparse
+import json
+import html
+import base64
+import multiprocessing
+import concurrent.futures
 from templates.html_templates import *
+from templates import html_templates
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'reportTools'))
+from run_history import open_history, query_suite_trends, query_metric_history, detect_flaky_tests
+from report_diff import diff_model, DIFF_CATEGORIES
+from fixture_overhead import make_suite_overhead, make_run_overhead, rank_fixture_overheads
+from resource_usage import RESOURCE_PROPERTIES
+from test_metrics import metrics_from_properties, aggregate_metrics, format_metric_value
+from report_model import build_model, walk_model, suite_count, suite_cases, case_failures, format_time, STATUS_CODES
+from gtest_report import STATUS_FAILED, STATUS_NOTRUN
+from failure_signature import group_failure_causes
+from search_index import build_search_index
+import report_stats
+from report_stats import HISTOGRAM_BUCKET_EDGES
+from fragment_cache import template_version, suite_content, fragment_key, load_fragment, store_fragment, evict_fragments, FRAGMENTS_PER_SUITE
 # Importing required libraries:
 # - sys: for system-specific parameters and functions.
 # - os: for interacting with the operating system (file/directory handling).
 # - shutil: for file operations like copying or removing files.
 # - glob: for file pattern matching and retrieving file paths.
 # - math: for mathematical operations.
-# - xml.etree.ElementTree (ET): for parsing XML reports.
+# - re: for resolving the marked HTML ids of the cached testsuite fragments.
+# - heapq, bisect: for the bounded top-K heaps and the duration histogram buckets.
+# - argparse: for parsing command-line arguments.
+# - json: for the failure details files loaded by the report page.
+# - html: for escaping the failure signatures and tags.
+# - base64: for the row bitsets of the tag index.
+# - multiprocessing, concurrent.futures: for rendering the testsuites in a process pool.
 # - html_templates: presumably a module with HTML templates used for report generation.
+#   The module itself is hashed for the version of the cached testsuite fragments.
+# - run_history: the local run-history database (from the reportTools directory).
+# - report_diff: comparison of a baseline and a current report (from the reportTools directory).
+# - fixture_overhead: fixture/setup overhead of testsuites (from the reportTools directory).
+# - resource_usage: per-test CPU time and peak RSS properties (from the reportTools directory).
+# - test_metrics: numeric RecordProperty values of the testcases (from the reportTools directory).
+# - report_model: the report model built by one streaming parse (from the reportTools directory).
+# - gtest_report: the normalized testcase statuses (from the reportTools directory).
+# - failure_signature: grouping of the failures by their normalized message (from the reportTools directory).
+# - search_index: the inverted index of the testcase search (from the reportTools directory).
+# - report_stats: vectorized per-testsuite statistics of the model, if numpy is installed (from the reportTools directory).
+# - fragment_cache: the on-disk cache of the rendered testsuites (from the reportTools directory).
 
 # Template scheme.
 # -> tmpl_main_html[]
 # This comment likely refers to a structure or pattern used in the HTML templates (tmpl_main_html[]),
 # probably defining the layout or structure of the HTML output.
 
-def usage():
-    print('Usage:')
-    print('  python Gtest2Html.py <REPORT_FILE> <OUTPUT_FILE>')
-    print('  Args:')
-    print('    REPORT_FILE: Gtest xml report.')
-    print('    OUTPUT_FILE: Path to the output file, e.g. "index.html"')
-# The `usage()` function prints instructions for how to run the script.
-# It explains that the script converts a Google Test (Gtest) XML report into an HTML file.
-
 def error_gen(actual, rounded):
     divisor = math.sqrt(1.0 if actual < 1.0 else actual)
     return abs(rounded - actual) ** 2 / divisor
@@ -64,29 +95,10 @@ def round_to_100(percents):
     return rounded
     # Return the final list of rounded percentages that sum to exactly 100.
 
-def check_for_unkown_attributes(xml_node, known_attributes, include_empty_attributes=False):
-    # Print warning for each unknown attribute inside the xml node.
-    # - xml_node: the XML node to check.
-    # - known_attributes: a list of valid or expected attributes for this node.
-    # - include_empty_attributes: if True, include attributes with empty values in the warning.
-
-    for unknown_attribute in list(filter(lambda x: x not in known_attributes, xml_node.attrib)):
-        # For each attribute in the XML node's attributes (xml_node.attrib),
-        # check if it is NOT in the list of known attributes.
-        # `filter` is used to get only unknown attributes, and `list` makes it iterable.
-
-        if not xml_node.attrib[unknown_attribute].strip() or include_empty_attributes:
-            # Check if the unknown attribute's value is either empty (strip removes whitespace)
-            # or if the include_empty_attributes flag is set to True.
-
-            print('Warning: Unknown attribute {!r} found in node {!s}[{!r}] which is not parsed.'.format(
-                unknown_attribute, xml_node.tag, xml_node.attrib))
-            # Print a warning with details of the unknown attribute:
-            # - {unknown_attribute}: the name of the unknown attribute.
-            # - {xml_node.tag}: the tag name of the current XML node.
-            # - {xml_node.attrib}: the entire dictionary of attributes for this node.
-
-def generate_progress_bars(abs_total, abs_success, abs_fail, abs_disabled):
+def generate_progress_bars(abs_total, abs_success, abs_fail, abs_disabled, rounded_percentage_list=None):
+    # `rounded_percentage_list` holds the already rounded (success, fail, disabled) percentages
+    # if they were computed for all testsuites at once (report_stats); otherwise they are rounded here.
+
     html_progressbars = ''
     # Initialize an empty string to hold the generated HTML progress bars.
 
@@ -109,7 +121,8 @@ def generate_progress_bars(abs_total, abs_success, abs_fail, abs_disabled):
         # Calculate the percentage for each of the success, fail, and disabled tests.
         # Each percentage is relative to the total number of tests (abs_total).
 
-        rounded_percentage_list = round_to_100(percentage_list)
+        if rounded_percentage_list is None:
+            rounded_percentage_list = round_to_100(percentage_list)
         # Use the `round_to_100` function to ensure that the sum of the percentages is exactly 100.
 
         for idx in range(len(abs_value_list)):
@@ -150,82 +163,142 @@ def generate_progress_bars(abs_total, abs_success, abs_fail, abs_disabled):
 
 
 
-def get_xml_attribute(convert_func, xml_node, attribute_name, default_value, print_warning=True):
-    # This function retrieves an attribute from an XML node.
-    # - convert_func: a function to convert the attribute value (e.g., to int, float, etc.).
-    # - xml_node: the XML element containing the attribute.
-    # - attribute_name: the name of the attribute to retrieve.
-    # - default_value: the value to return if the attribute is not found.
-    # - print_warning: if True, print a warning when the attribute is missing.
+# Labels of the duration histogram buckets (upper bounds in report_stats.HISTOGRAM_BUCKET_EDGES).
+HISTOGRAM_BUCKET_LABELS = ['&lt; 1 ms', '&lt; 10 ms', '&lt; 100 ms', '&lt; 1 s', '&lt; 10 s', '&gt;= 10 s']
+
+# Size of the inline histogram SVG.
+HISTOGRAM_SVG_HEIGHT = 24
+HISTOGRAM_SVG_BAR_WIDTH = 16
+
+# Size of the inline metric sparkline SVG.
+SPARKLINE_SVG_WIDTH = 80
+SPARKLINE_SVG_HEIGHT = 20
+
+
+def create_performance_stats(top_k, overhead_threshold=0.2, suite_stats=None):
+    # This function creates the accumulator for the performance panel.
+    # It is filled while the testsuites and testcases are rendered, so no extra pass over the XML tree is needed.
+    # - slowest_testcases / slowest_testsuites: bounded min-heaps with the `top_k` largest times.
+    # - suite_times: parsed testcase times per testsuite (for the percentiles).
+    # - suite_histograms: duration histogram per testsuite (one counter per bucket).
+    # - suite_overheads: fixture overhead record per testsuite; highlighted above `overhead_threshold`.
+    # - suite_stats: the vectorized statistics of all testsuites (report_stats.compute_suite_stats), if available.
+    #   Then the testsuite durations, percentiles and histograms are taken from there instead of being
+    #   accumulated per testcase.
+
+    return {
+        'top_k': top_k,
+        'overhead_threshold': overhead_threshold,
+        'suite_overheads': [],
+        'slowest_testcases': [],
+        'slowest_testsuites': [],
+        'suite_times': {},
+        'suite_histograms': {},
+        'suite_stats': suite_stats,
+        'sequence': 0
+    }
+
+
+def push_bounded(performance_stats, heap_name, execution_time, label):
+    # Push (execution_time, label) into the bounded min-heap `heap_name`.
+    # The heap never holds more than `top_k` items: once full, the smallest item is replaced.
+
+    heap = performance_stats[heap_name]
+    performance_stats['sequence'] += 1
+    item = (execution_time, performance_stats['sequence'], label)
+    # The sequence number keeps equal times in insertion order and avoids comparing labels.
+
+    if len(heap) < performance_stats['top_k']:
+        heapq.heappush(heap, item)
+    elif heap and item > heap[0]:
+        heapq.heapreplace(heap, item)
+    # With top_k 0 the heap stays empty and the panel lists no testcases and testsuites.
+
+
+def parse_execution_time(execution_time):
+    # Convert a time attribute to float. Returns None for missing or invalid values.
+
+    try:
+        return float(execution_time)
+    except (TypeError, ValueError):
+        return None
+
+
+def record_testcase_time(performance_stats, testsuite_name, test_label, execution_time):
+    # Record the time of one testcase in the performance accumulator.
+
+    execution_time = parse_execution_time(execution_time)
+    if execution_time is None or performance_stats is None:
+        return
+
+    push_bounded(performance_stats, 'slowest_testcases', execution_time, test_label)
+    if performance_stats['suite_stats'] is not None:
+        return
+    # The vectorized statistics already hold the times and histograms of all testsuites.
+
+    performance_stats['suite_times'].setdefault(testsuite_name, []).append(execution_time)
+
+    histogram = performance_stats['suite_histograms'].setdefault(testsuite_name, [0] * len(HISTOGRAM_BUCKET_LABELS))
+    histogram[bisect.bisect_right(HISTOGRAM_BUCKET_EDGES, execution_time)] += 1
+    # Count the testcase in the first bucket whose upper bound is larger than its time.
+
+
+def record_testsuite_time(performance_stats, testsuite_name, execution_time):
+    # Record the wall time of one testsuite in the performance accumulator.
+
+    execution_time = parse_execution_time(execution_time)
+    if execution_time is None or performance_stats is None:
+        return
 
-    if not attribute_name in xml_node.attrib and print_warning:
-        # Check if the attribute is not present in the XML node's attributes (`xml_node.attrib`).
-        # If `print_warning` is True, print a warning message about the missing attribute.
+    push_bounded(performance_stats, 'slowest_testsuites', execution_time, testsuite_name)
 
-        print('Warning: Attribute {!r} was not found inside xml node {!s}[{!r}]. Set it to its default value {!r}.'.format(
-            attribute_name, xml_node.tag, xml_node.attrib, default_value))
-        # Print a warning message, providing:
-        # - {attribute_name}: the missing attribute.
-        # - {xml_node.tag}: the XML node's tag.
-        # - {xml_node.attrib}: the node's entire attribute dictionary.
-        # - {default_value}: the default value being used as a substitute.
 
-        return default_value
-        # If the attribute is not found, return the provided default value.
+def percentile(sorted_values, percent):
+    # Nearest-rank percentile of an already sorted, non-empty list.
 
-    return convert_func(xml_node.attrib[attribute_name])
-    # If the attribute is found, use the `convert_func` to convert its value (e.g., string to int)
-    # and return the converted value.
+    rank = max(int(math.ceil(percent / 100.0 * len(sorted_values))), 1)
+    return sorted_values[rank - 1]
 
-def generate_total_test_summary(xml_testsuites_node):
-    # This function generates a summary of the test results from the root XML <testsuites> node.
-    # It parses attributes from the node, generates progress bars, and prepares HTML content
-    # summarizing the results.
 
-    # Parse the testsuites node attributes.
-    total_abs_test_count = get_xml_attribute(int, xml_testsuites_node, 'tests', 0)
-    # Retrieve the total number of tests from the 'tests' attribute and convert it to an integer.
-    # If not present, use 0 as the default value.
+def generate_total_test_summary(model, suite_stats=None):
+    # This function generates a summary of the test results from the header of the report model.
+    # It generates progress bars and prepares HTML content summarizing the results.
+    # The path of the report shown in the summary is the report file of the model.
+    # With `suite_stats` (report_stats), the progress bar percentages were already rounded.
 
-    total_abs_fail_count = get_xml_attribute(int, xml_testsuites_node, 'failures', 0)
-    # Retrieve the total number of failed tests from the 'failures' attribute, with a default of 0.
+    header = model['header']
+    # Attributes of the root <testsuites> node, read by the streaming parser.
 
-    total_abs_disabled_count = get_xml_attribute(int, xml_testsuites_node, 'disabled', 0)
-    # Retrieve the total number of disabled tests from the 'disabled' attribute, with a default of 0.
+    total_abs_test_count = header['tests']
+    # The total number of tests from the 'tests' attribute (0 if not present).
+
+    total_abs_fail_count = header['failures']
+    # The total number of failed tests from the 'failures' attribute (0 if not present).
+
+    total_abs_disabled_count = header['disabled']
+    # The total number of disabled tests from the 'disabled' attribute (0 if not present).
 
     total_abs_success_count = total_abs_test_count - total_abs_fail_count - total_abs_disabled_count
     # Calculate the number of successful tests by subtracting the failures and disabled tests from the total.
 
-    total_execution_time = get_xml_attribute(str, xml_testsuites_node, 'time', 0)
-    # Retrieve the total execution time from the 'time' attribute, defaulting to 0 if not present.
+    total_execution_time = format_time(header['time_text'])
+    # The total execution time from the 'time' attribute.
 
-    test_timestamp = get_xml_attribute(str, xml_testsuites_node, 'timestamp', 0)
-    # Retrieve the timestamp from the 'timestamp' attribute, defaulting to 0 if not present.
+    test_timestamp = header['timestamp']
+    # The timestamp from the 'timestamp' attribute.
 
     # Kiểm tra và thêm thuộc tính 'project' nếu chưa có
     # Check and add the 'project' attribute if it's missing
-    test_project_name = xml_testsuites_node.attrib.get('project', 'Assignment 02: Automation Test Framework')
+    test_project_name = header['project'] or 'Assignment 02: Automation Test Framework'
     # Use the 'project' attribute if available, otherwise set the default project name to 'Assignment 02: Automation Test Framework'.
 
-    xml_testsuites_node.set('project', test_project_name)
-    # Set the 'project' attribute in the XML node to the determined value.
-
     # Kiểm tra và thêm thuộc tính 'author' nếu chưa có
     # Check and add the 'author' attribute if it's missing
-    test_author = xml_testsuites_node.attrib.get('author', 'Minh Hoang Tran - HoangTM17')
+    test_author = header['author'] or 'Minh Hoang Tran - HoangTM17'
     # Use the 'author' attribute if available, otherwise default to 'Minh Hoang Tran - HoangTM17'.
 
-    xml_testsuites_node.set('author', test_author)
-    # Set the 'author' attribute in the XML node to the determined value.
-
-    testsuite_name = get_xml_attribute(str, xml_testsuites_node, 'name', 'undefined')
-    # Retrieve the 'name' attribute of the test suite, defaulting to 'undefined' if not present.
-
-    # Print warning for each unknown attribute inside the node testsuites.
-    check_for_unkown_attributes(xml_testsuites_node, ['tests', 'failures',
-                                                      'disabled', 'time', 'timestamp', 'author', 'name', 'project'])
-    # Call the function to check for any unknown attributes in the <testsuites> node.
-    # It checks against a list of expected attributes and prints warnings for any unknown ones.
+    testsuite_name = header['name'] or 'undefined'
+    # The 'name' attribute of the test run, defaulting to 'undefined' if not present.
 
     # Generate HTML for the navigation bar.
     test_navbar = tmpl_test_navbar.format(
@@ -239,14 +312,15 @@ def generate_total_test_summary(xml_testsuites_node):
         abs_total=total_abs_test_count,
         abs_success=total_abs_success_count,
         abs_fail=total_abs_fail_count,
-        abs_disabled=total_abs_disabled_count
+        abs_disabled=total_abs_disabled_count,
+        rounded_percentage_list=None if suite_stats is None else suite_stats['run_percentages'].tolist()
     )
     # Generate progress bars using the `generate_progress_bars` function.
     # It creates bars based on the number of total, success, fail, and disabled tests.
 
     # Generate HTML for the test summary.
     total_test_result = tmpl_total_test_result.format(
-        report_file_path=os.path.basename(report_file),
+        report_file_path=os.path.basename(model['report_file']),
         # Get the base name of the report file to include in the summary.
 
         testsuite_name=testsuite_name,
@@ -283,223 +357,614 @@ def generate_total_test_summary(xml_testsuites_node):
     # Return the generated HTML components: the navigation bar, progress bars, and the test result summary.
 
 
-def generate_single_testcase_rows(xml_testsuite_node):
-    # This function generates HTML rows for each test case in a given <testsuite> XML node.
-    # It processes each <testcase> element and formats it into an HTML row for display.
+# Failing testcases per failure details file; the page loads one file when a failure is expanded.
+FAILURE_CHUNK_SIZE = 200
 
-    html_single_testcase_rows = ''
-    # Initialize an empty string to accumulate HTML rows for all test cases.
+# Suffix of the directory with the failure details files, e.g. ReportTest.html -> ReportTest_failures/.
+FAILURE_DETAILS_SUFFIX = '_failures'
 
-    xml_testcase_nodes = xml_testsuite_node.findall('./testcase')
-    # Find all <testcase> nodes within the <testsuite> node.
 
-    if len(xml_testcase_nodes) == 0:
-        print("Warning: No nodes {!r} found in testsuite element with name {!r}.".format(
-            'testcase', test_name))
-        # If no <testcase> nodes are found, print a warning. Note that `test_name` needs to be defined or retrieved from the context.
+def create_failure_details(destination_file):
+    # Accumulator for the failure details written next to the HTML report.
+    # The page only holds the first line and the failure count of a failing testcase; its messages, types
+    # and texts are written to the chunk files <report name>_failures/failures_<n>.js, loaded on click by
+    # gtest-report.js. A chunk file is a script (not JSON), so the page also loads it from the local disk.
+    # - directory: absolute path of the chunk directory.
+    # - url: path of the chunk directory relative to the report page.
+    # - case_ids: the failing testcases in report order; testcase i of this list goes into chunk i // FAILURE_CHUNK_SIZE.
+    #   The failing rows are in the same order in the page, so gtest-report.js finds the chunk of a row by counting.
 
-    for idx, xml_testcase_node in enumerate(xml_testcase_nodes):
-        # Iterate over each <testcase> node, with `idx` being the index of the test case.
+    directory_name = os.path.splitext(os.path.basename(destination_file))[0] + FAILURE_DETAILS_SUFFIX
+    return {
+        'directory': os.path.join(os.path.dirname(os.path.realpath(destination_file)), directory_name),
+        'url': directory_name + '/',
+        'case_ids': [],
+    }
 
-        test_number = idx + 1
-        # Assign a sequential number to the test case, starting from 1.
 
-        test_name = get_xml_attribute(str, xml_testcase_node, 'name', '-undefined-')
-        # Retrieve the 'name' attribute of the test case, defaulting to '-undefined-' if not present.
+def failure_chunk_name(chunk_index):
+    # File name of a failure details chunk.
 
-        test_execution_time = get_xml_attribute(str, xml_testcase_node, 'time', '-undefined-')
-        # Retrieve the 'time' attribute of the test case, defaulting to '-undefined-' if not present.
+    return 'failures_{}.js'.format(chunk_index)
 
-        test_status = get_xml_attribute(str, xml_testcase_node, 'status', '-undefined-')
-        # Retrieve the 'status' attribute of the test case, defaulting to '-undefined-' if not present.
 
-        test_classname = get_xml_attribute(str, xml_testcase_node, 'classname', '-undefined-')
-        # Retrieve the 'classname' attribute of the test case, defaulting to '-undefined-' if not present.
+def write_failure_details(model, failure_details):
+    # Write the failure details chunks collected while the testcase rows were rendered.
+    # Each chunk calls gtestReportFailureChunk({case id: [{message, type, text}, ...]}) of gtest-report.js.
+    # Chunks of a previous report in the same directory are removed first.
 
-        # Kiểm tra và thêm thuộc tính 'tags' nếu chưa có
-        # Check and add the 'tags' attribute if it's missing
-        if 'tags' not in xml_testcase_node.attrib:
-            xml_testcase_node.set('tags', '')
-        # Set the 'tags' attribute to an empty string if it is not present in the XML node.
+    directory = failure_details['directory']
+    for stale_file in glob.glob(os.path.join(directory, failure_chunk_name('*'))):
+        os.remove(stale_file)
 
-        test_tags = xml_testcase_node.attrib['tags']
-        # Retrieve the 'tags' attribute from the test case.
+    case_ids = failure_details['case_ids']
+    if not case_ids:
+        return
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
 
-        test_icon_name = ''
-        test_html_class = 'primary'
-        html_error_message_list = ''
-        # Initialize variables for the test case's icon name, HTML class, and error message list.
+    for chunk_index, chunk_start in enumerate(range(0, len(case_ids), FAILURE_CHUNK_SIZE)):
+        chunk = {}
+        for case_id in case_ids[chunk_start:chunk_start + FAILURE_CHUNK_SIZE]:
+            chunk[str(case_id)] = [{
+                'message': model['failure_message'][failure_id] or '-undefined-',
+                'type': model['failure_type'][failure_id],
+                'text': '' if model['failure_text'][failure_id] == model['failure_message'][failure_id]
+                        else model['failure_text'][failure_id],
+            } for failure_id in case_failures(model, case_id)]
+            # gtest usually repeats the message as text of the failure; it is only written once.
+        with open(os.path.join(directory, failure_chunk_name(chunk_index)), 'w') as fout:
+            fout.write('gtestReportFailureChunk({});\n'.format(json.dumps(chunk, separators=(',', ':'))))
 
-        # Print warning for each unknown attribute inside the node testcase.
-        check_for_unkown_attributes(
-            xml_testcase_node, ['name', 'time', 'status', 'classname', 'tags'])
-        # Check for any unknown attributes in the <testcase> node and print warnings if found.
 
-        # Select icon name and HTML class considering the number of failure-children and the test status.
-        xml_failure_nodes = xml_testcase_node.findall('./failure')
-        # Find all <failure> nodes within the current <testcase> node.
+def split_tags(tags):
+    # Split the 'tags' attribute of a testcase, e.g. 'fast;math' -> ['fast', 'math'].
 
-        if len(xml_failure_nodes) == 0 and test_status == 'run':
-            test_icon_name = 'check'
-            test_html_class = 'success'
-        elif test_status == 'notrun':
-            test_icon_name = 'warning'
-            test_html_class = 'warning'
-        else:
-            test_icon_name = 'x'
-            test_html_class = 'danger'
-        # Determine the icon and HTML class based on the presence of <failure> nodes and the test status:
-        # - No failures and status 'run' -> success (check icon)
-        # - Status 'notrun' -> warning (warning icon)
-        # - All other cases -> danger (error icon)
-
-        # If failures occur, generate the listing with error messages.
-        if len(xml_failure_nodes) > 0:
-            html_error_message_items = ''
-            for xml_failure_node in xml_failure_nodes:
-                error_message = get_xml_attribute(
-                    str, xml_failure_node, 'message', '-undefined-')
-                # Retrieve the 'message' attribute from each <failure> node, defaulting to '-undefined-' if not present.
-
-                error_type = get_xml_attribute(str, xml_failure_node, 'type', '-undefined-')
-                # Retrieve the 'type' attribute from each <failure> node, defaulting to '-undefined-' if not present.
-                error_type = '' if not error_type else ' (type = {})'.format(error_type)
-                # Format the error type if it exists.
-
-                # Print warning for each unknown attribute inside the node failure.
-                check_for_unkown_attributes(xml_failure_node, ['message', 'type'])
-                # Check for any unknown attributes in the <failure> node and print warnings if found.
-
-                html_error_message_items += tmpl_error_message_item.format(
-                    error_message=error_message,
-                    error_type=error_type
-                )
-                # Append the formatted error message item to the list.
+    return [tag for tag in tags.split(';') if tag]
+
+
+def generate_single_testcase_row(model, case_id, test_number, flaky_tests, performance_stats=None,
+                                 show_resources=False, failure_details=None, html_id=None):
+    # This function generates the HTML row of one testcase of the report model.
+    # The row gets the HTML id 'testcase-<html_id>', by default the testcase id.
+    # Testcases contained in `flaky_tests` ({'classname::name': (flip_count, flip_rate)}) get a flaky badge.
+    # The testcase time is recorded in `performance_stats` (if given) while the row is rendered.
+    # With `show_resources`, the row gets the CPU time and peak RSS cells.
+    # With `failure_details` (create_failure_details), a failing testcase only shows the first line of its
+    # first error message and is added to the failure details files; otherwise all messages are inlined.
+
+    test_name = model['case_name'][case_id] or '-undefined-'
+    # The 'name' attribute of the test case, '-undefined-' if not present.
+
+    test_execution_time = model['case_time'][case_id]
+    # The 'time' attribute of the test case in seconds.
+
+    test_execution_text = format_time(model['case_time_text'][case_id], '-undefined-')
+    # The 'time' attribute of the test case as written in the report, '-undefined-' if not present.
+
+    test_status = model['states'][model['case_state'][case_id]][0]
+    # The raw 'status' attribute of the test case ('run' or 'notrun').
+
+    test_classname = model['case_classname'][case_id] or '-undefined-'
+    # The 'classname' attribute of the test case, '-undefined-' if not present.
+
+    test_tags = model['case_tags'][case_id]
+    # The 'tags' attribute of the test case (empty if not present).
+
+    test_tag_badges = ''.join(tmpl_tag_badge.format(tag=html.escape(tag)) for tag in split_tags(test_tags))
+    # One badge per tag, rendered here so the page does not add them to every row when it is loaded.
+
+    test_icon_name = ''
+    test_html_class = 'primary'
+    html_error_message_list = ''
+    # Initialize variables for the test case's icon name, HTML class, and error message list.
+
+    # Select icon name and HTML class considering the number of failures and the test status.
+    failure_ids = case_failures(model, case_id)
+    # The ids of the failures of the current testcase.
+
+    if len(failure_ids) == 0 and test_status == 'run':
+        test_icon_name = 'check'
+        test_html_class = 'success'
+    elif test_status == 'notrun':
+        test_icon_name = 'warning'
+        test_html_class = 'warning'
+    else:
+        test_icon_name = 'x'
+        test_html_class = 'danger'
+    # Determine the icon and HTML class based on the presence of failures and the test status:
+    # - No failures and status 'run' -> success (check icon)
+    # - Status 'notrun' -> warning (warning icon)
+    # - All other cases -> danger (error icon)
+
+    # If failures occur, generate the summary with a link to the failure details.
+    if len(failure_ids) > 0 and failure_details is not None:
+        failure_details['case_ids'].append(case_id)
+        # The chunk holding this testcase follows from its position in this list.
+
+        error_first_line = ((model['failure_message'][failure_ids[0]] or '').strip().splitlines() or ['-undefined-'])[0]
+        # The first line of the first error message, e.g. the file and line of the failed assertion.
+
+        html_error_message_list = tmpl_error_message_summary.format(
+            error_first_line=html.escape(error_first_line),
+            failure_count=len(failure_ids)
+        )
+
+    # If failures occur without failure details files, generate the listing with all error messages.
+    elif len(failure_ids) > 0:
+        html_error_message_items = ''
+        for failure_id in failure_ids:
+            error_message = model['failure_message'][failure_id] or '-undefined-'
+            # The 'message' attribute of the failure, '-undefined-' if not present.
+
+            error_type = model['failure_type'][failure_id]
+            error_type = '' if not error_type else ' (type = {})'.format(error_type)
+            # Format the error type if it exists.
 
-            html_error_message_list = tmpl_error_message_listing.format(
-                html_error_message_items=html_error_message_items
+            html_error_message_items += tmpl_error_message_item.format(
+                error_message=error_message,
+                error_type=error_type
             )
-            # Generate the complete HTML for the error message listing.
-
-        # Create the HTML code for this single testcase.
-        html_single_testcase_rows += tmpl_single_test_row.format(
-            test_number=test_number,
-            test_classname=test_classname,
-            test_name=test_name,
-            test_tags=test_tags,
-            html_error_message_list=html_error_message_list,
-            test_execution_time=test_execution_time,
-            test_icon_name=test_icon_name,
-            test_html_class=test_html_class
+            # Append the formatted error message item to the list.
+
+        html_error_message_list = tmpl_error_message_listing.format(
+            html_error_message_items=html_error_message_items
+        )
+        # Generate the complete HTML for the error message listing.
+
+    testsuite_name = model['suite_name'][model['case_suite'][case_id]]
+    record_testcase_time(performance_stats, testsuite_name,
+                         '{}::{}'.format(test_classname, test_name), test_execution_time)
+    # Record the time for the performance panel.
+
+    # Badge the testcase if its outcome flipped across the recent runs of the same build.
+    test_flaky_badge = ''
+    flaky_entry = flaky_tests.get('{}::{}'.format(test_classname, test_name))
+    if flaky_entry is not None:
+        test_flaky_badge = tmpl_flaky_badge.format(
+            flip_count=flaky_entry[0],
+            flip_rate=round(100.0 * flaky_entry[1], 1)
         )
-        # Format and append the HTML for this individual test case to the accumulating string.
 
-    return html_single_testcase_rows
-    # Return the complete HTML string with rows for all test cases.
+    # Add the measured CPU time and peak RSS of the testcase.
+    test_resource_cells = ''
+    if show_resources:
+        resource_values = model['case_properties'].get(case_id, {})
+        for property_name, property_title in RESOURCE_PROPERTIES:
+            test_resource_cells += tmpl_resource_cell.format(resource_value=resource_values.get(property_name, ''))
+
+    # Create the HTML code for this single testcase.
+    return tmpl_single_test_row.format(
+        case_id=case_id if html_id is None else html_id,
+        test_number=test_number,
+        test_classname=test_classname,
+        test_name=test_name,
+        test_tags=test_tags,
+        test_tag_badges=test_tag_badges,
+        html_error_message_list=html_error_message_list,
+        test_execution_time=test_execution_text,
+        test_icon_name=test_icon_name,
+        test_html_class=test_html_class,
+        test_flaky_badge=test_flaky_badge,
+        test_resource_cells=test_resource_cells
+    )
+    # Format and return the HTML for this individual test case.
 
 
-def generate_single_test_result_listings(xml_testsuites_node):
-    # This function generates HTML listings for individual test results from a <testsuites> XML node.
-    # It processes each <testsuite> element and generates HTML to display the results of each test suite.
+def record_testsuite(model, suite_id, performance_stats):
+    # Record the wall time and the fixture overhead of a testsuite for the performance panel.
+    # The testcase times of the testsuite must have been recorded before.
+    # Returns the fixture overhead record (fixture_overhead.make_suite_overhead), None without `performance_stats`.
 
-    html_single_test_result_listing = ''
-    # Initialize an empty string to accumulate HTML listings for all test suites.
+    testsuite_name = model['suite_name'][suite_id] or '-undefined-'
+    testsuite_wall_time = model['suite_time'][suite_id]
+    record_testsuite_time(performance_stats, testsuite_name, testsuite_wall_time)
+    if performance_stats is None:
+        return None
 
-    collected_testsuite_ids = []
-    # Initialize a list to keep track of test suite names and their corresponding HTML IDs.
+    if performance_stats['suite_stats'] is not None:
+        testcase_time = float(performance_stats['suite_stats']['duration'][suite_id])
+    else:
+        testcase_time = sum(performance_stats['suite_times'].get(testsuite_name, []))
+    suite_overhead = make_suite_overhead(testsuite_name, testsuite_wall_time, testcase_time)
+    performance_stats['suite_overheads'].append(suite_overhead)
+    return suite_overhead
+
+
+def generate_single_test_result_listing(model, suite_id, html_single_testcase_rows, performance_stats=None,
+                                        resource_header_cells='', suite_stats=None, table_layout='stacktable',
+                                        html_id=None):
+    # This function generates the HTML listing of one testsuite of the report model around its
+    # already rendered testcase rows. The listing gets the HTML id `html_id`, by default the testsuite id. The testsuite time and its fixture overhead (wall time not spent
+    # in the testcases recorded in `performance_stats`) are recorded for the performance panel.
+    # With `suite_stats` (report_stats), the progress bar percentages were rounded for all testsuites at once.
+    # `table_layout` is one of TABLE_LAYOUTS.
+
+    # Read the testsuite columns of the model.
+    testsuite_name = model['suite_name'][suite_id] or '-undefined-'
+    # The 'name' attribute of the test suite, '-undefined-' if not present.
+
+    testsuite_abs_test_count = model['suite_tests'][suite_id]
+    # The 'tests' attribute of the test suite (0 if not present).
+
+    testsuite_abs_fails_count = model['suite_failures'][suite_id]
+    # The 'failures' attribute of the test suite (0 if not present).
+
+    testsuite_abs_disabled_count = model['suite_disabled'][suite_id]
+    # The 'disabled' attribute of the test suite (0 if not present).
+
+    testsuite_abs_success_count = testsuite_abs_test_count - \
+        testsuite_abs_fails_count - testsuite_abs_disabled_count
+    # Calculate the number of successful tests.
+
+    testsuite_execution_time = format_time(model['suite_time_text'][suite_id], '-undefined-')
+    # The 'time' attribute of the test suite as written in the report, '-undefined-' if not present.
+
+    testsuite_tags = model['suite_tags'][suite_id]
+    # The 'tags' attribute of the test suite (empty if not present).
+
+    # Fixture overhead: wall time of the testsuite which is not spent inside its testcases.
+    testsuite_fixture_overhead = '-'
+    testsuite_overhead_html_class = ''
+    suite_overhead = record_testsuite(model, suite_id, performance_stats)
+    if suite_overhead is not None:
+        testsuite_fixture_overhead = '{:.3f} sec ({:.1f}%)'.format(
+            suite_overhead['overhead'], 100.0 * suite_overhead['fraction'])
+        if suite_overhead['fraction'] > performance_stats['overhead_threshold']:
+            testsuite_overhead_html_class = 'text-danger font-weight-bold'
+    # The testcase times were recorded while the rows of the testsuite were rendered.
+
+    # Generate HTML for progress bars for this test suite.
+    html_testsuites_progress_bars = generate_progress_bars(
+        abs_total=testsuite_abs_test_count,
+        abs_success=testsuite_abs_success_count,
+        abs_fail=testsuite_abs_fails_count,
+        abs_disabled=testsuite_abs_disabled_count,
+        rounded_percentage_list=None if suite_stats is None else suite_stats['percentages'][suite_id].tolist()
+    )
 
-    # Generate HTML for the single test result listings.
-    xml_testsuite_nodes = xml_testsuites_node.findall('./testsuite')
-    # Find all <testsuite> nodes within the <testsuites> node.
+    # Generate the HTML for this test suite.
+    return tmpl_single_test_result_listing.format(
+        html_progress_bars=html_testsuites_progress_bars,
+        testsuite_name=testsuite_name,
+        testsuite_tags=testsuite_tags,
+        testsuite_html_id=suite_id if html_id is None else html_id,
+        testsuite_abs_test_count=testsuite_abs_test_count,
+        testsuite_abs_success_count=testsuite_abs_success_count,
+        testsuite_abs_fails_count=testsuite_abs_fails_count,
+        testsuite_abs_disabled_count=testsuite_abs_disabled_count,
+        testsuite_execution_time=testsuite_execution_time,
+        testsuite_fixture_overhead=testsuite_fixture_overhead,
+        testsuite_overhead_html_class=testsuite_overhead_html_class,
+        resource_header_cells=resource_header_cells,
+        testcase_table_class=' testcase-table-css' if table_layout == 'css' else '',
+        html_single_test_rows=html_single_testcase_rows
+    )
+    # Format the HTML template for this test suite with the collected data.
+    # The suite id of the model is used as HTML id.
+
+
+# Modes of --only: 'failing' renders rows only for failed and not run testcases, 'summary' renders no
+# testcase rows. The other testcases are only counted in the progress bars and the sidebar.
+ONLY_MODES = ['failing', 'summary']
+
+# Status codes (report_model) of the testcases listed with --only failing.
+FAILING_STATUS_CODES = {STATUS_CODES[STATUS_FAILED], STATUS_CODES[STATUS_NOTRUN]}
+
+# Small screen layouts of the testcase tables: 'stacktable' lets gtest-report.js add a stacked copy of every
+# table, 'css' restyles the same table by media queries (gtest-report.css), so the DOM is not doubled.
+TABLE_LAYOUTS = ['stacktable', 'css']
+
+# Parts of the listing done by a listing visitor: 'all' (serial rendering), 'record' (the main process of the
+# parallel rendering: sidebar, tag index, failure details and performance panel data, but no HTML) and
+# 'html' (a rendering worker: only the HTML of its testsuites, without warnings, with the HTML ids marked
+# by FRAGMENT_SUITE_ID and FRAGMENT_CASE_ID, see resolve_fragment_ids()).
+RENDER_PARTS = ['all', 'record', 'html']
+
+# Marks of the HTML ids in a testsuite fragment: the testsuite id, and the testcase ids relative to the first
+# testcase of the testsuite. The fragment then does not depend on the position of the testsuite in the report,
+# so a cached fragment is reused after testsuites before it changed. XML 1.0 does not allow NUL characters,
+# so the marks never occur in the content of a report.
+FRAGMENT_SUITE_ID = '\x00suite\x00'
+FRAGMENT_CASE_ID = '\x00case{}\x00'
+FRAGMENT_CASE_ID_PATTERN = re.compile('\x00case([0-9]+)\x00')
+
+
+def create_listing_visitor(model, flaky_tests, performance_stats=None, show_resources=False, suite_stats=None,
+                           failure_details=None, only=None, table_layout='stacktable', render='all'):
+    # This function creates the model visitor rendering the single test result listings.
+    # `flaky_tests` is passed through to the testcase rows to badge flaky testcases.
+    # Testsuite and testcase times are recorded in `performance_stats` (if given) during rendering.
+    # With `show_resources`, the testcase tables get the CPU time and peak RSS columns.
+    # `suite_stats` (report_stats) provides the rounded progress bar percentages of all testsuites.
+    # `failure_details` (create_failure_details) collects the failing testcases for the failure details files.
+    # With `only` (one of ONLY_MODES), the omitted testcases get no row: their times are still recorded and
+    # each testsuite gets one row with the number of omitted testcases and a count badge in the sidebar.
+    # `table_layout` (one of TABLE_LAYOUTS) selects the small screen layout of the testcase tables.
+    # `render` (one of RENDER_PARTS) selects the part of the listing done by the visitor.
+    # Returns a tuple (visitor, listing); after the walk, listing['html'] holds the HTML of all testsuites,
+    # listing['testsuite_ids'] the (testsuite name, HTML id) pairs and listing['testsuite_badges'] the
+    # {HTML id: count badge} for the sidebar, and listing['case_ids'] the ids of the testcases with a row.
+    # For the tag index, listing['tag_rows'] holds {tag: row numbers} and listing['suite_first_row'] the number
+    # of the first row of every testsuite (plus the total number of rows); rows are numbered in page order.
+    # The HTML pieces are collected in lists and joined once, since repeated string concatenation
+    # copies the whole listing for every testcase of large reports.
+
+    listing = {'html': '', 'testsuite_ids': [], 'testsuite_badges': {}, 'case_ids': [], 'tag_rows': {},
+               'suite_first_row': [], 'rows': [], 'suites': [], 'omitted': 0}
+
+    resource_header_cells = ''
+    if show_resources:
+        for property_name, property_title in RESOURCE_PROPERTIES:
+            resource_header_cells += tmpl_resource_header_cell.format(resource_title=property_title)
+    # Header cells of the resource usage columns (the same for every testsuite).
+
+    def record_testcase(case_id):
+        record_testcase_time(performance_stats, model['suite_name'][model['case_suite'][case_id]],
+                             '{}::{}'.format(model['case_classname'][case_id] or '-undefined-',
+                                             model['case_name'][case_id] or '-undefined-'),
+                             model['case_time'][case_id])
+    # Record a testcase without rendering its row, as generate_single_testcase_row() does.
+
+    def begin_suite(suite_id):
+        listing['rows'] = []
+        listing['omitted'] = 0
+        listing['suite_first_row'].append(len(listing['case_ids']))
+        if render != 'html' and len(suite_cases(model, suite_id)) == 0:
+            print("Warning: No nodes {!r} found in testsuite element with name {!r}.".format(
+                'testcase', model['suite_name'][suite_id]))
+
+    def testcase(case_id):
+        if only is not None and (only == 'summary' or model['case_status'][case_id] not in FAILING_STATUS_CODES):
+            listing['omitted'] += 1
+            record_testcase(case_id)
+            return
+        # An omitted testcase still counts for the performance panel, like a rendered row.
+
+        for tag in split_tags(model['case_tags'][case_id]):
+            listing['tag_rows'].setdefault(tag, []).append(len(listing['case_ids']))
+        listing['case_ids'].append(case_id)
+        if render == 'record':
+            record_testcase(case_id)
+            if failure_details is not None and len(case_failures(model, case_id)) > 0:
+                failure_details['case_ids'].append(case_id)
+            return
+        # The row itself is rendered by a worker of the rendering pool.
+
+        case_number = case_id - model['suite_first_case'][model['case_suite'][case_id]]
+        listing['rows'].append(generate_single_testcase_row(
+            model, case_id, case_number + 1, flaky_tests, performance_stats, show_resources, failure_details,
+            FRAGMENT_CASE_ID.format(case_number) if render == 'html' else None))
+        # Testcases are numbered from 1 inside their testsuite.
+
+    def end_suite(suite_id):
+        if only is not None:
+            if listing['omitted'] > 0:
+                listing['rows'].append(tmpl_omitted_testcases_row.format(
+                    column_count=4 + (len(RESOURCE_PROPERTIES) if show_resources else 0),
+                    omitted_count=listing['omitted'],
+                    omitted_kind='passed ' if only == 'failing' else '',
+                    only_mode=only
+                ))
+            passed_count = model['suite_tests'][suite_id] - model['suite_failures'][suite_id] - model['suite_disabled'][suite_id]
+            listing['testsuite_badges'][suite_id] = tmpl_testsuite_count_badge.format(
+                badge_html_class='success' if passed_count == model['suite_tests'][suite_id] else 'danger',
+                passed_count=passed_count,
+                test_count=model['suite_tests'][suite_id]
+            )
+        # With --only, the counts of the testsuite attributes stand in for the omitted rows.
 
-    if len(xml_testsuite_nodes) == 0:
-        print('Warning: No nodes {!r} found in {!r}. Nothing is listed inside the single test_result listing.'.format(
-            'testsuite', report_file))
-        # If no <testsuite> nodes are found, print a warning. Note that `report_file` needs to be defined or retrieved from the context.
+        if render == 'record':
+            record_testsuite(model, suite_id, performance_stats)
+            listing['testsuite_ids'].append((model['suite_name'][suite_id] or '-undefined-', suite_id))
+            return
 
-    id_counter = 0
-    # Initialize a counter to assign unique IDs to each test suite in the HTML output.
+        listing['suites'].append(generate_single_test_result_listing(
+            model, suite_id, ''.join(listing['rows']), performance_stats, resource_header_cells, suite_stats,
+            table_layout, FRAGMENT_SUITE_ID if render == 'html' else None))
+        listing['testsuite_ids'].append((model['suite_name'][suite_id] or '-undefined-', suite_id))
+
+    def end():
+        listing['html'] = ''.join(listing['suites'])
+        listing['suite_first_row'].append(len(listing['case_ids']))
+        if render != 'html' and suite_count(model) == 0:
+            print('Warning: No nodes {!r} found in {!r}. Nothing is listed inside the single test_result listing.'.format(
+                'testsuite', model['report_file']))
+
+    return {'begin_suite': begin_suite, 'testcase': testcase, 'end_suite': end_suite, 'end': end}, listing
+
+
+# State shared with the workers of the rendering pool. It is set before the pool is started, so forked
+# worker processes inherit the report model instead of receiving it with every task.
+RENDER_STATE = {}
+
+# Tasks per worker of the rendering pool: more, smaller tasks even out testsuites of different sizes.
+RENDER_TASKS_PER_WORKER = 4
+
+# Version of the testsuite rendering code, part of the key of the cached fragments together with the templates.
+# Increase it when a change of this file changes the HTML of a testsuite.
+FRAGMENT_CODE_VERSION = 4
+
+
+def plan_render_tasks(model, suite_ids, task_count):
+    # Split the testsuites `suite_ids` (in report order) into at most `task_count` consecutive groups with
+    # about the same number of testcases. Returns a list of suite id lists.
+
+    case_counts = [len(suite_cases(model, suite_id)) for suite_id in suite_ids]
+    total_cases = sum(case_counts)
+    tasks = []
+    planned_cases = 0
+    for suite_id, case_count in zip(suite_ids, case_counts):
+        if not tasks or (len(tasks) < task_count and planned_cases >= total_cases * len(tasks) / task_count):
+            tasks.append([])
+        tasks[-1].append(suite_id)
+        planned_cases += case_count
+    # The first testsuite starting at or after each equal share of the testcases begins a new task.
+    return tasks
+
+
+def render_suite_fragments(suite_ids, state):
+    # Render the HTML fragment of every testsuite of `suite_ids`, with marked HTML ids (resolve_fragment_ids()).
+    # `state` holds the report model and the arguments of create_listing_visitor(). The performance data and
+    # failing testcases recorded here are dropped: the 'record' walk of the main process records them for
+    # all testsuites.
+    # Returns the list of fragments.
+
+    model = state['model']
+    fragments = []
+    for suite_id in suite_ids:
+        failure_details = None
+        if state['failure_details'] is not None:
+            failure_details = dict(state['failure_details'], case_ids=[])
+        visitor, listing = create_listing_visitor(
+            model, state['flaky_tests'],
+            create_performance_stats(state['top_k'], state['overhead_threshold'], state['suite_stats']),
+            state['show_resources'], state['suite_stats'], failure_details, state['only'], state['table_layout'], 'html')
+        walk_model(model, [visitor], [suite_id])
+        fragments.append(listing['html'])
+    return fragments
+
+
+def render_suite_task(suite_ids):
+    # Render a task of the rendering pool from the inherited RENDER_STATE.
+
+    return render_suite_fragments(suite_ids, RENDER_STATE)
+
+
+def render_suites_parallel(suite_ids, state, render_workers):
+    # Render the fragments of the testsuites `suite_ids` in a pool of `render_workers` processes.
+    # Returns the list of fragments in the order of `suite_ids`.
+
+    RENDER_STATE.clear()
+    RENDER_STATE.update(state)
+    tasks = plan_render_tasks(state['model'], suite_ids, render_workers * RENDER_TASKS_PER_WORKER)
+    with concurrent.futures.ProcessPoolExecutor(max_workers=render_workers,
+                                                mp_context=multiprocessing.get_context('fork')) as pool:
+        fragments = [fragment for task_fragments in pool.map(render_suite_task, tasks) for fragment in task_fragments]
+    RENDER_STATE.clear()
+    return fragments
+
+
+def resolve_fragment_ids(model, suite_id, fragment):
+    # Replace the marked HTML ids of a testsuite fragment by the ids of the testsuite and its testcases.
+
+    first_case = model['suite_first_case'][suite_id]
+    fragment = fragment.replace(FRAGMENT_SUITE_ID, str(suite_id))
+    return FRAGMENT_CASE_ID_PATTERN.sub(lambda match: str(first_case + int(match.group(1))), fragment)
+
+
+def suite_fragment_key(state, suite_id, version):
+    # Key of the cached fragment of a testsuite: its normalized content and everything else its HTML depends
+    # on (flaky badges, rendering options), see fragment_cache.fragment_key(). Its HTML ids are marked, so
+    # the position of the testsuite in the report is not part of the key.
+
+    model = state['model']
+    case_ids = suite_cases(model, suite_id)
+    return fragment_key(version, {
+        'flaky': [state['flaky_tests'].get('{}::{}'.format(model['case_classname'][case_id] or '-undefined-',
+                                                            model['case_name'][case_id] or '-undefined-'))
+                  for case_id in case_ids] if state['flaky_tests'] else [],
+        'options': [
+            state['show_resources'], state['only'], state['table_layout'], state['overhead_threshold'],
+            state['failure_details'] is not None, state['suite_stats'] is not None,
+        ],
+        'content': suite_content(model, suite_id),
+    })
+
+
+def render_listing(state, render_workers=1, fragment_cache=None):
+    # Render the HTML of all testsuites after the 'record' walk of the listing visitor, which filled
+    # state['failure_details'] with the failing testcases of the report.
+    # With `render_workers` > 1, the testsuites are rendered in a process pool. With `fragment_cache`
+    # (a directory), the fragment of every testsuite whose key is cached is reused and only the other
+    # testsuites are rendered and stored.
+    # Returns the HTML of all testsuites, identical to the serial rendering.
+
+    model = state['model']
+    fragments = [None] * suite_count(model)
+    keys = None
+    if fragment_cache is not None:
+        version = template_version(html_templates, FRAGMENT_CODE_VERSION)
+        keys = [suite_fragment_key(state, suite_id, version) for suite_id in range(suite_count(model))]
+        fragments = [load_fragment(fragment_cache, key) for key in keys]
+    missing_suite_ids = [suite_id for suite_id, fragment in enumerate(fragments) if fragment is None]
+
+    if render_workers > 1 and len(missing_suite_ids) > 1:
+        rendered = render_suites_parallel(missing_suite_ids, state, render_workers)
+    else:
+        rendered = render_suite_fragments(missing_suite_ids, state)
+    for suite_id, fragment in zip(missing_suite_ids, rendered):
+        fragments[suite_id] = fragment
 
-    for xml_testsuite_node in xml_testsuite_nodes:
-        # Iterate over each <testsuite> node.
+    if fragment_cache is not None:
+        for suite_id, fragment in zip(missing_suite_ids, rendered):
+            store_fragment(fragment_cache, keys[suite_id], fragment)
+        evict_fragments(fragment_cache, FRAGMENTS_PER_SUITE * suite_count(model))
+        print('  fragments : {} of {} testsuites reused from {}'.format(
+            suite_count(model) - len(missing_suite_ids), suite_count(model), fragment_cache))
 
-        # Parse XML attributes.
-        testsuite_name = get_xml_attribute(str, xml_testsuite_node, 'name', '-undefined-')
-        # Retrieve the 'name' attribute of the test suite, defaulting to '-undefined-' if not present.
+    return ''.join(resolve_fragment_ids(model, suite_id, fragment) for suite_id, fragment in enumerate(fragments))
 
-        testsuite_abs_test_count = get_xml_attribute(int, xml_testsuite_node, 'tests', 0)
-        # Retrieve the 'tests' attribute of the test suite, defaulting to 0 if not present.
 
-        testsuite_abs_fails_count = get_xml_attribute(int, xml_testsuite_node, 'failures', 0)
-        # Retrieve the 'failures' attribute of the test suite, defaulting to 0 if not present.
+# Suffix of the search index file, e.g. ReportTest.html -> ReportTest_search.js.
+SEARCH_INDEX_SUFFIX = '_search.js'
 
-        testsuite_abs_disabled_count = get_xml_attribute(int, xml_testsuite_node, 'disabled', 0)
-        # Retrieve the 'disabled' attribute of the test suite, defaulting to 0 if not present.
+# Maximum size of the search index as share of the size of the HTML page.
+SEARCH_INDEX_MAX_FRACTION = 0.2
 
-        testsuite_abs_success_count = testsuite_abs_test_count - \
-            testsuite_abs_fails_count - testsuite_abs_disabled_count
-        # Calculate the number of successful tests.
 
-        testsuite_execution_time = get_xml_attribute(
-            str, xml_testsuite_node, 'time', '-undefined-')
-        # Retrieve the 'time' attribute of the test suite, defaulting to '-undefined-' if not present.
+def search_index_file(destination_file):
+    # Path of the search index file of an HTML report.
 
-        # Kiểm tra và thêm thuộc tính 'tags' nếu chưa có
-        # Check and add the 'tags' attribute if it's missing
-        if 'tags' not in xml_testsuite_node.attrib:
-            xml_testsuite_node.set('tags', '')
-        # Set the 'tags' attribute to an empty string if it is not present in the XML node.
+    return os.path.splitext(os.path.realpath(destination_file))[0] + SEARCH_INDEX_SUFFIX
 
-        testsuite_tags = xml_testsuite_node.attrib['tags']
-        # Retrieve the 'tags' attribute from the test suite.
 
-        # Print warning for each unknown attribute inside the node testsuite.
-        check_for_unkown_attributes(xml_testsuite_node, ['name', 'tests',
-                                                         'failures', 'disabled', 'time', 'tags'])
-        # Check for any unknown attributes in the <testsuite> node and print warnings if found.
+def write_search_index(model, case_ids, destination_file, page_size):
+    # Write the search index over the testcase rows `case_ids` next to the HTML report.
+    # The index is a script calling gtestReportSearchIndex() of gtest-report.js, loaded when the search is
+    # first used. It is limited to SEARCH_INDEX_MAX_FRACTION of the page size (`page_size` characters).
 
-        # Generate HTML for single test cases within this test suite.
-        html_single_testcase_rows = generate_single_testcase_rows(xml_testsuite_node)
-        # Call `generate_single_testcase_rows` to get the HTML for individual test cases in the test suite.
+    index_text, dropped = build_search_index(model, case_ids, int(SEARCH_INDEX_MAX_FRACTION * page_size))
+    if dropped:
+        print('Warning: The search index was limited to {:.0f}% of the report size by dropping its {}.'.format(
+            100 * SEARCH_INDEX_MAX_FRACTION, ' and '.join(dropped)))
 
-        # Generate HTML for progress bars for this test suite.
-        html_testsuites_progress_bars = generate_progress_bars(
-            abs_total=testsuite_abs_test_count,
-            abs_success=testsuite_abs_success_count,
-            abs_fail=testsuite_abs_fails_count,
-            abs_disabled=testsuite_abs_disabled_count
-        )
+    with open(search_index_file(destination_file), 'w') as fout:
+        fout.write('gtestReportSearchIndex({});\n'.format(index_text))
 
-        # Generate the HTML for this test suite.
-        html_testsuite = tmpl_single_test_result_listing.format(
-            html_progress_bars=html_testsuites_progress_bars,
-            testsuite_name=testsuite_name,
-            testsuite_tags=testsuite_tags,
-            testsuite_html_id=id_counter,
-            testsuite_abs_test_count=testsuite_abs_test_count,
-            testsuite_abs_success_count=testsuite_abs_success_count,
-            testsuite_abs_fails_count=testsuite_abs_fails_count,
-            testsuite_abs_disabled_count=testsuite_abs_disabled_count,
-            testsuite_execution_time=testsuite_execution_time,
-            html_single_test_rows=html_single_testcase_rows
-        )
-        # Format the HTML template for this test suite with the collected data.
 
-        collected_testsuite_ids.append((testsuite_name, id_counter))
-        # Append the test suite name and its HTML ID to the collected list.
+def encode_bitset(row_numbers, row_count):
+    # Encode a set of row numbers as base64 bitset: bit i (byte i // 8, bit i % 8) is set for row i.
 
-        id_counter += 1
-        # Increment the ID counter for the next test suite.
+    bitset = bytearray((row_count + 7) // 8)
+    for row_number in row_numbers:
+        bitset[row_number >> 3] |= 1 << (row_number & 7)
+    return base64.b64encode(bytes(bitset)).decode('ascii')
 
-        html_single_test_result_listing += html_testsuite
-        # Append the formatted HTML for this test suite to the accumulating string.
 
-    return html_single_test_result_listing, collected_testsuite_ids
-    # Return the complete HTML string with listings for all test suites and the collected IDs.
+def generate_tag_index(listing):
+    # This function generates the tag index of the testcase rows, read by gtest-report.js for the tag filter:
+    # - tags: the tags in the order they appear; bitsets: the rows of every tag as base64 bitset.
+    # - suite_ids, suite_first_row: the HTML id and the first row of every testsuite (plus the row count).
+    # Filtering is an OR of the bitsets of the enabled tags, so the page never reads the tags of the rows.
 
-def generate_test_sidebar(collected_testsuite_ids):
+    row_count = len(listing['case_ids'])
+    tag_index = {
+        'row_count': row_count,
+        'tags': list(listing['tag_rows']),
+        'bitsets': [encode_bitset(row_numbers, row_count) for row_numbers in listing['tag_rows'].values()],
+        'suite_ids': [testsuite_id for testsuite_name, testsuite_id in listing['testsuite_ids']],
+        'suite_first_row': listing['suite_first_row'],
+    }
+    return tmpl_tag_index.format(tag_index_json=json.dumps(tag_index, separators=(',', ':')).replace('</', '<\\/'))
+    # '</' is escaped, so a tag cannot end the script element.
+
+
+def generate_test_sidebar(collected_testsuite_ids, testsuite_badges=None, tag_rows=None):
     # This function generates the HTML for a sidebar that lists links to individual test suites.
     # It uses the list of test suite IDs to create navigation links in the sidebar.
+    # `testsuite_badges` ({HTML id: badge HTML}) adds the count badges of a report generated with --only.
+    # `tag_rows` ({tag: row numbers}) adds one filter button per tag.
 
     html_single_testsuite_links = ''
     # Initialize an empty string to accumulate HTML links for each test suite.
@@ -510,13 +975,20 @@ def generate_test_sidebar(collected_testsuite_ids):
 
         html_single_testsuite_links += tmpl_single_testsuite_link.format(
             testsuite_name=name_id_pair[0],
-            testsuite_html_id=name_id_pair[1]
+            testsuite_html_id=name_id_pair[1],
+            testsuite_badge=(testsuite_badges or {}).get(name_id_pair[1], '')
         )
         # For each test suite, format the HTML link using the name and ID from the pair.
         # Append the formatted link to the `html_single_testsuite_links` string.
 
+    html_tag_buttons = ''
+    for tag, row_numbers in (tag_rows or {}).items():
+        html_tag_buttons += tmpl_tag_button.format(tag=html.escape(tag), tag_count=len(row_numbers))
+    # The tag filter buttons with the number of rows of every tag.
+
     html_test_sidebar = tmpl_test_sidebar.format(
-        single_testsuite_links=html_single_testsuite_links
+        single_testsuite_links=html_single_testsuite_links,
+        html_tag_buttons=html_tag_buttons
     )
     # Format the sidebar template with the accumulated links.
 
@@ -524,45 +996,568 @@ def generate_test_sidebar(collected_testsuite_ids):
     # Return the complete HTML for the sidebar, including all test suite links.
 
 
-def generate_html(report_file, destination_file):
+# Number of failure signatures in the failure causes panel, and of affected testcases listed per signature.
+FAILURE_CAUSES_SHOWN = 10
+AFFECTED_TESTS_SHOWN = 5
+
+
+def generate_failure_causes_panel(model):
+    # This function generates the panel with the most frequent failure causes: the failures of the report
+    # grouped by their signature (the message with masked numbers, strings and values), so thousands of
+    # failures of the same assertion appear as one row. Returns '' if the run has no failures.
+
+    causes = group_failure_causes(model)
+    if not causes:
+        return ''
+
+    html_failure_cause_rows = ''
+    for rank, cause in enumerate(causes[:FAILURE_CAUSES_SHOWN], 1):
+        html_affected_tests = ''
+        for case_id in cause['case_ids'][:AFFECTED_TESTS_SHOWN]:
+            html_affected_tests += tmpl_affected_test_link.format(
+                testsuite_html_id=model['case_suite'][case_id],
+                test_label='{}::{}'.format(model['case_classname'][case_id] or '-undefined-',
+                                           model['case_name'][case_id] or '-undefined-')
+            )
+        if len(cause['case_ids']) > AFFECTED_TESTS_SHOWN:
+            html_affected_tests += 'and {} more'.format(len(cause['case_ids']) - AFFECTED_TESTS_SHOWN)
+        # Link the first affected testcases to their testsuite listing.
+
+        html_failure_cause_rows += tmpl_failure_cause_row.format(
+            rank=rank,
+            signature=html.escape(cause['signature'] or '-undefined-'),
+            failure_count=cause['failures'],
+            test_count=len(cause['case_ids']),
+            html_affected_tests=html_affected_tests
+        )
+
+    return tmpl_failure_causes_panel.format(
+        cause_count=len(causes),
+        failure_count=len(model['failure_message']),
+        html_failure_cause_rows=html_failure_cause_rows
+    )
+
+
+def generate_histogram_svg(histogram):
+    # This function renders a duration histogram (list of bucket counts) as inline SVG bar chart.
+
+    max_count = max(histogram) if max(histogram) > 0 else 1
+    html_histogram_bars = ''
+    for idx, count in enumerate(histogram):
+        bar_height = round(float(count) / max_count * HISTOGRAM_SVG_HEIGHT, 1)
+        html_histogram_bars += tmpl_histogram_bar.format(
+            bar_x=idx * HISTOGRAM_SVG_BAR_WIDTH,
+            bar_y=HISTOGRAM_SVG_HEIGHT - bar_height,
+            bar_width=HISTOGRAM_SVG_BAR_WIDTH - 2,
+            bar_height=bar_height,
+            bucket_label=HISTOGRAM_BUCKET_LABELS[idx],
+            bucket_count=count
+        )
+    # One bar per bucket, scaled to the fullest bucket.
+
+    return tmpl_histogram_svg.format(
+        svg_width=len(histogram) * HISTOGRAM_SVG_BAR_WIDTH,
+        svg_height=HISTOGRAM_SVG_HEIGHT,
+        html_histogram_bars=html_histogram_bars
+    )
+
+
+def generate_fixture_overhead(performance_stats, run_wall_time):
+    # This function generates the HTML table ranking the testsuites by fixture overhead.
+    # Testsuites whose overhead exceeds the configured share of their wall time are highlighted.
+
+    suite_overheads = performance_stats['suite_overheads']
+    if len(suite_overheads) == 0:
+        return ''
+
+    overhead_threshold = performance_stats['overhead_threshold']
+    run_overhead = make_run_overhead(run_wall_time or 0.0, suite_overheads)
+
+    html_fixture_overhead_rows = ''
+    for rank, suite_overhead in enumerate(rank_fixture_overheads(suite_overheads)):
+        html_fixture_overhead_rows += tmpl_fixture_overhead_row.format(
+            html_class='danger' if suite_overhead['fraction'] > overhead_threshold else '',
+            rank=rank + 1,
+            testsuite_name=suite_overhead['name'],
+            wall_time=round(suite_overhead['wall_time'], 3),
+            testcase_time=round(suite_overhead['testcase_time'], 3),
+            overhead=round(suite_overhead['overhead'], 3),
+            overhead_rate=round(100.0 * suite_overhead['fraction'], 1)
+        )
+
+    return tmpl_fixture_overhead.format(
+        overhead_threshold=round(100.0 * overhead_threshold, 1),
+        run_suite_overhead=round(run_overhead['suite_overhead'], 3),
+        run_global_overhead=round(run_overhead['global_overhead'], 3),
+        run_overhead_rate=round(100.0 * run_overhead['fraction'], 1),
+        html_fixture_overhead_rows=html_fixture_overhead_rows
+    )
+
+
+def generate_performance_panel(performance_stats, run_wall_time=None):
+    # This function generates the HTML for the performance panel from the accumulator filled during rendering:
+    # the slowest testcases and testsuites, the duration distribution (p50/p90/p99, histogram) per testsuite
+    # and the fixture overhead ranking (`run_wall_time` is the time of the whole run).
+
+    if performance_stats is None or len(performance_stats['slowest_testcases']) == 0:
+        return ''
+    # No testcase time was recorded.
+
+    html_slowest_testcase_rows = ''
+    for rank, (execution_time, sequence, test_label) in enumerate(
+            sorted(performance_stats['slowest_testcases'], reverse=True)):
+        html_slowest_testcase_rows += tmpl_slowest_row.format(
+            rank=rank + 1,
+            name=test_label,
+            execution_time=execution_time
+        )
+    # The heap holds the K slowest testcases; sort them descending for display.
+
+    html_slowest_testsuite_rows = ''
+    for rank, (execution_time, sequence, testsuite_name) in enumerate(
+            sorted(performance_stats['slowest_testsuites'], reverse=True)):
+        html_slowest_testsuite_rows += tmpl_slowest_row.format(
+            rank=rank + 1,
+            name=testsuite_name,
+            execution_time=execution_time
+        )
+
+    html_distribution_rows = ''
+    suite_stats = performance_stats['suite_stats']
+    if suite_stats is not None:
+        # Percentiles and histograms of all testsuites were computed at once.
+        for suite_id, test_count in enumerate(suite_stats['tests'].tolist()):
+            if test_count == 0:
+                continue
+            p50, p90, p99 = suite_stats['percentiles'][suite_id].tolist()
+            html_distribution_rows += tmpl_distribution_row.format(
+                testsuite_name=suite_stats['names'][suite_id],
+                test_count=test_count,
+                p50=p50,
+                p90=p90,
+                p99=p99,
+                html_histogram_svg=generate_histogram_svg(suite_stats['histograms'][suite_id].tolist())
+            )
+    else:
+        for testsuite_name, suite_times in performance_stats['suite_times'].items():
+            suite_times.sort()
+            html_distribution_rows += tmpl_distribution_row.format(
+                testsuite_name=testsuite_name,
+                test_count=len(suite_times),
+                p50=percentile(suite_times, 50),
+                p90=percentile(suite_times, 90),
+                p99=percentile(suite_times, 99),
+                html_histogram_svg=generate_histogram_svg(performance_stats['suite_histograms'][testsuite_name])
+            )
+    # Percentiles per testsuite from the sorted testcase times.
+
+    return tmpl_performance_panel.format(
+        top_k=performance_stats['top_k'],
+        html_slowest_testcase_rows=html_slowest_testcase_rows,
+        html_slowest_testsuite_rows=html_slowest_testsuite_rows,
+        histogram_bucket_labels=', '.join(HISTOGRAM_BUCKET_LABELS),
+        html_distribution_rows=html_distribution_rows,
+        html_fixture_overhead=generate_fixture_overhead(performance_stats, run_wall_time)
+    )
+
+
+def generate_sparkline_svg(values, title):
+    # This function renders the values of a metric across runs (oldest first, None = no value) as inline SVG line.
+    # Fewer than two values give no sparkline.
+
+    points = [(idx, value) for idx, value in enumerate(values) if value is not None]
+    if len(points) < 2:
+        return ''
+
+    min_value = min(value for idx, value in points)
+    value_range = (max(value for idx, value in points) - min_value) or 1.0
+    x_step = float(SPARKLINE_SVG_WIDTH - 2) / max(len(values) - 1, 1)
+    svg_points = ' '.join('{:.1f},{:.1f}'.format(
+        1 + idx * x_step,
+        SPARKLINE_SVG_HEIGHT - 1 - (value - min_value) / value_range * (SPARKLINE_SVG_HEIGHT - 2))
+        for idx, value in points)
+    # Scale the values to the height of the SVG; a constant metric is drawn as flat line at the bottom.
+
+    return tmpl_sparkline_svg.format(
+        svg_width=SPARKLINE_SVG_WIDTH,
+        svg_height=SPARKLINE_SVG_HEIGHT,
+        svg_points=svg_points,
+        sparkline_title=title
+    )
+
+
+def create_metrics_visitor(model):
+    # This function creates the model visitor collecting the numeric RecordProperty values of the testcases.
+    # The resource usage properties have their own columns in the listings and are left out.
+    # Returns a tuple (visitor, suite_metrics); after the walk, suite_metrics holds one entry
+    # (testsuite name, [(classname, name, {metric: value})]) per testsuite with metrics.
+
+    resource_names = [property_name for property_name, property_title in RESOURCE_PROPERTIES]
+    suite_metrics = []
+    testcase_metrics = []
+
+    def testcase(case_id):
+        metrics = {name: value for name, value in metrics_from_properties(model['case_properties'].get(case_id, {})).items()
+                   if name not in resource_names}
+        if metrics:
+            testcase_metrics.append((model['case_classname'][case_id], model['case_name'][case_id], metrics))
+
+    def end_suite(suite_id):
+        if testcase_metrics:
+            suite_metrics.append((model['suite_name'][suite_id], list(testcase_metrics)))
+        del testcase_metrics[:]
+    # Testcases without metrics are not listed.
+
+    return {'testcase': testcase, 'end_suite': end_suite}, suite_metrics
+
+
+def generate_metrics_section(suite_metrics, history_db=None, trend_runs=10):
+    # This function generates the HTML for the numeric RecordProperty values of the testcases
+    # (e.g. RecordProperty("throughput_ops", ...) of embedded micro-benchmarks): one table per testsuite
+    # with a sortable column per metric and the mean/min/max of the testsuite.
+    # `suite_metrics` is collected by the visitor of create_metrics_visitor().
+    # With `history_db`, every value gets a sparkline of the metric across the last `trend_runs` runs.
+
+    if len(suite_metrics) == 0:
+        return ''
+
+    runs, metric_history = [], {}
+    if history_db and os.path.exists(history_db):
+        conn = open_history(history_db)
+        runs, metric_history = query_metric_history(conn, trend_runs)
+        conn.close()
+    # Values of the previous runs for the sparklines (the current run is included once it was ingested).
+
+    html_metrics_tables = ''
+    for testsuite_name, testcase_metrics in suite_metrics:
+        metric_names = sorted(set(name for classname, test_name, metrics in testcase_metrics for name in metrics))
+
+        html_metrics_header_cells = ''
+        for column_index, metric_name in enumerate(metric_names):
+            html_metrics_header_cells += tmpl_metrics_header_cell.format(
+                column_index=column_index + 1,
+                metric_name=metric_name
+            )
+        # Column 0 holds the testcase name.
+
+        html_metrics_rows = ''
+        for classname, test_name, metrics in testcase_metrics:
+            html_metrics_cells = ''
+            for metric_name in metric_names:
+                if metric_name not in metrics:
+                    html_metrics_cells += tmpl_metrics_empty_cell
+                    continue
+                run_values = metric_history.get(('{}::{}'.format(classname, test_name), metric_name), {})
+                html_metrics_cells += tmpl_metrics_cell.format(
+                    sort_value=metrics[metric_name],
+                    metric_value=format_metric_value(metrics[metric_name]),
+                    sparkline=generate_sparkline_svg(
+                        [run_values.get(run_id) for run_id, run_timestamp in runs],
+                        '{} over the last {} runs'.format(metric_name, len(runs)))
+                )
+            html_metrics_rows += tmpl_metrics_row.format(
+                test_name=test_name,
+                html_metrics_cells=html_metrics_cells
+            )
+
+        aggregates = aggregate_metrics(metrics for classname, test_name, metrics in testcase_metrics)
+        html_metrics_aggregate_rows = ''
+        for aggregate_name in ['mean', 'min', 'max']:
+            html_metrics_aggregate_rows += tmpl_metrics_aggregate_row.format(
+                aggregate_name=aggregate_name,
+                html_metrics_cells=''.join(tmpl_metrics_aggregate_cell.format(
+                    metric_value=format_metric_value(aggregates[metric_name][aggregate_name]))
+                    for metric_name in metric_names)
+            )
+        # The testsuite aggregates are shown below the testcases and are not sorted with them.
+
+        html_metrics_tables += tmpl_metrics_table.format(
+            testsuite_name=testsuite_name,
+            html_metrics_header_cells=html_metrics_header_cells,
+            html_metrics_rows=html_metrics_rows,
+            html_metrics_aggregate_rows=html_metrics_aggregate_rows
+        )
+
+    return tmpl_metrics_section.format(
+        html_metrics_tables=html_metrics_tables
+    )
+
+
+def generate_trend_section(history_db, trend_runs):
+    # This function generates the HTML for the trend section (pass rate and duration per testsuite
+    # over the last `trend_runs` runs) from the run-history database.
+    # The values come from indexed queries on the database, old XML reports are not parsed again.
+
+    if not history_db:
+        return ''
+    # Without a history database the trend section is left out.
+
+    if not os.path.exists(history_db):
+        print('Warning: The history database {!r} does not exist. The trend section is not generated.'.format(history_db))
+        return ''
+
+    conn = open_history(history_db)
+    runs, trends = query_suite_trends(conn, trend_runs)
+    conn.close()
+    # Query the newest runs and the per-testsuite aggregates of these runs.
+
+    if len(runs) == 0:
+        return ''
+
+    html_trend_header_cells = ''
+    for run_id, run_timestamp in runs:
+        html_trend_header_cells += tmpl_trend_header_cell.format(
+            run_id=run_id,
+            run_timestamp=run_timestamp
+        )
+    # One header cell per run, oldest run first.
+
+    html_trend_rows = ''
+    for testsuite_name in sorted(trends):
+        html_trend_cells = ''
+        for run_id, run_timestamp in runs:
+            if run_id not in trends[testsuite_name]:
+                html_trend_cells += tmpl_trend_empty_cell
+                continue
+            # The testsuite was not part of this run.
+
+            tests, passed, duration = trends[testsuite_name][run_id]
+            pass_rate = round(100.0 * passed / tests, 1) if tests > 0 else 0.0
+            html_trend_cells += tmpl_trend_cell.format(
+                html_class='success' if passed == tests else 'danger',
+                pass_rate=pass_rate,
+                duration=round(duration, 3)
+            )
+
+        html_trend_rows += tmpl_trend_row.format(
+            testsuite_name=testsuite_name,
+            html_trend_cells=html_trend_cells
+        )
+    # One row per testsuite with one cell per run.
+
+    return tmpl_trend_section.format(
+        trend_run_count=len(runs),
+        html_trend_header_cells=html_trend_header_cells,
+        html_trend_rows=html_trend_rows
+    )
+
+
+def generate_diff_section(baseline_file, model):
+    # This function generates the HTML for the changes of the report of `model` against `baseline_file`:
+    # newly failing, newly passing, added, removed and significantly slower testcases.
+    # Only the baseline is parsed; the current testcases are read from the model.
+
+    if not baseline_file:
+        return ''
+    # Without a baseline the diff section is left out.
+
+    if not os.path.exists(baseline_file):
+        print('Warning: The baseline report {!r} does not exist. The diff section is not generated.'.format(baseline_file))
+        return ''
+
+    diff = diff_model(baseline_file, model)
+
+    category_html_classes = {
+        'newly_failing': 'danger',
+        'newly_passing': 'success',
+        'added': 'primary',
+        'removed': 'secondary',
+        'slower': 'warning',
+    }
+    # HTML class per diff category.
+
+    html_diff_summary = ''
+    html_diff_categories = ''
+    for category, category_title in DIFF_CATEGORIES:
+        html_diff_summary += tmpl_diff_summary_badge.format(
+            html_class=category_html_classes[category],
+            category_title=category_title,
+            category_count=len(diff[category])
+        )
+
+        if len(diff[category]) == 0:
+            continue
+        # Only non-empty categories get a table.
+
+        html_diff_rows = ''
+        for test_key, baseline_status, current_status, baseline_time, current_time in diff[category]:
+            html_diff_rows += tmpl_diff_row.format(
+                html_class=category_html_classes[category],
+                test_key=test_key,
+                baseline_status=baseline_status or '-',
+                current_status=current_status or '-',
+                baseline_time='-' if baseline_time is None else baseline_time,
+                current_time='-' if current_time is None else current_time
+            )
+
+        html_diff_categories += tmpl_diff_category.format(
+            category_title=category_title,
+            html_diff_rows=html_diff_rows
+        )
+
+    return tmpl_diff_section.format(
+        baseline_file_path=os.path.basename(baseline_file),
+        html_diff_summary=html_diff_summary,
+        html_diff_categories=html_diff_categories
+    )
+
+
+def load_flaky_tests(history_db, flaky_runs):
+    # This function runs the flakiness analysis over the last `flaky_runs` runs of the history database.
+    # Returns an empty dict if no history database is given.
+
+    if not history_db or not os.path.exists(history_db):
+        return {}
+
+    conn = open_history(history_db)
+    flaky_tests = detect_flaky_tests(conn, flaky_runs)
+    conn.close()
+    return flaky_tests
+
+
+def copy_html_resources(destination_directory):
+    # This function copies the files from html_resources (stylesheets, scripts, fonts) next to the generated report.
+
+    source_directory = os.path.dirname(os.path.realpath(__file__))
+    resource_files = glob.glob(os.sep.join([source_directory, 'html_resources/*']))
+    for rs in resource_files:
+        # Copy all files from the 'html_resources' directory to the destination directory.
+        if os.path.isfile(rs):
+            shutil.copy(rs, destination_directory)
+        else:
+            dirname = os.path.split(rs)[-1]
+            target = os.sep.join([destination_directory, dirname])
+
+            if os.path.exists(target):
+                shutil.rmtree(target)
+            shutil.copytree(rs, os.sep.join([destination_directory, dirname]))
+    # Copy HTML resource files (both files and directories) from the source directory to the destination directory.
+    # Remove existing directories if they exist before copying new ones.
+
+
+def generate_html(report_file, destination_file, history_db=None, trend_runs=10, flaky_runs=20, baseline_file=None,
+                  top_k=10, overhead_threshold=0.2, model=None, inline_failures=False, only=None,
+                  table_layout='stacktable', render_workers=1, fragment_cache=None, resource_prefix=''):
     # This function generates an HTML report from a given XML report file and saves it to a specified destination file.
+    # If `history_db` is given, a trend section over the last `trend_runs` runs is added and
+    # testcases flipping across the last `flaky_runs` runs are badged as flaky.
+    # If `baseline_file` is given, a diff section with the changes against this report is added.
+    # The performance panel lists the `top_k` slowest testcases and testsuites and highlights testsuites
+    # whose fixture overhead exceeds `overhead_threshold` of their wall time.
+    # `model` is the report model of `report_file` (report_model.build_model), if the caller built it before.
+    # The failure messages are written to failure details files next to `destination_file` and loaded by the
+    # page on click; with `inline_failures` they are all written into the page instead.
+    # With `only` (one of ONLY_MODES), testcase rows are only rendered for failed and not run testcases
+    # ('failing') or for no testcase ('summary').
+    # The search index over the rendered testcases is written next to `destination_file` as well.
+    # `table_layout` (one of TABLE_LAYOUTS) selects the small screen layout of the testcase tables.
+    # With `render_workers` > 1, the testsuites are rendered in a pool of that many processes; the output is
+    # the same as with the serial rendering.
+    # With `fragment_cache` (a directory), the HTML of the testsuites is cached there and the testsuites whose
+    # content did not change are not rendered again.
+    # The page loads the html_resources files from `resource_prefix` (e.g. '/_resources/' of the report server);
+    # by default they are expected next to the report (copy_html_resources).
 
     # Parse XML.
-    xml_tree = ET.parse(report_file)
-    xml_root = xml_tree.getroot()
-    # Load and parse the XML report file, and get the root element of the XML tree.
-
-    # Check if the root element 'testsuites' exists.
-    xml_testsuites_nodes = xml_root.findall('.')
-    if len(xml_testsuites_nodes) == 0:
-        print('Error: The xml file {!r} has no root node.'.format(report_file))
-        exit(-1)
-    # Ensure that the XML file contains at least one element.
-    
-    xml_testsuites_node = xml_testsuites_nodes[0]
-    if xml_testsuites_node.tag != 'testsuites':
-        print('Error: The xml file {!r} has an invalid root node tag (found: {!r}, expected: {!r})'.format(
-            report_file, xml_testsuites_node.tag, 'testsuites'))
-        exit(-1)
-    # Verify that the root element is 'testsuites'. If not, print an error message and exit.
+    if model is None:
+        try:
+            model = build_model(report_file)
+        except ValueError as e:
+            print('Error: {}'.format(e))
+            exit(-1)
+    # Stream the XML report file into the report model. The root element must be 'testsuites'.
+
+    flaky_tests = load_flaky_tests(history_db, flaky_runs)
+    # Find flaky testcases in the run history (empty without history database).
+
+    suite_stats = None
+    if report_stats.is_available():
+        suite_stats = report_stats.compute_suite_stats(model)
+        for message in report_stats.check_suite_stats(model, suite_stats):
+            print('Warning: {}'.format(message))
+    # With numpy, the counts, durations, percentiles and progress bar percentages of all testsuites are
+    # computed in vectorized batches, and the counts are checked against the attributes of the report.
+
+    performance_stats = create_performance_stats(top_k, overhead_threshold, suite_stats)
+    # Accumulator for the performance panel, filled while the listings are rendered.
+
+    resource_names = [property_name for property_name, property_title in RESOURCE_PROPERTIES]
+    show_resources = any(property_name in resource_names
+                         for properties in model['case_properties'].values() for property_name in properties)
+    # Show the resource usage columns only if the tests were run with resource measurement.
+
+    failure_details = None if inline_failures else create_failure_details(destination_file)
+    # Collects the failing testcases while their rows are rendered.
+
+    if render_workers > 1 and 'fork' not in multiprocessing.get_all_start_methods():
+        print('Warning: Rendering in parallel needs the fork start method, the testsuites are rendered serially.')
+        render_workers = 1
+    # The workers inherit the report model by fork; without fork (Windows) it would be pickled for every worker.
+    split_rendering = render_workers > 1 or fragment_cache is not None
 
     # Generate the HTML content.
-    html_single_test_result_listing, collected_testsuite_ids = generate_single_test_result_listings(
-        xml_testsuites_node)
-    # Create HTML for individual test results and collect test suite IDs for the sidebar.
-
-    test_navbar, total_test_result_progressbars, total_test_result = generate_total_test_summary(
-        xml_testsuites_node)
+    listing_visitor, listing = create_listing_visitor(model, flaky_tests, performance_stats, show_resources, suite_stats,
+                                                      failure_details, only, table_layout,
+                                                      'record' if split_rendering else 'all')
+    metrics_visitor, suite_metrics = create_metrics_visitor(model)
+    walk_model(model, [listing_visitor, metrics_visitor])
+    # Create HTML for individual test results, collect test suite IDs for the sidebar and the
+    # RecordProperty metrics in one walk over the model.
+
+    if split_rendering:
+        listing['html'] = render_listing({
+            'model': model,
+            'failure_details': failure_details,
+            'flaky_tests': flaky_tests,
+            'top_k': top_k,
+            'overhead_threshold': overhead_threshold,
+            'show_resources': show_resources,
+            'suite_stats': suite_stats,
+            'only': only,
+            'table_layout': table_layout,
+        }, render_workers, fragment_cache)
+    # With the pool or the fragment cache, the walk above only recorded the sidebar, tag index, failure details
+    # and performance data; the HTML of the testsuites is rendered (or reused) afterwards.
+
+    test_navbar, total_test_result_progressbars, total_test_result = generate_total_test_summary(model, suite_stats)
     # Generate HTML for the navigation bar, total test result summary, and progress bars.
 
-    test_sidebar = generate_test_sidebar(collected_testsuite_ids)
+    test_sidebar = generate_test_sidebar(listing['testsuite_ids'], listing['testsuite_badges'], listing['tag_rows'])
     # Generate HTML for the sidebar navigation links.
 
+    failure_causes_panel = generate_failure_causes_panel(model)
+    # Generate HTML for the failures grouped by signature (empty if no testcase failed).
+
+    performance_panel = generate_performance_panel(performance_stats, model['header']['time'])
+    # Generate HTML for the performance panel from the times recorded during rendering.
+
+    metrics_section = generate_metrics_section(suite_metrics, history_db, trend_runs)
+    # Generate HTML for the RecordProperty metrics (empty if no testcase recorded numeric properties).
+
+    trend_section = generate_trend_section(history_db, trend_runs)
+    # Generate HTML for the trend of the previous runs (empty without history database).
+
+    diff_section = generate_diff_section(baseline_file, model)
+    # Generate HTML for the changes against the baseline report (empty without baseline).
+
+    search_box = tmpl_search_box.format(search_src=os.path.basename(search_index_file(destination_file)))
+    # Generate HTML for the testcase search; the index is written next to the report.
+
     html_code = tmpl_main_html.format(
         test_navbar=test_navbar,
         test_sidebar=test_sidebar,
+        search_box=search_box,
         total_test_result=total_test_result,
-        single_test_result_listing=html_single_test_result_listing
+        failure_causes_panel=failure_causes_panel,
+        performance_panel=performance_panel,
+        metrics_section=metrics_section,
+        trend_section=trend_section,
+        diff_section=diff_section,
+        single_test_result_listing=listing['html'],
+        tag_index=generate_tag_index(listing),
+        resource_prefix=resource_prefix,
+        failure_src='' if failure_details is None else failure_details['url'],
+        failure_chunk_size=FAILURE_CHUNK_SIZE
     )
     # Format the main HTML template with the generated HTML snippets for the navigation bar, sidebar, test results, and summary.
 
@@ -570,6 +1565,13 @@ def generate_html(report_file, destination_file):
     with open(destination_file, 'w') as fout:
         fout.write(html_code)
 
+    if failure_details is not None:
+        write_failure_details(model, failure_details)
+    # Write the failure details files the page loads on click.
+
+    write_search_index(model, listing['case_ids'], destination_file, len(html_code))
+    # Write the search index the page loads when the search is used.
+
     return True
     # Return True to indicate that the HTML file was successfully generated.
 
@@ -577,23 +1579,39 @@ def generate_html(report_file, destination_file):
 if __name__ == '__main__':
     # This block of code runs when the script is executed directly.
 
-    if len(sys.argv) < 2:
-        usage()
+    parser = argparse.ArgumentParser(description='Convert a gtest XML/JSON report into an HTML report', allow_abbrev=False)
+    parser.add_argument('report_file', metavar="report/ReportTest.xml", help="Location of the gtest XML/JSON report")
+    parser.add_argument('output_file', metavar="report/ReportTest.html", help="Location of the HTML report, e.g. index.html")
+    parser.add_argument('--history', type=str, default=None, metavar="history/ReportHistory.db", help="Run-history database for the trend section and the flaky badges")
+    parser.add_argument('--trend-runs', type=int, default=10, help="Number of recent runs shown in the trend section (default: 10)")
+    parser.add_argument('--flaky-runs', type=int, default=20, help="Number of recent runs analysed for flaky testcases (default: 20)")
+    parser.add_argument('--baseline', type=str, default=None, metavar="baseline/ReportTest.xml", help="Baseline XML/JSON report to show the changes against")
+    parser.add_argument('--top-k', type=int, default=10, help="Number of slowest testcases and testsuites in the performance panel (default: 10)")
+    parser.add_argument('--overhead-threshold', type=float, default=0.2, help="Highlight testsuites whose fixture overhead exceeds this share of their wall time (default: 0.2)")
+    parser.add_argument('--inline-failures', action='store_true', help="Write all failure messages into the HTML page instead of the failure details files")
+    parser.add_argument('--only', choices=ONLY_MODES, default=None, help="Render rows only for failed and not run testcases (failing) or for no testcase (summary)")
+    parser.add_argument('--table-layout', choices=TABLE_LAYOUTS, default='stacktable', help="Small screen layout of the testcase tables: stacktable (default, a copy of every table) or css")
+    parser.add_argument('--render-workers', type=int, default=1, help="Render the testsuites in this many processes (default: 1)")
+    parser.add_argument('--fragment-cache', type=str, default=None, metavar="history/fragments", help="Reuse the HTML of unchanged testsuites cached in this directory")
+
+    if len(sys.argv) < 3:
+        parser.print_help()
         exit(0)
-    # Check if at least one argument (the report file) is provided.
+    # Check if the report file and the output file are provided.
     # If not, print usage instructions and exit.
 
-    # Get the source and destination directories.
-    source_directory = os.path.dirname(os.path.realpath(__file__))
-    destination_directory = os.path.dirname(sys.argv[2])
-    report_file = os.path.realpath(sys.argv[1])
-    destination_file = os.path.realpath(sys.argv[2])
-    # Define the source directory (where the script is located) and
-    # resolve the absolute paths for the report and destination files.
+    args = parser.parse_args()
+    # Parse the positional files and the optional arguments.
+
+    # Get the destination directory.
+    destination_directory = os.path.dirname(os.path.realpath(args.output_file))
+    report_file = os.path.realpath(args.report_file)
+    destination_file = os.path.realpath(args.output_file)
+    # Resolve the absolute paths for the report and destination files.
 
     if not os.path.exists(report_file):
         print('ERROR: The report file {} does not exist.'.format(report_file))
-        usage()
+        parser.print_help()
         exit(1)
     # Check if the report file exists. If not, print an error message,
     # display usage instructions, and exit.
@@ -604,26 +1622,15 @@ if __name__ == '__main__':
     # Ensure that the destination directory exists. Create it if it doesn't.
 
     # Copy files from html_resources.
-    resource_files = glob.glob(os.sep.join([source_directory, 'html_resources/*']))
-    for rs in resource_files:
-        # Copy all files from the 'html_resources' directory to the destination directory.
-        if os.path.isfile(rs):
-            shutil.copy(rs, destination_directory)
-        else:
-            dirname = os.path.split(rs)[-1]
-            target = os.sep.join([destination_directory, dirname])
-
-            if os.path.exists(target):
-                shutil.rmtree(target)
-            shutil.copytree(rs, os.sep.join([destination_directory, dirname]))
-    # Copy HTML resource files (both files and directories) from the source directory to the destination directory.
-    # Remove existing directories if they exist before copying new ones.
+    copy_html_resources(destination_directory)
 
     # Generate html.
     print('Start generation:')
     print('  input  : {}'.format(os.path.basename(report_file)))
     print('  output : {}'.format(os.path.basename(destination_file)))
-    if generate_html(report_file, destination_file):
+    if generate_html(report_file, destination_file, args.history, args.trend_runs, args.flaky_runs, args.baseline,
+                     args.top_k, args.overhead_threshold, None, args.inline_failures, args.only, args.table_layout,
+                     args.render_workers, args.fragment_cache):
         print('Html was generated successfully.')
     # Print the input and output file names, call the `generate_html` function to create the HTML report,
     # and print a success message if the HTML report was generated successfully.
@@ -2,23 +2,35 @@
 # Shebang to specify the interpreter for running the script
 
 import pandas as pd
-import xml.etree.ElementTree as et
 from pprint import pprint
 import argparse
 from tqdm import tqdm
 import os
+import sys
 from openpyxl import load_workbook
 from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
 from openpyxl.utils import get_column_letter
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'reportTools'))
+from run_history import open_history, detect_flaky_tests
+from report_diff import diff_model, DIFF_CATEGORIES
+from fixture_overhead import fixture_overheads_from_model, DEFAULT_OVERHEAD_THRESHOLD
+from resource_usage import RESOURCE_PROPERTIES
+from test_metrics import metrics_from_properties, aggregate_metrics, parse_metric_value
+from report_model import build_model, walk_model, case_failures, format_time
 
 # Importing necessary libraries:
 # - pandas: for data manipulation and exporting to Excel.
-# - xml.etree.ElementTree: for parsing the XML files.
 # - pprint: for pretty-printing objects in the console.
 # - argparse: for parsing command-line arguments.
 # - tqdm: for displaying a progress bar.
-# - os: for file and directory operations.
+# - os, sys: for file and directory operations and the import path of the shared report tools.
 # - openpyxl: for manipulating Excel files and applying styles.
+# - run_history: the local run-history database (from the reportTools directory).
+# - report_diff: comparison of a baseline and a current report (from the reportTools directory).
+# - fixture_overhead: fixture/setup overhead of testsuites (from the reportTools directory).
+# - resource_usage: per-test CPU time and peak RSS properties (from the reportTools directory).
+# - test_metrics: numeric RecordProperty values of the testcases (from the reportTools directory).
+# - report_model: the report model built by one streaming parse (from the reportTools directory).
 
 def main():
     # Main function to handle file processing and Excel report generation
@@ -32,6 +44,16 @@ def main():
     
     parser.add_argument('--output', "-o", type=str, metavar="report/ReportTest.xlsx", help="Location of the output file")
     # Adds optional argument '--output' to specify the location of the output Excel file.
+
+    parser.add_argument('--history', type=str, metavar="history/ReportHistory.db", help="Run-history database used for the flakiness column")
+    parser.add_argument('--flaky-runs', type=int, default=20, help="Number of recent runs analysed for flaky testcases")
+    # Adds optional arguments to fill the 'flakiness' column from the run-history database.
+
+    parser.add_argument('--baseline', type=str, metavar="baseline/ReportTest.xml", help="Baseline XML/JSON report for the 'Diff' sheet")
+    # Adds optional argument '--baseline' to compare the first input file against a baseline report.
+
+    parser.add_argument('--overhead-threshold', type=float, default=DEFAULT_OVERHEAD_THRESHOLD, help="Highlight testsuites whose fixture overhead exceeds this share of their wall time")
+    # Adds optional argument '--overhead-threshold' for the 'Fixture overhead' sheet.
     
     args = parser.parse_args()
     # Parse command-line arguments provided by thee user.
@@ -41,6 +63,21 @@ def main():
         outfile = "{}".format(args.input[0].replace(".xml", ".xlsx"))
     # Determine the output file name. If not provided via --output, replace ".xml" in the input file name with ".xlsx".
 
+    generate_xlsx(args.input, outfile, args.history, args.flaky_runs, args.baseline, args.overhead_threshold)
+    # Generate the styled workbook from the input files.
+
+
+def generate_xlsx(input_files, outfile, history_db=None, flaky_runs=20, baseline_file=None,
+                  overhead_threshold=DEFAULT_OVERHEAD_THRESHOLD, models=None):
+    # Generate the styled Excel report `outfile` from the XML report(s) `input_files`.
+    # - history_db, flaky_runs: fill the 'flakiness' column from the run-history database.
+    # - baseline_file: add the 'Diff' sheet comparing the first input file against this report.
+    # - overhead_threshold: highlight testsuites above this fixture overhead in the 'Fixture overhead' sheet.
+    # - models: dict {input file: report model}, for input files the caller already parsed.
+    # Returns True if the workbook was written.
+
+    models = dict(models or {})
+
     print(f"Output will go to: {outfile}")
     # Print the output file location for user information.
 
@@ -55,29 +92,42 @@ def main():
         "tests", "failures", "disabled", "errors", "time", "timestamp",
         "name", "name2", "tests3", "failures4", "disabled5", "errors6", 
         "time7", "timestamp8", "name9", "status", "result", "time10", 
-        "timestamp11", "classname", "failure", "message", "type"
-    ]
+        "timestamp11", "classname", "failure", "message", "type", "signature", "flakiness"
+    ] + [property_name for property_name, property_title in RESOURCE_PROPERTIES]
     # Define the column headers for the resulting Excel file.
 
+    flaky_tests = {}
+    if history_db:
+        if os.path.exists(history_db):
+            conn = open_history(history_db)
+            flaky_tests = detect_flaky_tests(conn, flaky_runs)
+            conn.close()
+        else:
+            print(f"History database {history_db} does not exist. The flakiness column stays empty.")
+    # Find flaky testcases ({'classname::name': (flip_count, flip_rate)}) in the run history.
+
     rows = []
     # Initialize an empty list to store rows of data parsed from XML.
 
+    resource_names = [property_name for property_name, property_title in RESOURCE_PROPERTIES]
+    metric_rows = []
+    # RecordProperty metrics as (classname, name, file, {metric: value}) for the 'Metrics' sheet.
+
     totalcases = 0
     # Initialize a counter for the total number of test cases.
 
-    # First pass to count total test cases for progress bar
-    for f in args.input:
+    # First pass: build the report model of every input file and count the test cases for the progress bar
+    for f in input_files:
         if not os.path.isfile(f):
             print(f"File {f} does not exist. Skipping.")
             continue
         # Check if the input file exists. If not, skip to the next file.
         
         try:
-            xtree = et.parse(f)
-            xroot = xtree.getroot()
-            testcases = xroot.findall('.//testcase')
-            totalcases += len(testcases)
-        # Parse the XML file, find all test cases, and count them.
+            if f not in models:
+                models[f] = build_model(f)
+            totalcases += len(models[f]['case_name'])
+        # Stream the XML file into the report model and count its test cases.
         
         except Exception as e:
             print(f"Error parsing file {f}: {e}. Skipping.")
@@ -86,53 +136,53 @@ def main():
 
     if totalcases == 0:
         print("No test cases found. Exiting.")
-        return
+        return False
     # If no test cases are found after processing all files, exit the program.
 
     bar = tqdm(total=totalcases, desc="Processing files")
     # Initialize a progress bar to track processing of test cases.
 
-    # Second pass to process each test case
-    for f in args.input:
-        if not os.path.isfile(f):
-            print(f"File {f} does not exist. Skipping.")
+    # Second pass: one row per test case of every model
+    for f in input_files:
+        if f not in models:
             continue
-        # Check if the input file exists. If not, skip to the next file.
+        # Files that do not exist or could not be parsed were reported in the first pass.
 
-        try:
-            xtree = et.parse(f)
-            xroot = xtree.getroot()
-            testcases = xroot.findall('.//testcase')
-        # Parse the XML file, and extract test case elements.
-        
-        except Exception as e:
-            print(f"Error parsing file {f}: {e}. Skipping.")
-            continue
-        # Handle errors in XML parsing.
+        model = models[f]
 
-        for testcase in testcases:
-            testcase_name = testcase.attrib.get("name", "")
-            status = testcase.attrib.get("status", "")
-            result = testcase.attrib.get("result", "")
-            time_val = testcase.attrib.get("time", "")
-            timestamp = testcase.attrib.get("timestamp", "")
-            classname = testcase.attrib.get("classname", "")
-            # Extract attributes from each test case element (e.g., name, status, result).
+        def testcase(case_id):
+            testcase_name = model["case_name"][case_id]
+            status, result = model["states"][model["case_state"][case_id]]
+            time_val = format_time(model["case_time_text"][case_id], '')
+            timestamp = model["case_timestamp"][case_id]
+            classname = model["case_classname"][case_id]
+            # Read the columns of the test case (e.g., name, status, result).
 
             # Handle multiple failure elements
-            failure_elems = testcase.findall("failure")
             failure_texts = []
             messages = []
-            for failure in failure_elems:
-                if failure.text:
-                    failure_texts.append(failure.text)
-                    messages.append(failure.text)  # Assuming 'message' is same as 'failure'
+            signatures = []
+            for failure_id in case_failures(model, case_id):
+                if model["failure_text"][failure_id]:
+                    failure_texts.append(model["failure_text"][failure_id])
+                    messages.append(model["failure_text"][failure_id])  # Assuming 'message' is same as 'failure'
+                signature = model["signatures"][model["failure_signature"][failure_id]]
+                if signature not in signatures:
+                    signatures.append(signature)
             # Extract failure information (if any) from each test case.
             # Aggregate failure texts into separate lists.
 
             failure_message = "\n\n".join(failure_texts)
             message = "\n\n".join(messages)
             # Combine multiple failure messages into a single string.
+            signature = "\n\n".join(signatures)
+            # The distinct failure signatures (messages with masked numbers and values), for filtering by cause.
+
+            flakiness = ""
+            flaky_entry = flaky_tests.get(f"{classname}::{testcase_name}")
+            if flaky_entry is not None:
+                flakiness = f"{100.0 * flaky_entry[1]:.1f}% ({flaky_entry[0]} flips)"
+            # Describe the flip rate of flaky testcases, leave the cell empty otherwise.
 
             # Populate row as per the new column layout
             row = {
@@ -158,15 +208,29 @@ def main():
                 "classname": classname, 
                 "failure": failure_message, 
                 "message": message, 
-                "type": ""
+                "type": "",
+                "signature": signature,
+                "flakiness": flakiness
             }
             # Create a row dictionary containing the test case data.
+            properties = model["case_properties"].get(case_id, {})
+            row.update({property_name: parse_metric_value(properties[property_name])
+                        for property_name in resource_names if property_name in properties})
+            # Add the measured CPU time and peak RSS (empty columns if the tests were not measured,
+            # empty cells for values that are no numbers).
+            metrics = {name: value for name, value in metrics_from_properties(properties).items() if name not in resource_names}
+            if metrics:
+                metric_rows.append((classname, testcase_name, os.path.basename(f), metrics))
+            # Collect the numeric RecordProperty values; the resource usage already has its own columns.
             rows.append(row)
             # Append the row to the list of rows.
             
             bar.update(1)
             # Update the progress bar.
 
+        walk_model(model, [{"testcase": testcase}])
+        # Visit the test cases of the model in report order.
+
     bar.close()
     # Close the progress bar after all test cases are processed.
 
@@ -180,7 +244,7 @@ def main():
         out_df.to_excel(outfile, index=False)
     except Exception as e:
         print(f"Error writing to Excel file {outfile}: {e}")
-        return
+        return False
     # Write the DataFrame to an Excel file. If any errors occur, print an error message and exit.
 
     # Load the workbook and select the active worksheet
@@ -226,11 +290,12 @@ def main():
     # Automatically adjust the column widths based on the length of the data in each column.
     ws.column_dimensions['U'].width = 30  # Adjust as necessary
     ws.column_dimensions['V'].width = 30  # Adjust as necessary
+    ws.column_dimensions['X'].width = 30  # 'signature'
     
     # Apply styles to all cells
     for row in ws.iter_rows(min_row=2, max_col=len(cols), max_row=ws.max_row):
         for cell in row:
-            if cell.column_letter in ['U', 'V']:  # Assuming 'failure' is U and 'message' is V
+            if cell.column_letter in ['U', 'V', 'X']:  # Assuming 'failure' is U, 'message' is V and 'signature' is X
                 cell.alignment = wrap_alignment
             else:
                 cell.alignment = center_alignment
@@ -241,12 +306,112 @@ def main():
     ws.freeze_panes = "A2"
     # Freeze the top row in the worksheet to keep it visible during scrolling.
 
+    # Add the diff sheet against the baseline report
+    if baseline_file:
+        if input_files[0] not in models:
+            print(f"File {input_files[0]} could not be read. The diff sheet is not generated.")
+        elif os.path.isfile(baseline_file):
+            diff = diff_model(baseline_file, models[input_files[0]])
+            ws_diff = wb.create_sheet("Diff")
+            ws_diff.append(["category", "name", "baseline status", "current status", "baseline time", "current time"])
+            for category, title in DIFF_CATEGORIES:
+                for key, baseline_status, current_status, baseline_time, current_time in diff[category]:
+                    ws_diff.append([
+                        title, key, baseline_status or "", current_status or "",
+                        "" if baseline_time is None else baseline_time,
+                        "" if current_time is None else current_time
+                    ])
+            for cell in ws_diff[1]:
+                cell.font = header_font
+                cell.fill = header_fill
+                cell.alignment = center_alignment
+                cell.border = thin_border
+            for col, width in zip("ABCDEF", [22, 60, 16, 16, 14, 14]):
+                ws_diff.column_dimensions[col].width = width
+            ws_diff.freeze_panes = "A2"
+        else:
+            print(f"Baseline file {baseline_file} does not exist. The diff sheet is not generated.")
+    # Compare the first input file against the baseline and list newly failing, newly passing,
+    # added, removed and significantly slower testcases in a separate sheet. The first input file is taken
+    # from its model; only the baseline is parsed.
+
+    # Add the fixture overhead sheet
+    ws_overhead = wb.create_sheet("Fixture overhead")
+    ws_overhead.append(["testsuite", "wall time", "testcase time", "overhead", "overhead (%)", "file"])
+    highlight_fill = PatternFill(start_color="FFC7CE", end_color="FFC7CE", fill_type="solid")
+    for f in input_files:
+        if f not in models:
+            continue
+        suite_overheads, run_overhead = fixture_overheads_from_model(models[f])
+        for suite in suite_overheads:
+            ws_overhead.append([
+                suite["name"], suite["wall_time"], suite["testcase_time"],
+                round(suite["overhead"], 3), round(100.0 * suite["fraction"], 1), os.path.basename(f)
+            ])
+            if suite["fraction"] > overhead_threshold:
+                for cell in ws_overhead[ws_overhead.max_row]:
+                    cell.fill = highlight_fill
+        ws_overhead.append([
+            "(whole run)", run_overhead["wall_time"], run_overhead["testcase_time"],
+            round(run_overhead["suite_overhead"] + run_overhead["global_overhead"], 3),
+            round(100.0 * run_overhead["fraction"], 1), os.path.basename(f)
+        ])
+        for cell in ws_overhead[ws_overhead.max_row]:
+            cell.font = Font(bold=True)
+    for cell in ws_overhead[1]:
+        cell.font = header_font
+        cell.fill = header_fill
+        cell.alignment = center_alignment
+        cell.border = thin_border
+    for col, width in zip("ABCDEF", [40, 12, 14, 12, 14, 24]):
+        ws_overhead.column_dimensions[col].width = width
+    ws_overhead.freeze_panes = "A2"
+    # Rank the testsuites of each input file by fixture overhead (wall time - sum of testcase times),
+    # followed by a summary row for the whole run. Testsuites above the threshold are highlighted.
+
+    # Add the metrics sheets
+    if metric_rows:
+        metric_names = sorted(set(name for classname, testcase_name, f, metrics in metric_rows for name in metrics))
+        ws_metrics = wb.create_sheet("Metrics")
+        ws_metrics.append(["classname", "name", "file"] + metric_names)
+        for classname, testcase_name, f, metrics in metric_rows:
+            ws_metrics.append([classname, testcase_name, f] + [metrics.get(name, "") for name in metric_names])
+        for cell in ws_metrics[1]:
+            cell.font = header_font
+            cell.fill = header_fill
+            cell.alignment = center_alignment
+            cell.border = thin_border
+        for idx in range(len(metric_names) + 3):
+            ws_metrics.column_dimensions[get_column_letter(idx + 1)].width = 40 if idx < 2 else 18
+        ws_metrics.auto_filter.ref = ws_metrics.dimensions
+        ws_metrics.freeze_panes = "D2"
+
+        ws_metric_summary = wb.create_sheet("Metric summary")
+        ws_metric_summary.append(["classname", "metric", "count", "mean", "min", "max"])
+        suite_metrics = {}
+        for classname, testcase_name, f, metrics in metric_rows:
+            suite_metrics.setdefault(classname, []).append(metrics)
+        for classname, testcase_metrics in suite_metrics.items():
+            for name, aggregate in sorted(aggregate_metrics(testcase_metrics).items()):
+                ws_metric_summary.append([classname, name, aggregate["count"], aggregate["mean"], aggregate["min"], aggregate["max"]])
+        for cell in ws_metric_summary[1]:
+            cell.font = header_font
+            cell.fill = header_fill
+            cell.alignment = center_alignment
+            cell.border = thin_border
+        for col, width in zip("ABCDEF", [40, 24, 10, 16, 16, 16]):
+            ws_metric_summary.column_dimensions[col].width = width
+        ws_metric_summary.auto_filter.ref = ws_metric_summary.dimensions
+        ws_metric_summary.freeze_panes = "A2"
+    # One column per RecordProperty metric (with filter and sort buttons), followed by the
+    # count/mean/min/max of every metric per testsuite.
+
     # Save the styled workbook
     try:
         wb.save(outfile)
     except Exception as e:
         print(f"Error saving Excel file {outfile}: {e}")
-        return
+        return False
     # Save the Excel file. Handle any exceptions that occur during saving.
 
     pprint(out_df)
@@ -255,6 +420,9 @@ def main():
     print("Done")
     # Indicate completion of the process.
 
+    return True
+    # Report the successful generation to the caller.
+
 if __name__ == '__main__':
     main()
     # Entry point of the script. Execute the main() function when the script is run.
@@ -0,0 +1,91 @@
+import re
+# Importing required libraries:
+# - re: for recognizing the parts of gtest failure messages and masking their literals.
+
+# First line of a gtest failure message: the location of the failed assertion, e.g. 'TestSuite/src/TestSuiteSrc.cc:79'.
+FILE_LINE_PATTERN = re.compile(r'^\S.*:\d+$')
+
+# Lines printing a value of the failed assertion, e.g. '  Actual: false' or '    Which is: 60'.
+VALUE_LINE_PATTERN = re.compile(r'^(\s*(?:Actual|Which is|With diff):)\s.*$')
+
+# Literals masked in all other lines: string and character literals, hex numbers, integers and floats.
+# Digits inside identifiers (e.g. 'file_48', 'utf8') are not masked.
+LITERAL_PATTERN = re.compile(
+    r'"(?:[^"\\]|\\.)*"'
+    r"|'(?:[^'\\]|\\.)*'"
+    r'|\b0[xX][0-9a-fA-F]+\b'
+    r'|(?<![\w.])[-+]?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?\b'
+)
+
+# Replacements of the masked parts.
+MASKED_LITERAL = '<N>'
+MASKED_VALUE = '<value>'
+
+
+def mask_literal(match):
+    # Replace a number by MASKED_LITERAL and the content of a string or character literal by '...'.
+
+    literal = match.group(0)
+    if literal[0] in '"\'':
+        return literal[0] + '...' + literal[0]
+    return MASKED_LITERAL
+
+
+def failure_signature(message):
+    # Normalize a gtest failure message into its signature, so the failures of the same cause are grouped
+    # although their values differ, e.g. 'Number 60 is not prime' and 'Number 35 is not prime'.
+    # - The file:line of the assertion and the assertion expressions ('Value of: ...' and the expressions of
+    #   'Expected equality of these values:') are kept.
+    # - Value lines ('Actual:', 'Which is:') are masked completely.
+    # - Literals in the other lines (numbers, strings) are masked.
+
+    signature_lines = []
+    in_equality = False
+    for line_number, line in enumerate(message.strip().splitlines()):
+        line = line.rstrip()
+        value_match = VALUE_LINE_PATTERN.match(line)
+
+        if line_number == 0 and FILE_LINE_PATTERN.match(line):
+            signature_lines.append(line)
+        elif value_match:
+            signature_lines.append(value_match.group(1) + ' ' + MASKED_VALUE)
+        elif line.startswith('Value of: '):
+            signature_lines.append(line)
+        elif line.startswith('Expected equality of these values:'):
+            signature_lines.append(line)
+            in_equality = True
+            continue
+        elif in_equality and line.startswith('  ') and not line.startswith('   '):
+            signature_lines.append(line)
+            continue
+        # The expressions of EXPECT_EQ are indented by two spaces below 'Expected equality of these values:'.
+        else:
+            signature_lines.append(LITERAL_PATTERN.sub(mask_literal, line))
+        in_equality = in_equality and line.startswith('  ')
+
+    return '\n'.join(signature_lines)
+
+
+def group_failure_causes(model):
+    # Group the failures of the report model by their signature (model['failure_signature']).
+    # Returns a list of causes, the most frequent first:
+    # {'signature': text, 'failures': number of failures, 'case_ids': ids of the affected testcases}.
+
+    causes = {}
+    first_failure = model['case_first_failure']
+    signature_ids = model['failure_signature']
+    for case_id in range(len(model['case_name'])):
+        for failure_id in range(first_failure[case_id], first_failure[case_id + 1]):
+            cause = causes.get(signature_ids[failure_id])
+            if cause is None:
+                cause = causes[signature_ids[failure_id]] = {
+                    'signature': model['signatures'][signature_ids[failure_id]],
+                    'failures': 0,
+                    'case_ids': [],
+                }
+            cause['failures'] += 1
+            if not cause['case_ids'] or cause['case_ids'][-1] != case_id:
+                cause['case_ids'].append(case_id)
+    # Testcases are visited in order, so a testcase failing twice with the same cause is only added once.
+
+    return sorted(causes.values(), key=lambda cause: (-cause['failures'], -len(cause['case_ids']), cause['signature']))
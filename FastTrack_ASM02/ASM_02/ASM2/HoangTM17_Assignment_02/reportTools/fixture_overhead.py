@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# Shebang to specify the interpreter for running the script
+
+import sys
+import argparse
+from report_model import build_model
+# Importing required libraries:
+# - sys: for exit codes.
+# - argparse: for parsing command-line arguments.
+# - report_model: the report model built by one streaming parse, shared with the report converters.
+
+# Default share of the testsuite wall time above which the fixture overhead is highlighted.
+DEFAULT_OVERHEAD_THRESHOLD = 0.2
+
+
+def fixture_overhead(wall_time, testcase_time):
+    # Compute the fixture overhead of a testsuite: the part of its wall time that is not spent inside
+    # the testcases (SetUpTestSuite/TearDownTestSuite, fixture construction and destruction, ...).
+    # Returns a tuple (overhead, fraction of the wall time).
+    # gtest rounds all times to milliseconds, so small negative differences are clamped to 0.
+
+    overhead = max(wall_time - testcase_time, 0.0)
+    fraction = overhead / wall_time if wall_time > 0 else 0.0
+    return overhead, fraction
+
+
+def make_suite_overhead(name, wall_time, testcase_time):
+    # Build the overhead record of one testsuite.
+
+    overhead, fraction = fixture_overhead(wall_time, testcase_time)
+    return {
+        'name': name,
+        'wall_time': wall_time,
+        'testcase_time': testcase_time,
+        'overhead': overhead,
+        'fraction': fraction,
+    }
+
+
+def make_run_overhead(run_wall_time, suite_overheads):
+    # Build the overhead record of the whole run.
+    # - suite_overhead: sum of the fixture overheads of all testsuites.
+    # - global_overhead: wall time of the run not spent in any testsuite (global environments, listeners).
+
+    suites_time = sum(suite['wall_time'] for suite in suite_overheads)
+    testcase_time = sum(suite['testcase_time'] for suite in suite_overheads)
+    suite_overhead = sum(suite['overhead'] for suite in suite_overheads)
+    global_overhead, global_fraction = fixture_overhead(run_wall_time, suites_time)
+    return {
+        'wall_time': run_wall_time,
+        'testcase_time': testcase_time,
+        'suite_overhead': suite_overhead,
+        'global_overhead': global_overhead,
+        'fraction': (suite_overhead + global_overhead) / run_wall_time if run_wall_time > 0 else 0.0,
+    }
+
+
+def rank_fixture_overheads(suite_overheads):
+    # Sort the testsuite overhead records by overhead, largest first.
+
+    return sorted(suite_overheads, key=lambda suite: suite['overhead'], reverse=True)
+
+
+def fixture_overheads_from_model(model):
+    # Compute the fixture overheads from the report model (report_model.build_model) of a report.
+    # Returns a tuple (ranked suite records, run record).
+
+    suite_overheads = []
+    for suite_id, suite_name in enumerate(model['suite_name']):
+        first_case, end_case = model['suite_first_case'][suite_id], model['suite_first_case'][suite_id + 1]
+        suite_overheads.append(make_suite_overhead(
+            suite_name, model['suite_time'][suite_id], sum(model['case_time'][first_case:end_case])))
+    return rank_fixture_overheads(suite_overheads), make_run_overhead(model['header']['time'], suite_overheads)
+
+
+def main():
+    # Command-line entry point: print the testsuites ranked by fixture overhead.
+
+    parser = argparse.ArgumentParser(description='Rank testsuites by fixture/setup overhead', allow_abbrev=False)
+    parser.add_argument('input', type=str, metavar="report/ReportTest.xml", help="Location of the gtest XML/JSON report")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_OVERHEAD_THRESHOLD, help="Highlight suites whose overhead exceeds this share of their wall time")
+    args = parser.parse_args()
+    # Parse command-line arguments provided by the user.
+
+    try:
+        model = build_model(args.input)
+    except ValueError as e:
+        print('Error: {}'.format(e))
+        return 1
+    suite_overheads, run_overhead = fixture_overheads_from_model(model)
+    # The report is read into the same model as for the HTML and XLSX reports.
+    for suite in suite_overheads:
+        marker = '!' if suite['fraction'] > args.threshold else ' '
+        print(f"{marker} {suite['name']}: {suite['overhead']:.3f} of {suite['wall_time']:.3f} sec ({100.0 * suite['fraction']:.1f}%)")
+    print(f"Run: {run_overhead['suite_overhead']:.3f} sec in testsuite fixtures, "
+          f"{run_overhead['global_overhead']:.3f} sec outside of testsuites, "
+          f"{100.0 * run_overhead['fraction']:.1f}% of {run_overhead['wall_time']:.3f} sec")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
+    # Entry point of the script. Execute the main() function when the script is run.
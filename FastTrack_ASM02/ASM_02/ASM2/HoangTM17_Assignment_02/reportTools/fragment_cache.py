@@ -0,0 +1,117 @@
+import os
+import json
+import hashlib
+# Importing required libraries:
+# - os: for the fragment files and their modification times.
+# - json: for serializing the templates of the template version.
+# - hashlib: for hashing the key and the templates.
+
+# Default location of the fragment cache. Like the result cache it is kept outside of the report folder,
+# so `make clean` does not remove it.
+DEFAULT_FRAGMENT_CACHE_DIRECTORY = 'history/fragments'
+
+# Fragments kept per testsuite of the current report; the least recently used ones beyond are removed.
+# Two leave room for the fragments of the previous report, e.g. when switching between two branches.
+FRAGMENTS_PER_SUITE = 2
+
+# File name pattern of a fragment; other files in the cache directory are never removed.
+FRAGMENT_PREFIX = 'fragment_'
+FRAGMENT_EXTENSION = '.html'
+
+
+def template_version(templates, code_version):
+    # Hash of the HTML templates (all tmpl_* strings of the `templates` module) and the version number of
+    # the rendering code. Changing a template or the code version invalidates all cached fragments.
+
+    template_texts = sorted((name, value) for name, value in vars(templates).items()
+                            if name.startswith('tmpl_') and isinstance(value, str))
+    return hashlib.sha256(json.dumps([code_version, template_texts]).encode('utf-8')).hexdigest()
+
+
+def suite_content(model, suite_id):
+    # Normalized content of a testsuite of the report model: its attributes and the slices of the testcase and
+    # failure columns belonging to it. Failure offsets are made relative to the testsuite and properties are
+    # sorted by name, so the content does not depend on the position of the testsuite in the report.
+    # The case states are indices into model['states'], which is therefore part of the content as well.
+
+    first_case, end_case = model['suite_first_case'][suite_id], model['suite_first_case'][suite_id + 1]
+    first_failure = model['case_first_failure'][first_case]
+    end_failure = model['case_first_failure'][end_case]
+    return [
+        model['suite_name'][suite_id],
+        model['suite_tests'][suite_id],
+        model['suite_failures'][suite_id],
+        model['suite_disabled'][suite_id],
+        model['suite_time'][suite_id],
+        model['suite_time_text'][suite_id],
+        model['suite_tags'][suite_id],
+        model['states'],
+        model['case_name'][first_case:end_case],
+        model['case_classname'][first_case:end_case],
+        model['case_tags'][first_case:end_case],
+        model['case_time'][first_case:end_case].tobytes(),
+        model['case_time_text'][first_case:end_case],
+        model['case_status'][first_case:end_case].tobytes(),
+        model['case_state'][first_case:end_case].tobytes(),
+        [offset - first_failure for offset in model['case_first_failure'][first_case:end_case + 1]],
+        model['failure_message'][first_failure:end_failure],
+        model['failure_type'][first_failure:end_failure],
+        [(case_id - first_case, sorted(model['case_properties'][case_id].items()))
+         for case_id in range(first_case, end_case) if case_id in model['case_properties']],
+    ]
+    # Whole column slices are copied at C speed; only the failure offsets and properties are visited per testcase.
+
+
+def fragment_key(version, key_inputs):
+    # Build the key of a fragment: sha256 over the template version and the key inputs (the suite content
+    # and everything else the fragment depends on, e.g. its HTML ids and the rendering options).
+    # The inputs are lists, strings and numbers, whose repr() is the same for the same values.
+
+    return hashlib.sha256(repr([version, key_inputs]).encode('utf-8')).hexdigest()
+
+
+def fragment_path(cache_directory, key):
+    # Location of the fragment of a key, e.g. 'history/fragments/fragment_<key>.html'.
+
+    return os.path.join(cache_directory, FRAGMENT_PREFIX + key + FRAGMENT_EXTENSION)
+
+
+def load_fragment(cache_directory, key):
+    # Return the cached fragment of `key`, None if it is not cached.
+
+    try:
+        with open(fragment_path(cache_directory, key), encoding='utf-8') as fin:
+            fragment = fin.read()
+    except OSError:
+        return None
+    os.utime(fragment_path(cache_directory, key))
+    # Touch the entry, so the eviction removes the least recently used fragments first.
+    return fragment
+
+
+def store_fragment(cache_directory, key, fragment):
+    # Store a fragment under `key`. It is written to a temporary file first, so a concurrent report
+    # generation never reads a partial fragment.
+
+    if not os.path.isdir(cache_directory):
+        os.makedirs(cache_directory)
+    temporary_path = '{}.{}.tmp'.format(fragment_path(cache_directory, key), os.getpid())
+    with open(temporary_path, 'w', encoding='utf-8') as fout:
+        fout.write(fragment)
+    os.replace(temporary_path, fragment_path(cache_directory, key))
+
+
+def evict_fragments(cache_directory, max_entries):
+    # Remove the least recently used fragments beyond `max_entries`.
+
+    if not os.path.isdir(cache_directory):
+        return
+    entries = [os.path.join(cache_directory, entry) for entry in os.listdir(cache_directory)
+               if entry.startswith(FRAGMENT_PREFIX) and entry.endswith(FRAGMENT_EXTENSION)]
+    if len(entries) <= max_entries:
+        return
+    # Only a full cache needs the modification times of its entries.
+
+    entries.sort(key=os.path.getmtime, reverse=True)
+    for entry in entries[max_entries:]:
+        os.remove(entry)
@@ -0,0 +1,136 @@
+import os
+import json
+import xml.etree.ElementTree as ET
+from test_metrics import read_testcase_metrics, read_json_testcase_metrics
+# Importing required libraries:
+# - os: for file path handling.
+# - json: for reading gtest JSON reports (--gtest_output=json).
+# - xml.etree.ElementTree (ET): for streaming gtest XML reports (--gtest_output=xml).
+# - test_metrics: numeric RecordProperty values of the testcases.
+
+# Normalized testcase status values shared by all report tools.
+STATUS_PASSED = 'passed'
+STATUS_FAILED = 'failed'
+STATUS_NOTRUN = 'notrun'
+STATUS_SKIPPED = 'skipped'
+
+
+def parse_time(value):
+    # Convert a gtest time value to seconds as float.
+    # - XML reports store plain numbers ("0.005"), JSON reports add a unit suffix ("0.005s").
+    # - Empty or invalid values are returned as 0.0.
+
+    try:
+        return float(str(value).strip().rstrip('s'))
+    except ValueError:
+        return 0.0
+
+
+def normalize_status(status, result, failure_count):
+    # Map the gtest 'status'/'result' attributes and the number of failures to one normalized status.
+    # The same rules as in xmlTohtml.py are used:
+    # - status 'notrun'              -> STATUS_NOTRUN
+    # - result 'skipped'             -> STATUS_SKIPPED
+    # - no failures and status 'run' -> STATUS_PASSED
+    # - all other cases              -> STATUS_FAILED
+
+    status = status.lower()
+    if status == 'notrun':
+        return STATUS_NOTRUN
+    if result.lower() == 'skipped' and failure_count == 0:
+        return STATUS_SKIPPED
+    if failure_count == 0 and status == 'run':
+        return STATUS_PASSED
+    return STATUS_FAILED
+
+
+def _make_header(attrib):
+    # Build the normalized report header from the attributes of the <testsuites> node
+    # (or the top level object of a JSON report).
+
+    return {
+        'name': str(attrib.get('name', '')),
+        'tests': int(attrib.get('tests', 0)),
+        'failures': int(attrib.get('failures', 0)),
+        'disabled': int(attrib.get('disabled', 0)),
+        'errors': int(attrib.get('errors', 0)),
+        'time': parse_time(attrib.get('time', 0)),
+        'timestamp': str(attrib.get('timestamp', '')).rstrip('Z'),
+    }
+
+
+def _make_testcase(attrib, suite_name, failures, metrics=None):
+    # Build the normalized testcase record.
+    # - attrib: raw attributes of the testcase.
+    # - suite_name: name of the enclosing testsuite.
+    # - failures: list of (message, type) tuples.
+    # - metrics: numeric RecordProperty values as dict {metric name: float}.
+
+    status = str(attrib.get('status', ''))
+    result = str(attrib.get('result', ''))
+    return {
+        'suite': suite_name,
+        'classname': str(attrib.get('classname', suite_name)),
+        'name': str(attrib.get('name', '')),
+        'status': normalize_status(status, result, len(failures)),
+        'time': parse_time(attrib.get('time', 0)),
+        'timestamp': str(attrib.get('timestamp', '')).rstrip('Z'),
+        'failures': failures,
+        'metrics': metrics or {},
+    }
+
+
+def _iter_xml_testcases(context):
+    # Generator over the <testcase> nodes of an XML report which is being parsed with iterparse.
+    # Every finished <testcase> node is cleared after it was converted, so the memory usage
+    # does not grow with the size of the report.
+
+    suite_name = ''
+    for event, xml_node in context:
+        if event == 'start' and xml_node.tag == 'testsuite':
+            suite_name = xml_node.attrib.get('name', '')
+        elif event == 'end' and xml_node.tag == 'testcase':
+            failures = [(xml_failure_node.attrib.get('message', xml_failure_node.text or ''),
+                         xml_failure_node.attrib.get('type', ''))
+                        for xml_failure_node in xml_node.findall('./failure')]
+            yield _make_testcase(xml_node.attrib, suite_name, failures, read_testcase_metrics(xml_node))
+            xml_node.clear()
+        elif event == 'end' and xml_node.tag == 'testsuite':
+            xml_node.clear()
+
+
+def _iter_json_testcases(json_root):
+    # Generator over the testcases of a JSON report.
+
+    for json_testsuite in json_root.get('testsuites', []):
+        suite_name = json_testsuite.get('name', '')
+        for json_testcase in json_testsuite.get('testsuite', []):
+            failures = [(json_failure.get('failure', ''), json_failure.get('type', ''))
+                        for json_failure in json_testcase.get('failures', [])]
+            yield _make_testcase(json_testcase, suite_name, failures, read_json_testcase_metrics(json_testcase))
+
+
+def read_report(report_file):
+    # Open a gtest XML or JSON report.
+    # Returns a tuple (header, testcases):
+    # - header: dict with the normalized attributes of the whole run.
+    # - testcases: generator yielding one normalized dict per testcase, in report order.
+    # XML reports are streamed, so the testcases can only be iterated once.
+
+    if os.path.splitext(report_file)[1].lower() == '.json':
+        with open(report_file, 'r') as fin:
+            json_root = json.load(fin)
+        return _make_header(json_root), _iter_json_testcases(json_root)
+
+    context = ET.iterparse(report_file, events=('start', 'end'))
+    event, xml_root = next(context)
+    if xml_root.tag != 'testsuites':
+        raise ValueError('The xml file {!r} has an invalid root node tag (found: {!r}, expected: {!r})'.format(
+            report_file, xml_root.tag, 'testsuites'))
+    return _make_header(xml_root.attrib), _iter_xml_testcases(context)
+
+
+def testcase_key(classname, name):
+    # Unique key of a testcase across runs, e.g. 'TestSuiteAssignment_02::TestCase_01_ReverseStringTest'.
+
+    return '{}::{}'.format(classname, name)
@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+# Shebang to specify the interpreter for running the script
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import mimetypes
+import subprocess
+import collections
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'convertXMLtoHTML'))
+from templates.html_templates import tmpl_live_report_html
+from watchdog import CONSOLE_LINE_PATTERN, is_disabled_test
+from shard_planner import parse_test_list
+from test_runner import convert_reports
+# Importing required libraries:
+# - os, sys: for file handling, exit codes and the import path of the HTML templates.
+# - json: for the data of the server-sent events.
+# - time: for the elapsed time of the run.
+# - asyncio: for following the test process and serving the live page in one event loop.
+# - argparse: for parsing command-line arguments.
+# - mimetypes: for the content type of the page resources.
+# - subprocess: for listing the tests of the binary.
+# - collections: for the bounded lists of recent tests and failures.
+# - html_templates: the live page.
+# - watchdog: parsing of the gtest console output.
+# - shard_planner: parsing the test list of the binary for the progress bar.
+# - test_runner: the HTML report of the finished run.
+
+# Directory of the resources of the HTML report (CSS, JS), served for the live page.
+HTML_RESOURCES_DIRECTORY = os.path.realpath(os.path.join(
+    os.path.dirname(os.path.realpath(__file__)), '..', 'convertXMLtoHTML', 'html_resources'))
+
+# Default address of the live page.
+DEFAULT_LIVE_HOST = '127.0.0.1'
+DEFAULT_LIVE_PORT = 8765
+
+# Recently finished tests and failures kept for the page. Everything else is only counted, so the memory
+# of the live report does not grow with the number of tests.
+RECENT_TESTS_KEPT = 50
+FAILURES_KEPT = 20
+
+# Characters of console output kept for the running test (its failure output).
+MAX_TEST_OUTPUT = 8192
+
+# Longest console line read from the test process, in bytes; the rest of a longer line is dropped.
+MAX_CONSOLE_LINE = 1024 * 1024
+
+# Bytes read from the console output of the test process at once.
+CONSOLE_CHUNK_SIZE = 64 * 1024
+
+# Events queued for one page; a page that does not keep up is disconnected (and reconnects with a snapshot).
+CLIENT_QUEUE_SIZE = 1000
+
+
+def count_tests(binary):
+    # Number of tests the binary runs without filter (disabled tests are not run), counted while the
+    # --gtest_list_tests output is read.
+
+    with subprocess.Popen([binary, '--gtest_list_tests'], stdout=subprocess.PIPE, text=True, errors='replace') as process:
+        return sum(1 for test in parse_test_list(process.stdout) if not is_disabled_test(test))
+
+
+def create_live_state(total=None):
+    # Create the state of a live run, updated from the console output of the test process.
+    # - total: number of tests to run (None if unknown).
+    # - counts: finished tests per status; current: the running test and its console output so far.
+    # - recent, failures: the last RECENT_TESTS_KEPT finished tests and FAILURES_KEPT failures.
+    # - clients: the event queues of the connected pages.
+    # - done: the exit code and final report once the run ended, otherwise None.
+
+    return {
+        'total': total,
+        'start_time': time.monotonic(),
+        'counts': {'passed': 0, 'failed': 0, 'skipped': 0},
+        'current': None,
+        'output': [],
+        'output_size': 0,
+        'recent': collections.deque(maxlen=RECENT_TESTS_KEPT),
+        'failures': collections.deque(maxlen=FAILURES_KEPT),
+        'clients': set(),
+        'done': None,
+    }
+
+
+def parse_console_line(state, line):
+    # Update the live state with one line of the gtest console output.
+    # Returns the event for the pages as tuple (event name, data), or None:
+    # - ('start', {'test'}) for '[ RUN      ] Suite.Test'.
+    # - ('result', {'test', 'status', 'time', 'output'}) for the result line of the running test.
+
+    match = CONSOLE_LINE_PATTERN.match(line.rstrip('\r\n'))
+    if match is None:
+        if state['current'] is not None and state['output_size'] < MAX_TEST_OUTPUT:
+            state['output'].append(line[:MAX_TEST_OUTPUT - state['output_size']])
+            state['output_size'] += len(state['output'][-1])
+        # Lines between RUN and the result of a test are its failure output; a chatty test keeps only the start.
+        return None
+
+    event, test, milliseconds = match.groups()
+    if event == 'RUN':
+        state['current'] = test
+        state['output'] = []
+        state['output_size'] = 0
+        return 'start', {'test': test}
+    if test != state['current'] or milliseconds is None:
+        return None
+    # The summary lines at the end of the run repeat the failed tests without a time.
+
+    result = {
+        'test': test,
+        'status': 'passed' if event == 'OK' else event.lower(),
+        'time': int(milliseconds) / 1000.0,
+        'output': ''.join(state['output']).strip(),
+    }
+    state['counts'][result['status']] += 1
+    state['recent'].append(result)
+    if result['status'] == 'failed':
+        state['failures'].append(result)
+    state['current'] = None
+    state['output'] = []
+    state['output_size'] = 0
+    return 'result', result
+
+
+def live_snapshot(state):
+    # The state sent to a page when it connects (oldest entries first, as the page adds the newest on top).
+
+    return {
+        'total': state['total'],
+        'counts': state['counts'],
+        'current': state['current'],
+        'elapsed': time.monotonic() - state['start_time'],
+        'recent': list(state['recent']),
+        'failures': list(state['failures']),
+        'done': state['done'] is not None,
+    }
+
+
+def format_event(event, data):
+    # Encode a server-sent event; the JSON data never contains a line break.
+
+    return 'event: {}\ndata: {}\n\n'.format(event, json.dumps(data)).encode('utf-8')
+
+
+def publish(state, event, data):
+    # Queue an event for every connected page.
+
+    message = format_event(event, data)
+    for client in list(state['clients']):
+        try:
+            client.put_nowait(message)
+        except asyncio.QueueFull:
+            state['clients'].discard(client)
+            while not client.empty():
+                client.get_nowait()
+            client.put_nowait(None)
+    # A page that does not keep up is dropped instead of buffering the whole run for it.
+
+
+def close_clients(state):
+    # End the event streams of all connected pages.
+
+    for client in list(state['clients']):
+        try:
+            client.put_nowait(None)
+        except asyncio.QueueFull:
+            client.get_nowait()
+            client.put_nowait(None)
+    state['clients'].clear()
+
+
+def http_response(writer, status, content_type, body, extra_headers=''):
+    # Write a complete HTTP response and close the connection afterwards.
+
+    writer.write('HTTP/1.1 {}\r\nContent-Type: {}\r\nContent-Length: {}\r\nConnection: close\r\n{}\r\n'.format(
+        status, content_type, len(body), extra_headers).encode('utf-8'))
+    writer.write(body)
+
+
+async def serve_events(state, writer):
+    # Stream the events of the run to a page: a snapshot first, then every event until the run ends.
+
+    writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-cache\r\nConnection: keep-alive\r\n\r\n')
+    writer.write(format_event('snapshot', live_snapshot(state)))
+    if state['done'] is not None:
+        writer.write(format_event('done', state['done']))
+        await writer.drain()
+        return
+
+    client = asyncio.Queue(CLIENT_QUEUE_SIZE)
+    state['clients'].add(client)
+    try:
+        await writer.drain()
+        while True:
+            message = await client.get()
+            if message is None:
+                break
+            writer.write(message)
+            await writer.drain()
+    finally:
+        state['clients'].discard(client)
+
+
+async def handle_client(state, reader, writer, binary_name):
+    # Answer one HTTP request: the live page ('/'), its event stream ('/events') or a report resource.
+
+    try:
+        request_line = (await reader.readline()).decode('latin-1').split()
+        while (await reader.readline()) not in [b'\r\n', b'\n', b'']:
+            pass
+        # The request headers are not needed.
+
+        if len(request_line) < 2 or request_line[0] != 'GET':
+            http_response(writer, '405 Method Not Allowed', 'text/plain', b'Only GET is supported.\n')
+            return
+        path = request_line[1].split('?')[0]
+
+        if path == '/':
+            page = tmpl_live_report_html.format(
+                binary_name=binary_name,
+                test_total='' if state['total'] is None else state['total'],
+                recent_shown=RECENT_TESTS_KEPT,
+                failures_kept=FAILURES_KEPT,
+            )
+            http_response(writer, '200 OK', 'text/html; charset=utf-8', page.encode('utf-8'))
+        elif path == '/events':
+            await serve_events(state, writer)
+        else:
+            resource_file = os.path.realpath(os.path.join(HTML_RESOURCES_DIRECTORY, path.lstrip('/')))
+            if not resource_file.startswith(HTML_RESOURCES_DIRECTORY + os.sep) or not os.path.isfile(resource_file):
+                http_response(writer, '404 Not Found', 'text/plain', b'Not found.\n')
+                return
+            # Only files below html_resources are served.
+            with open(resource_file, 'rb') as fin:
+                http_response(writer, '200 OK', mimetypes.guess_type(resource_file)[0] or 'application/octet-stream', fin.read())
+        await writer.drain()
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    # A page closing its connection is not an error of the run.
+    finally:
+        writer.close()
+
+
+async def read_console_lines(stream):
+    # Yield the lines of the console output of the test process (bytes, with line end).
+    # The output is read in chunks and split here: StreamReader.readline() would raise an error for a line
+    # over its limit and end the run. A line over MAX_CONSOLE_LINE bytes is cut and the rest of it is dropped.
+
+    pending = b''
+    dropping = False
+    while True:
+        chunk = await stream.read(CONSOLE_CHUNK_SIZE)
+        if not chunk:
+            break
+        lines = (pending + chunk).split(b'\n')
+        pending = lines.pop()
+        for line in lines:
+            if dropping:
+                dropping = False
+                continue
+            # The first line end after a cut line ends its dropped rest.
+            yield line + b'\n'
+        if len(pending) > MAX_CONSOLE_LINE:
+            if not dropping:
+                yield pending[:MAX_CONSOLE_LINE] + b'\n'
+            pending = b''
+            dropping = True
+    if pending and not dropping:
+        yield pending
+
+
+async def follow_tests(state, binary, xml_file, test_filter='*', echo=True):
+    # Run the gtest binary and publish an event for every test that starts or finishes.
+    # The console output is read line by line, so only the running test is held in memory.
+    # gtest still writes the complete XML report to `xml_file` at the end.
+    # Returns the exit code of the test process.
+
+    process = await asyncio.create_subprocess_exec(
+        binary, '--gtest_filter=' + test_filter, '--gtest_output=xml:' + xml_file, '--gtest_color=no',
+        stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT)
+    try:
+        async for raw_line in read_console_lines(process.stdout):
+            line = raw_line.decode('utf-8', errors='replace')
+            if echo:
+                sys.stdout.write(line)
+            event = parse_console_line(state, line)
+            if event is not None:
+                publish(state, *event)
+    except BaseException:
+        if process.returncode is None:
+            process.kill()
+        await process.wait()
+        raise
+    # The test process never outlives the live report, e.g. after Ctrl+C.
+    return await process.wait()
+
+
+async def live_run(binary, xml_file, html_file=None, test_filter='*', host=DEFAULT_LIVE_HOST, port=DEFAULT_LIVE_PORT,
+                   keep_serving=False):
+    # Run the tests while serving the live page at http://host:port/. After the run the HTML report of the
+    # complete XML report is generated (if `html_file` is given) and the pages are told where to find it.
+    # With `keep_serving`, the page stays available until the script is interrupted.
+    # Returns the exit code of the test process.
+
+    total = None
+    if test_filter == '*':
+        total = count_tests(binary)
+    # With a filter the number of tests is not known in advance; the page shows the finished ones only.
+
+    state = create_live_state(total)
+    server = await asyncio.start_server(
+        lambda reader, writer: handle_client(state, reader, writer, os.path.basename(binary)), host, port)
+    print(f"Live report at http://{host}:{port}/")
+
+    exit_code = await follow_tests(state, binary, xml_file, test_filter)
+
+    report = None
+    if html_file and os.path.isfile(xml_file):
+        await asyncio.to_thread(convert_reports, xml_file, html_file)
+        report = os.path.realpath(html_file)
+    # The converter runs in a thread, so connected pages are still served meanwhile.
+
+    state['done'] = {'exit_code': exit_code, 'report': report}
+    publish(state, 'done', state['done'])
+    close_clients(state)
+
+    if keep_serving:
+        print('Run finished, the live page stays available (press Ctrl+C to stop).')
+        try:
+            await server.serve_forever()
+        except asyncio.CancelledError:
+            pass
+    server.close()
+    await server.wait_closed()
+    return exit_code
+
+
+def main():
+    # Command-line entry point: run the tests and follow them on the live page.
+
+    parser = argparse.ArgumentParser(description='Run the gtest binary and follow its results live in the browser', allow_abbrev=False)
+    parser.add_argument('--binary', type=str, default='build/Report_Program', metavar="build/Report_Program", help="Location of the gtest binary")
+    parser.add_argument('--xml', type=str, default='report/ReportTest.xml', metavar="report/ReportTest.xml", help="Location of the XML report written by the run")
+    parser.add_argument('--html', type=str, metavar="report/ReportTest.html", help="Generate the HTML report after the run")
+    parser.add_argument('--filter', type=str, default='*', help="--gtest_filter of the run")
+    parser.add_argument('--host', type=str, default=DEFAULT_LIVE_HOST, help="Address of the live page")
+    parser.add_argument('--port', type=int, default=DEFAULT_LIVE_PORT, help="Port of the live page")
+    parser.add_argument('--keep-serving', action='store_true', help="Keep serving the live page after the run")
+    args = parser.parse_args()
+    # Parse command-line arguments provided by the user.
+
+    if not os.path.isfile(args.binary):
+        print(f"ERROR: The test binary {args.binary} does not exist.")
+        return 1
+    output_directory = os.path.dirname(args.xml)
+    if output_directory and not os.path.isdir(output_directory):
+        os.makedirs(output_directory)
+
+    try:
+        return asyncio.run(live_run(args.binary, args.xml, args.html, args.filter, args.host, args.port, args.keep_serving))
+    except KeyboardInterrupt:
+        return 130
+
+
+if __name__ == '__main__':
+    sys.exit(main())
+    # Entry point of the script. Execute the main() function when the script is run.
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# Shebang to specify the interpreter for running the script
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import filecmp
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'convertXMLtoHTML'))
+from report_model import build_model
+# Importing required libraries:
+# - os, sys: for file handling, exit codes and the import path of the HTML converter.
+# - time: for timing the rendering.
+# - shutil, tempfile: for the temporary output directories.
+# - argparse: for parsing command-line arguments.
+# - filecmp: for checking that the parallel output is identical to the serial one.
+# - report_model: the report model, parsed once and shared by all runs.
+# The HTML converter (xmlTohtml) is imported in main(), after the import path is set.
+
+# Failure message of the failing testcases of the synthetic report (every FAILURE_EVERY-th testcase).
+SYNTHETIC_FAILURE = 'TestSuite/src/TestSuiteSrc.cc:{line}\nExpected equality of these values:\n  result\n    Which is: {value}\n  {expected}'
+FAILURE_EVERY = 50
+
+
+def write_synthetic_report(xml_file, suites, cases):
+    # Write a gtest XML report with `suites` testsuites of `cases` testcases each.
+    # Every FAILURE_EVERY-th testcase fails, so the failure details files are written as well.
+
+    total_failures = 0
+    with open(xml_file, 'w') as fout:
+        fout.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        suite_lines = []
+        for suite_idx in range(suites):
+            testcase_lines = []
+            suite_failures = 0
+            for case_idx in range(cases):
+                case_time = '{:.3f}'.format(0.001 * ((suite_idx * cases + case_idx) % 97))
+                attributes = ('name="Case_{:05d}" status="run" result="completed" time="{}" '
+                              'timestamp="2026-01-01T00:00:00.000" classname="Suite_{:05d}"').format(case_idx, case_time, suite_idx)
+                if (suite_idx * cases + case_idx) % FAILURE_EVERY == 0:
+                    message = SYNTHETIC_FAILURE.format(line=case_idx, value=case_idx, expected=case_idx + 1)
+                    escaped = message.replace('\n', '&#x0A;')
+                    testcase_lines.append('    <testcase {}>\n      <failure message="{}" type=""><![CDATA[{}]]></failure>\n    </testcase>'.format(
+                        attributes, escaped, message))
+                    suite_failures += 1
+                else:
+                    testcase_lines.append('    <testcase {} />'.format(attributes))
+            total_failures += suite_failures
+            suite_lines.append('  <testsuite name="Suite_{:05d}" tests="{}" failures="{}" disabled="0" errors="0" time="{:.3f}">\n{}\n  </testsuite>'.format(
+                suite_idx, cases, suite_failures, 0.05 * cases, '\n'.join(testcase_lines)))
+        fout.write('<testsuites tests="{}" failures="{}" disabled="0" errors="0" time="{:.3f}" '
+                   'timestamp="2026-01-01T00:00:00.000" name="AllTests">\n'.format(suites * cases, total_failures, 0.05 * suites * cases))
+        fout.write('\n'.join(suite_lines))
+        fout.write('\n</testsuites>\n')
+
+
+def worker_counts(max_workers):
+    # Worker counts of the benchmark: 1, 2, 4, ... up to and including `max_workers`.
+
+    counts = [1]
+    while counts[-1] * 2 < max_workers:
+        counts.append(counts[-1] * 2)
+    if max_workers > 1:
+        counts.append(max_workers)
+    return counts
+
+
+def same_output(directory, reference_directory):
+    # Compare the report files of two output directories (page, failure details and search index).
+
+    comparison = filecmp.dircmp(directory, reference_directory)
+    if comparison.left_only or comparison.right_only or comparison.diff_files or comparison.funny_files:
+        return False
+    _, mismatch, errors = filecmp.cmpfiles(directory, reference_directory, comparison.common_files, shallow=False)
+    if mismatch or errors:
+        return False
+    return all(same_output(os.path.join(directory, name), os.path.join(reference_directory, name))
+               for name in comparison.common_dirs)
+
+
+def main():
+    # Command-line entry point: render the same report with 1, 2, 4, ... worker processes and print the speedups.
+
+    parser = argparse.ArgumentParser(description='Measure the scaling of the parallel HTML rendering', allow_abbrev=False)
+    parser.add_argument('--xml', type=str, metavar="report/ReportTest.xml", help="XML report to render (default: a synthetic report)")
+    parser.add_argument('--suites', type=int, default=2000, help="Testsuites of the synthetic report")
+    parser.add_argument('--cases', type=int, default=50, help="Testcases per testsuite of the synthetic report")
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1, help="Largest number of rendering processes (default: number of cores)")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per worker count; the fastest one is reported")
+    args = parser.parse_args()
+    # Parse command-line arguments provided by the user.
+
+    from xmlTohtml import generate_html
+
+    work_directory = tempfile.mkdtemp(prefix='render_benchmark_')
+    try:
+        report_file = args.xml
+        if report_file is None:
+            report_file = os.path.join(work_directory, 'synthetic.xml')
+            write_synthetic_report(report_file, args.suites, args.cases)
+        model = build_model(os.path.realpath(report_file))
+        print(f"Report: {len(model['suite_name'])} testsuite(s), {len(model['case_name'])} testcase(s), {os.cpu_count()} core(s)")
+
+        results = []
+        for workers in worker_counts(args.max_workers):
+            output_directory = os.path.join(work_directory, f'workers_{workers}')
+            os.makedirs(output_directory)
+            seconds = []
+            for _ in range(max(1, args.repeat)):
+                start_time = time.monotonic()
+                generate_html(report_file, os.path.join(output_directory, 'Report.html'), model=model, render_workers=workers)
+                seconds.append(time.monotonic() - start_time)
+            results.append((workers, min(seconds), same_output(output_directory, os.path.join(work_directory, 'workers_1'))))
+    finally:
+        shutil.rmtree(work_directory)
+
+    serial_time = results[0][1]
+    print('  workers      time   speedup  identical')
+    for workers, seconds, identical in results:
+        print('  {:>7} {:>8.3f}s {:>8.2f}x  {}'.format(workers, seconds, serial_time / seconds, 'yes' if identical else 'NO'))
+    return 0 if all(identical for _, _, identical in results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
+    # Entry point of the script. Execute the main() function when the script is run.
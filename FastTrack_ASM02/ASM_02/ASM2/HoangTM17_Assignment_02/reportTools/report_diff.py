@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# Shebang to specify the interpreter for running the script
+
+import sys
+import argparse
+from gtest_report import read_report, testcase_key, STATUS_PASSED, STATUS_FAILED
+from report_model import suite_count, suite_cases, case_key, case_status
+# Importing required libraries:
+# - sys: for exit codes.
+# - argparse: for parsing command-line arguments.
+# - gtest_report: streaming reader for gtest XML/JSON reports.
+# - report_model: the testcase columns of a report model already built by the caller.
+
+# Diff categories in display order: (key, title).
+DIFF_CATEGORIES = [
+    ('newly_failing', 'Newly failing'),
+    ('newly_passing', 'Newly passing'),
+    ('added', 'Added'),
+    ('removed', 'Removed'),
+    ('slower', 'Significantly slower'),
+]
+
+# A passing testcase counts as significantly slower if its time grew by this factor ...
+DEFAULT_SLOWER_RATIO = 1.5
+# ... and by at least this many seconds (filters out noise of very short tests).
+DEFAULT_SLOWER_MIN_DELTA = 0.05
+
+
+def read_baseline_index(baseline_file):
+    # Build side of the hash join: {'classname::name': (status, time)} of the baseline report.
+
+    baseline_header, baseline_testcases = read_report(baseline_file)
+    baseline_index = {}
+    for testcase in baseline_testcases:
+        baseline_index[testcase_key(testcase['classname'], testcase['name'])] = (testcase['status'], testcase['time'])
+    return baseline_index
+
+
+def diff_testcases(baseline_index, current_testcases, slower_ratio, slower_min_delta):
+    # Probe the baseline index with the testcases of the current report, (key, status, time) tuples in report order.
+    # Returns the diff as described in diff_reports(); `baseline_index` is emptied on the way.
+
+    diff = {category: [] for category, title in DIFF_CATEGORIES}
+
+    for key, current_status, current_time in current_testcases:
+        baseline_entry = baseline_index.pop(key, None)
+        if baseline_entry is None:
+            diff['added'].append((key, None, current_status, None, current_time))
+            continue
+        # Probe side: a testcase missing in the baseline was added.
+
+        baseline_status, baseline_time = baseline_entry
+        entry = (key, baseline_status, current_status, baseline_time, current_time)
+
+        if current_status == STATUS_FAILED and baseline_status != STATUS_FAILED:
+            diff['newly_failing'].append(entry)
+        elif current_status == STATUS_PASSED and baseline_status == STATUS_FAILED:
+            diff['newly_passing'].append(entry)
+        elif current_status == STATUS_PASSED and baseline_status == STATUS_PASSED and \
+                current_time >= baseline_time * slower_ratio and current_time - baseline_time >= slower_min_delta:
+            diff['slower'].append(entry)
+        # Status changes take precedence over timing changes; timings are only compared for passing tests.
+
+    for key, (baseline_status, baseline_time) in baseline_index.items():
+        diff['removed'].append((key, baseline_status, None, baseline_time, None))
+    # The remaining baseline testcases do not exist in the current report anymore.
+
+    diff['slower'].sort(key=lambda entry: entry[3] - entry[4])
+    # Show the largest slowdown first.
+
+    return diff
+
+
+def diff_reports(baseline_file, current_file, slower_ratio=DEFAULT_SLOWER_RATIO, slower_min_delta=DEFAULT_SLOWER_MIN_DELTA):
+    # Compare two gtest XML/JSON reports testcase by testcase.
+    # Returns a dict {category: [entry, ...]} with one list per key of DIFF_CATEGORIES.
+    # Each entry is a tuple (key, baseline_status, current_status, baseline_time, current_time);
+    # status and time are None for the side on which the testcase does not exist.
+    #
+    # The testcases are matched with a hash join on 'classname::name': the baseline is loaded into a
+    # dict holding only status and time, the current report is streamed against it. Whatever is left
+    # in the dict afterwards was removed. Time and memory are linear in the report sizes.
+
+    current_header, current_testcases = read_report(current_file)
+    return diff_testcases(read_baseline_index(baseline_file),
+                          ((testcase_key(testcase['classname'], testcase['name']), testcase['status'], testcase['time'])
+                           for testcase in current_testcases),
+                          slower_ratio, slower_min_delta)
+
+
+def diff_model(baseline_file, model, slower_ratio=DEFAULT_SLOWER_RATIO, slower_min_delta=DEFAULT_SLOWER_MIN_DELTA):
+    # Compare the current report, given as its report model (report_model.build_model), with a baseline report.
+    # Same result as diff_reports(); only the baseline is parsed, the probe side is read from the model columns.
+
+    return diff_testcases(read_baseline_index(baseline_file),
+                          ((case_key(model, case_id), case_status(model, case_id), model['case_time'][case_id])
+                           for suite_id in range(suite_count(model)) for case_id in suite_cases(model, suite_id)),
+                          slower_ratio, slower_min_delta)
+
+
+def main():
+    # Command-line entry point: print the differences between a baseline and a current report.
+
+    parser = argparse.ArgumentParser(description='Compare a baseline and a current gtest XML/JSON report', allow_abbrev=False)
+    parser.add_argument('baseline', type=str, metavar="baseline/ReportTest.xml", help="Location of the baseline report")
+    parser.add_argument('current', type=str, metavar="report/ReportTest.xml", help="Location of the current report")
+    parser.add_argument('--slower-ratio', type=float, default=DEFAULT_SLOWER_RATIO, help="Time factor from which a test counts as slower")
+    parser.add_argument('--slower-min-delta', type=float, default=DEFAULT_SLOWER_MIN_DELTA, help="Minimum slowdown in seconds")
+    args = parser.parse_args()
+    # Parse command-line arguments provided by the user.
+
+    diff = diff_reports(args.baseline, args.current, args.slower_ratio, args.slower_min_delta)
+
+    for category, title in DIFF_CATEGORIES:
+        print(f"{title}: {len(diff[category])}")
+        for key, baseline_status, current_status, baseline_time, current_time in diff[category]:
+            if category == 'slower':
+                print(f"  {key}: {baseline_time:.3f} -> {current_time:.3f} sec")
+            else:
+                print(f"  {key}: {baseline_status or '-'} -> {current_status or '-'}")
+
+    return 1 if diff['newly_failing'] else 0
+    # A non-zero exit code signals new failures to the caller.
+
+
+if __name__ == '__main__':
+    sys.exit(main())
+    # Entry point of the script. Execute the main() function when the script is run.
@@ -0,0 +1,366 @@
+import os
+import sys
+import json
+import array
+import xml.etree.ElementTree as ET
+from gtest_report import parse_time, normalize_status, testcase_key, STATUS_PASSED, STATUS_FAILED, STATUS_NOTRUN, STATUS_SKIPPED
+from test_metrics import KNOWN_TESTCASE_ATTRIBUTES, read_testcase_properties, metrics_from_properties
+from failure_signature import failure_signature
+# Importing required libraries:
+# - os, json: for reading gtest JSON reports (--gtest_output=json) into the same model.
+# - sys: for interning the time attribute texts, which repeat for many testcases.
+# - array: for the compact per-suite and per-testcase columns (ints, floats, status codes).
+# - xml.etree.ElementTree (ET): for streaming gtest XML reports.
+# - gtest_report, test_metrics: shared helpers for gtest reports and RecordProperty values.
+# - failure_signature: normalization of failure messages into signatures.
+
+# Status codes of the model: the index of the normalized status in this list.
+STATUSES = [STATUS_PASSED, STATUS_FAILED, STATUS_NOTRUN, STATUS_SKIPPED]
+STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+
+# Attributes expected on the report nodes; others are reported by a warning.
+KNOWN_TESTSUITES_ATTRIBUTES = ['tests', 'failures', 'disabled', 'time', 'timestamp', 'author', 'name', 'project']
+KNOWN_TESTSUITE_ATTRIBUTES = ['name', 'tests', 'failures', 'disabled', 'time', 'tags']
+KNOWN_FAILURE_ATTRIBUTES = ['message', 'type']
+
+# Attributes whose absence is reported by a warning (the model uses a default value instead).
+REQUIRED_ATTRIBUTES = {
+    'testsuites': ['tests', 'failures', 'disabled', 'time', 'timestamp', 'name'],
+    'testsuite': ['name', 'tests', 'failures', 'disabled', 'time'],
+    'testcase': ['name', 'time', 'status', 'classname'],
+    'failure': ['message', 'type'],
+}
+
+
+def check_node_attributes(xml_node, known_attributes):
+    # Print a warning for each missing required attribute and for each unknown attribute without value
+    # of an XML node (the same checks the HTML converter always did while rendering).
+
+    for attribute_name in REQUIRED_ATTRIBUTES.get(xml_node.tag, []):
+        if attribute_name not in xml_node.attrib:
+            print('Warning: Attribute {!r} was not found inside xml node {!s}[{!r}]. Set it to its default value.'.format(
+                attribute_name, xml_node.tag, xml_node.attrib))
+
+    for unknown_attribute in [name for name in xml_node.attrib if name not in known_attributes]:
+        if not xml_node.attrib[unknown_attribute].strip():
+            print('Warning: Unknown attribute {!r} found in node {!s}[{!r}] which is not parsed.'.format(
+                unknown_attribute, xml_node.tag, xml_node.attrib))
+    # Unknown attributes with a value are RecordProperty values and kept as testcase properties.
+
+
+def create_model(report_file=''):
+    # Create an empty report model.
+    # Testsuites, testcases and failures are numbered in report order (suite id, case id, failure id) and
+    # every field is stored as one column (list or typed array) indexed by that id:
+    # - suite_first_case: the testcases of suite s are the ids suite_first_case[s] .. suite_first_case[s + 1] - 1.
+    # - case_first_failure: the failures of case c are the ids case_first_failure[c] .. case_first_failure[c + 1] - 1.
+    # - case_status: normalized status code (index into STATUSES).
+    # - suite_time_text, case_time_text (and header['time_text']): the 'time' attributes as written in the report
+    #   ('' if missing). The outputs show these texts; the float columns are for sums, rankings and statistics.
+    # - case_state: index into `states`, the distinct raw (status, result) attribute pairs, e.g. ('run', 'completed').
+    # - case_properties: {case id: {property name: value string}}, only for testcases recording properties.
+    # - failure_signature: index into `signatures`, the distinct signatures of the failure messages.
+
+    return {
+        'report_file': report_file,
+        'header': {},
+        'states': [],
+        'suite_name': [],
+        'suite_tags': [],
+        'suite_timestamp': [],
+        'suite_tests': array.array('i'),
+        'suite_failures': array.array('i'),
+        'suite_disabled': array.array('i'),
+        'suite_errors': array.array('i'),
+        'suite_time': array.array('d'),
+        'suite_time_text': [],
+        'suite_first_case': array.array('i'),
+        'case_suite': array.array('i'),
+        'case_name': [],
+        'case_classname': [],
+        'case_file': [],
+        'case_line': array.array('i'),
+        'case_timestamp': [],
+        'case_tags': [],
+        'case_status': array.array('b'),
+        'case_state': array.array('b'),
+        'case_time': array.array('d'),
+        'case_time_text': [],
+        'case_first_failure': array.array('i'),
+        'case_properties': {},
+        'failure_message': [],
+        'failure_type': [],
+        'failure_text': [],
+        'failure_signature': array.array('i'),
+        'signatures': [],
+    }
+
+
+def parse_int(value):
+    # Convert an integer attribute, 0 for missing or invalid values.
+
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+def add_testcase(model, xml_testcase_node, suite_id, state_ids, signature_ids):
+    # Append one <testcase> node and its <failure> children to the model.
+    # `state_ids` and `signature_ids` map the distinct states and failure signatures seen so far to their index.
+
+    attrib = xml_testcase_node.attrib
+    check_node_attributes(xml_testcase_node, KNOWN_TESTCASE_ATTRIBUTES)
+
+    model['case_first_failure'].append(len(model['failure_message']))
+    xml_failure_nodes = xml_testcase_node.findall('./failure') if len(xml_testcase_node) else []
+    # Most testcases have no child nodes; skipping the path search for them is a large part of the parse time.
+    for xml_failure_node in xml_failure_nodes:
+        check_node_attributes(xml_failure_node, KNOWN_FAILURE_ATTRIBUTES)
+        model['failure_message'].append(xml_failure_node.attrib.get('message', ''))
+        model['failure_type'].append(xml_failure_node.attrib.get('type', ''))
+        model['failure_text'].append(xml_failure_node.text or '')
+        signature = failure_signature(model['failure_message'][-1] or model['failure_text'][-1])
+        if signature not in signature_ids:
+            signature_ids[signature] = len(model['signatures'])
+            model['signatures'].append(signature)
+        model['failure_signature'].append(signature_ids[signature])
+        # Failures of the same cause share one signature index, so they are grouped while parsing.
+
+    state = (attrib.get('status', ''), attrib.get('result', ''))
+    if state not in state_ids:
+        state_ids[state] = len(model['states'])
+        model['states'].append(state)
+    # gtest only writes a handful of status/result pairs, so each testcase stores a small index.
+
+    properties = read_testcase_properties(xml_testcase_node)
+    if properties:
+        model['case_properties'][len(model['case_name'])] = properties
+
+    model['case_suite'].append(suite_id)
+    model['case_name'].append(attrib.get('name', ''))
+    model['case_classname'].append(attrib.get('classname', ''))
+    model['case_file'].append(attrib.get('file', ''))
+    model['case_line'].append(parse_int(attrib.get('line')))
+    model['case_timestamp'].append(attrib.get('timestamp', ''))
+    model['case_tags'].append(attrib.get('tags', ''))
+    model['case_status'].append(STATUS_CODES[normalize_status(state[0], state[1], len(xml_failure_nodes))])
+    model['case_state'].append(state_ids[state])
+    model['case_time'].append(parse_time(attrib.get('time', 0)))
+    model['case_time_text'].append(sys.intern(attrib.get('time', '')))
+
+
+def make_header(xml_root):
+    # Header of the model from the attributes of the <testsuites> node.
+
+    check_node_attributes(xml_root, KNOWN_TESTSUITES_ATTRIBUTES)
+    return {
+        'name': xml_root.attrib.get('name', ''),
+        'tests': parse_int(xml_root.attrib.get('tests')),
+        'failures': parse_int(xml_root.attrib.get('failures')),
+        'disabled': parse_int(xml_root.attrib.get('disabled')),
+        'errors': parse_int(xml_root.attrib.get('errors')),
+        'time': parse_time(xml_root.attrib.get('time', 0)),
+        'time_text': xml_root.attrib.get('time', ''),
+        'timestamp': xml_root.attrib.get('timestamp', ''),
+        'project': xml_root.attrib.get('project'),
+        'author': xml_root.attrib.get('author'),
+    }
+
+
+def add_testsuite(model, xml_testsuite_node):
+    # Append the attributes of a <testsuite> node to the model; its testcases follow with add_testcase().
+
+    check_node_attributes(xml_testsuite_node, KNOWN_TESTSUITE_ATTRIBUTES)
+    model['suite_name'].append(xml_testsuite_node.attrib.get('name', ''))
+    model['suite_tags'].append(xml_testsuite_node.attrib.get('tags', ''))
+    model['suite_timestamp'].append(xml_testsuite_node.attrib.get('timestamp', ''))
+    model['suite_tests'].append(parse_int(xml_testsuite_node.attrib.get('tests')))
+    model['suite_failures'].append(parse_int(xml_testsuite_node.attrib.get('failures')))
+    model['suite_disabled'].append(parse_int(xml_testsuite_node.attrib.get('disabled')))
+    model['suite_errors'].append(parse_int(xml_testsuite_node.attrib.get('errors')))
+    model['suite_time'].append(parse_time(xml_testsuite_node.attrib.get('time', 0)))
+    model['suite_time_text'].append(sys.intern(xml_testsuite_node.attrib.get('time', '')))
+    model['suite_first_case'].append(len(model['case_name']))
+
+
+def json_to_xml_node(tag, json_object):
+    # Convert an object of a gtest JSON report into the XML node gtest writes for it: the values become
+    # attributes, the nested lists (testsuites, testcases, failures) are left to the caller.
+    # The JSON report writes 'status'/'result' in upper case ('RUN', 'COMPLETED') and times with unit ('0.005s');
+    # the XML report in lower case and without unit.
+
+    attrib = {name: str(value) for name, value in json_object.items() if not isinstance(value, (list, dict))}
+    for name in ['status', 'result']:
+        if name in attrib:
+            attrib[name] = attrib[name].lower()
+    if attrib.get('time', '').endswith('s'):
+        attrib['time'] = attrib['time'][:-1]
+    return ET.Element(tag, attrib)
+
+
+def build_json_model(report_file):
+    # Build the report model of a gtest JSON report. Its objects are converted into the XML nodes of the
+    # same report, so both formats are read by the same code and give the same model.
+    # Raises ValueError if the file is no JSON report.
+
+    with open(report_file, 'r') as fin:
+        json_root = json.load(fin)
+    if not isinstance(json_root, dict) or not isinstance(json_root.get('testsuites'), list):
+        raise ValueError('The json file {!r} has no "testsuites" list'.format(report_file))
+
+    model = create_model(report_file)
+    state_ids = {}
+    signature_ids = {}
+    model['header'] = make_header(json_to_xml_node('testsuites', json_root))
+    for json_testsuite in json_root['testsuites']:
+        add_testsuite(model, json_to_xml_node('testsuite', json_testsuite))
+        for json_testcase in json_testsuite.get('testsuite', []):
+            xml_testcase_node = json_to_xml_node('testcase', json_testcase)
+            for json_failure in json_testcase.get('failures', []):
+                xml_failure_node = ET.SubElement(xml_testcase_node, 'failure', {
+                    'message': json_failure.get('failure', ''),
+                    'type': json_failure.get('type', ''),
+                })
+                xml_failure_node.text = json_failure.get('failure', '')
+            # The JSON report only has the failure text, which the XML report repeats as message.
+            add_testcase(model, xml_testcase_node, len(model['suite_name']) - 1, state_ids, signature_ids)
+
+    model['suite_first_case'].append(len(model['case_name']))
+    model['case_first_failure'].append(len(model['failure_message']))
+    return model
+
+
+def build_model(report_file):
+    # Build the report model of a gtest XML report in one streaming pass.
+    # Every <testcase> is cleared after it was copied into the model, so the XML tree never exists as a whole.
+    # JSON reports (*.json) are read by build_json_model().
+    # Raises ValueError if the root node is not <testsuites>.
+
+    if os.path.splitext(report_file)[1].lower() == '.json':
+        return build_json_model(report_file)
+
+    model = create_model(report_file)
+    state_ids = {}
+    signature_ids = {}
+    context = ET.iterparse(report_file, events=('start', 'end'))
+    event, xml_root = next(context)
+    if xml_root.tag != 'testsuites':
+        raise ValueError('The xml file {!r} has an invalid root node tag (found: {!r}, expected: {!r})'.format(
+            report_file, xml_root.tag, 'testsuites'))
+
+    model['header'] = make_header(xml_root)
+
+    for event, xml_node in context:
+        if event == 'start' and xml_node.tag == 'testsuite':
+            add_testsuite(model, xml_node)
+        elif event == 'end' and xml_node.tag == 'testcase':
+            add_testcase(model, xml_node, len(model['suite_name']) - 1, state_ids, signature_ids)
+            xml_node.clear()
+        elif event == 'end' and xml_node.tag == 'testsuite':
+            xml_node.clear()
+
+    model['suite_first_case'].append(len(model['case_name']))
+    model['case_first_failure'].append(len(model['failure_message']))
+    # Closing offsets, so the ranges of the last testsuite and testcase need no special case.
+
+    return model
+
+
+def suite_count(model):
+    # Number of testsuites of the model.
+
+    return len(model['suite_name'])
+
+
+def suite_cases(model, suite_id):
+    # Ids of the testcases of a testsuite.
+
+    return range(model['suite_first_case'][suite_id], model['suite_first_case'][suite_id + 1])
+
+
+def case_failures(model, case_id):
+    # Ids of the failures of a testcase.
+
+    return range(model['case_first_failure'][case_id], model['case_first_failure'][case_id + 1])
+
+
+def case_status(model, case_id):
+    # Normalized status of a testcase (STATUS_PASSED, STATUS_FAILED, STATUS_NOTRUN or STATUS_SKIPPED).
+
+    return STATUSES[model['case_status'][case_id]]
+
+
+def case_key(model, case_id):
+    # Unique key of a testcase across runs, e.g. 'TestSuiteAssignment_02::TestCase_01_ReverseStringTest'.
+    # A testcase without classname is keyed by its testsuite name, as gtest_report.read_report() does.
+
+    classname = model['case_classname'][case_id] or model['suite_name'][model['case_suite'][case_id]]
+    return testcase_key(classname, model['case_name'][case_id])
+
+
+def read_model(model):
+    # Read a built model like gtest_report.read_report() reads a report file, for the tools consuming its
+    # normalized records (e.g. the run history) without parsing the report again.
+    # Returns a tuple (header, testcases) with the same keys as read_report(); the testcases are a generator
+    # over the case columns in report order.
+
+    header = {
+        'name': model['header']['name'],
+        'tests': model['header']['tests'],
+        'failures': model['header']['failures'],
+        'disabled': model['header']['disabled'],
+        'errors': model['header']['errors'],
+        'time': model['header']['time'],
+        'timestamp': model['header']['timestamp'].rstrip('Z'),
+    }
+
+    def testcases():
+        for suite_id in range(suite_count(model)):
+            for case_id in suite_cases(model, suite_id):
+                yield {
+                    'suite': model['suite_name'][suite_id],
+                    'classname': model['case_classname'][case_id] or model['suite_name'][suite_id],
+                    'name': model['case_name'][case_id],
+                    'status': case_status(model, case_id),
+                    'time': model['case_time'][case_id],
+                    'timestamp': model['case_timestamp'][case_id].rstrip('Z'),
+                    'failures': [(model['failure_message'][failure_id] or model['failure_text'][failure_id],
+                                  model['failure_type'][failure_id]) for failure_id in case_failures(model, case_id)],
+                    'metrics': metrics_from_properties(model['case_properties'].get(case_id, {})),
+                }
+
+    return header, testcases()
+
+
+def format_time(time_text, default='0'):
+    # The time text of the model as written in the report, e.g. '0.005', or `default` if the attribute is missing.
+
+    return time_text or default
+
+
+def walk_model(model, visitors, suite_ids=None):
+    # Walk the model once in report order and call the visitors.
+    # A visitor is a dict with optional callbacks:
+    # - 'begin_suite': called with the suite id before its testcases.
+    # - 'testcase': called with the case id.
+    # - 'end_suite': called with the suite id after its testcases.
+    # - 'end': called once after the last testsuite.
+    # Several visitors (e.g. the outputs of one report) share the same pass.
+    # With `suite_ids`, only these testsuites are walked (e.g. the share of a rendering worker).
+
+    for suite_id in range(suite_count(model)) if suite_ids is None else suite_ids:
+        for visitor in visitors:
+            if 'begin_suite' in visitor:
+                visitor['begin_suite'](suite_id)
+        for case_id in suite_cases(model, suite_id):
+            for visitor in visitors:
+                if 'testcase' in visitor:
+                    visitor['testcase'](case_id)
+        for visitor in visitors:
+            if 'end_suite' in visitor:
+                visitor['end_suite'](suite_id)
+
+    for visitor in visitors:
+        if 'end' in visitor:
+            visitor['end']()
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+# Shebang to specify the interpreter for running the script
+
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+import multiprocessing
+import concurrent.futures
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'convertXMLtoHTML'))
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'convertXMLtoXLSX'))
+from run_history import open_history, ingest_report, compact_history, hash_file, DEFAULT_HISTORY_DB
+from fixture_overhead import DEFAULT_OVERHEAD_THRESHOLD
+from result_cache import DEFAULT_CACHE_DIRECTORY
+from fragment_cache import DEFAULT_FRAGMENT_CACHE_DIRECTORY
+from test_runner import run_tests
+from report_model import build_model, walk_model, case_failures, format_time
+# Importing required libraries:
+# - os, sys: for file handling, exit codes and the import path of the converters.
+# - csv, json: for writing the CSV and JSON reports.
+# - time: for the phase timings.
+# - argparse: for parsing command-line arguments.
+# - multiprocessing, concurrent.futures: for writing the report formats concurrently.
+# - run_history, fixture_overhead, result_cache, fragment_cache, test_runner: the shared report tools.
+# - report_model: the report model built by one streaming parse of the XML report.
+# The converters (xmlTohtml, xmlToxlsx) are imported by the writers, so a missing optional
+# dependency (e.g. pandas for XLSX) only disables its own format.
+
+# Report formats in the order their timings are printed.
+REPORT_FORMATS = ['html', 'xlsx', 'json', 'csv']
+
+# Columns of the CSV report.
+CSV_COLUMNS = ['testsuite', 'classname', 'name', 'status', 'result', 'time', 'timestamp', 'failures', 'message']
+
+# Report model shared with the writers. It is set before the pool is started, so forked worker
+# processes inherit it instead of parsing the report again.
+PIPELINE_MODEL = {}
+
+
+def model_testcase_to_json(model, case_id):
+    # Convert a testcase of the report model into the testcase object of a gtest JSON report.
+
+    status, result = model['states'][model['case_state'][case_id]]
+    json_testcase = {
+        'name': model['case_name'][case_id],
+        'file': model['case_file'][case_id],
+        'line': model['case_line'][case_id],
+        'status': (status or 'run').upper(),
+        'result': (result or 'completed').upper(),
+        'time': '{}s'.format(format_time(model['case_time_text'][case_id])),
+        'timestamp': model['case_timestamp'][case_id],
+        'classname': model['case_classname'][case_id],
+    }
+    if not json_testcase['file']:
+        del json_testcase['file'], json_testcase['line']
+    json_testcase.update(model['case_properties'].get(case_id, {}))
+    # RecordProperty values are extra keys of the testcase, like gtest writes them.
+    failures = [{'failure': model['failure_text'][failure_id] or model['failure_message'][failure_id],
+                 'type': model['failure_type'][failure_id]}
+                for failure_id in case_failures(model, case_id)]
+    if failures:
+        json_testcase['failures'] = failures
+    return json_testcase
+
+
+def write_json_report(model, json_file):
+    # Write the report model as a gtest JSON report (the layout of --gtest_output=json).
+
+    header = model['header']
+    json_root = {key: header[key] for key in ['tests', 'failures', 'disabled', 'errors']}
+    json_root.update({
+        'timestamp': header['timestamp'],
+        'time': '{}s'.format(format_time(header['time_text'])),
+        'name': header['name'] or 'AllTests',
+        'testsuites': [],
+    })
+
+    def begin_suite(suite_id):
+        json_root['testsuites'].append({
+            'name': model['suite_name'][suite_id],
+            'tests': model['suite_tests'][suite_id],
+            'failures': model['suite_failures'][suite_id],
+            'disabled': model['suite_disabled'][suite_id],
+            'errors': model['suite_errors'][suite_id],
+            'timestamp': model['suite_timestamp'][suite_id],
+            'time': '{}s'.format(format_time(model['suite_time_text'][suite_id])),
+            'testsuite': [],
+        })
+
+    def testcase(case_id):
+        json_root['testsuites'][-1]['testsuite'].append(model_testcase_to_json(model, case_id))
+
+    walk_model(model, [{'begin_suite': begin_suite, 'testcase': testcase}])
+
+    with open(json_file, 'w') as fout:
+        json.dump(json_root, fout, indent=2)
+
+
+def write_csv_report(model, csv_file):
+    # Write one CSV row per testcase of the report model (see CSV_COLUMNS).
+
+    with open(csv_file, 'w', newline='', encoding='utf-8') as fout:
+        writer = csv.writer(fout)
+        writer.writerow(CSV_COLUMNS)
+
+        def testcase(case_id):
+            failure_ids = case_failures(model, case_id)
+            status, result = model['states'][model['case_state'][case_id]]
+            writer.writerow([
+                model['suite_name'][model['case_suite'][case_id]],
+                model['case_classname'][case_id],
+                model['case_name'][case_id],
+                status,
+                result,
+                model['case_time'][case_id],
+                model['case_timestamp'][case_id],
+                len(failure_ids),
+                '\n\n'.join(model['failure_message'][failure_id] or model['failure_text'][failure_id]
+                             for failure_id in failure_ids),
+            ])
+
+        walk_model(model, [{'testcase': testcase}])
+
+
+def write_report(report_format, output_file, options):
+    # Write one report format from the shared parsed report (PIPELINE_MODEL).
+    # Runs inside a worker of the pool. Returns a tuple (format, seconds, error message or None).
+
+    start_time = time.monotonic()
+    model = PIPELINE_MODEL['model']
+    report_file = model['report_file']
+
+    try:
+        output_directory = os.path.dirname(os.path.realpath(output_file))
+        if not os.path.isdir(output_directory):
+            os.makedirs(output_directory)
+
+        if report_format == 'html':
+            from xmlTohtml import generate_html, copy_html_resources
+            copy_html_resources(output_directory)
+            generate_html(report_file, output_file, options['history'], options['trend_runs'], options['flaky_runs'],
+                          options['baseline'], options['top_k'], options['overhead_threshold'], model,
+                          options['inline_failures'], options['only'], options['table_layout'],
+                          options['render_workers'], options['fragment_cache'])
+        elif report_format == 'xlsx':
+            from xmlToxlsx import generate_xlsx
+            generate_xlsx([report_file], output_file, options['history'], options['flaky_runs'], options['baseline'],
+                          options['overhead_threshold'], {report_file: model})
+        elif report_format == 'json':
+            write_json_report(model, output_file)
+        elif report_format == 'csv':
+            write_csv_report(model, output_file)
+    except Exception as e:
+        return report_format, time.monotonic() - start_time, '{}: {}'.format(type(e).__name__, e)
+    # A failing format does not stop the others; the error is reported with the timings.
+
+    return report_format, time.monotonic() - start_time, None
+
+
+def create_pool(workers):
+    # Create the pool for the report writers.
+    # Where fork is available, worker processes inherit the parsed report and render truly in parallel;
+    # elsewhere (Windows) threads are used, which still overlap the file output.
+
+    if 'fork' in multiprocessing.get_all_start_methods():
+        return concurrent.futures.ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('fork'))
+    return concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+
+
+def main():
+    # Command-line entry point: run the tests once, parse the report once and write all formats concurrently.
+
+    parser = argparse.ArgumentParser(description='Run the tests once and generate all report formats concurrently', allow_abbrev=False)
+    parser.add_argument('--binary', type=str, default='build/Report_Program', metavar="build/Report_Program", help="Location of the gtest binary")
+    parser.add_argument('--xml', type=str, default='report/ReportTest.xml', metavar="report/ReportTest.xml", help="Location of the XML report")
+    parser.add_argument('--no-run', action='store_true', help="Do not run the tests, generate the reports from the existing XML report")
+    parser.add_argument('--html', type=str, metavar="report/ReportTest.html", help="Location of the HTML report")
+    parser.add_argument('--xlsx', type=str, metavar="report/ReportTest.xlsx", help="Location of the XLSX report")
+    parser.add_argument('--json', type=str, metavar="report/ReportTest.json", help="Location of the JSON report")
+    parser.add_argument('--csv', type=str, metavar="report/ReportTest.csv", help="Location of the CSV report")
+    parser.add_argument('--workers', '-j', type=int, default=os.cpu_count() or 1, help="Number of parallel test shards (default: number of cores)")
+    parser.add_argument('--test-timeout', type=float, help="Per-test timeout of the watchdog in seconds")
+    parser.add_argument('--run-timeout', type=float, help="Whole-run timeout of the watchdog in seconds")
+    parser.add_argument('--resource-usage', action='store_true', help="Run every test in its own process and record its CPU time and peak RSS")
+    parser.add_argument('--cache-dir', type=str, default=DEFAULT_CACHE_DIRECTORY, metavar=DEFAULT_CACHE_DIRECTORY, help="Location of the result cache")
+    parser.add_argument('--force', action='store_true', help="Run the tests even if the result cache holds a report of the same binary")
+    parser.add_argument('--history', type=str, metavar=DEFAULT_HISTORY_DB, help="Ingest the run into this run-history database (trend section and flakiness)")
+    parser.add_argument('--keep-runs', type=int, help="Keep only the newest N runs in the run-history database")
+    parser.add_argument('--trend-runs', type=int, default=10, help="Number of recent runs in the trend section")
+    parser.add_argument('--flaky-runs', type=int, default=20, help="Number of recent runs analysed for flaky testcases")
+    parser.add_argument('--baseline', type=str, metavar="baseline/ReportTest.xml", help="Baseline XML/JSON report to compare against")
+    parser.add_argument('--top-k', type=int, default=10, help="Number of slowest testcases and testsuites in the performance panel")
+    parser.add_argument('--overhead-threshold', type=float, default=DEFAULT_OVERHEAD_THRESHOLD, help="Highlight testsuites whose fixture overhead exceeds this share of their wall time")
+    parser.add_argument('--inline-failures', action='store_true', help="Write all failure messages into the HTML page instead of the failure details files")
+    parser.add_argument('--table-layout', choices=['stacktable', 'css'], default='stacktable', help="Small screen layout of the HTML testcase tables: stacktable (a copy of every table) or css (no copy)")
+    parser.add_argument('--render-workers', type=int, default=1, help="Number of processes rendering the HTML testsuites")
+    parser.add_argument('--fragment-cache', type=str, metavar=DEFAULT_FRAGMENT_CACHE_DIRECTORY, help="Reuse the HTML of unchanged testsuites cached in this directory")
+    parser.add_argument('--only', choices=['failing', 'summary'], help="Render HTML rows only for failed and not run testcases (failing) or for no testcase (summary)")
+    args = parser.parse_args()
+    # Parse command-line arguments provided by the user.
+
+    timings = []
+    pipeline_start = time.monotonic()
+
+    # Phase 1: run the tests (or reuse the cached report).
+    if not args.no_run:
+        if not os.path.isfile(args.binary):
+            print(f"ERROR: The test binary {args.binary} does not exist.")
+            return 1
+        output_directory = os.path.dirname(args.xml)
+        if output_directory and not os.path.isdir(output_directory):
+            os.makedirs(output_directory)
+        phase_start = time.monotonic()
+        run_tests(args.binary, args.xml, args.workers, None, False, args.test_timeout, args.run_timeout,
+                  args.cache_dir, args.force, args.resource_usage)
+        timings.append(('run tests', time.monotonic() - phase_start))
+
+    if not os.path.isfile(args.xml):
+        print(f"ERROR: The report file {args.xml} does not exist.")
+        return 1
+
+    # Phase 2: parse the XML report once into the report model.
+    phase_start = time.monotonic()
+    report_file = os.path.realpath(args.xml)
+    try:
+        PIPELINE_MODEL['model'] = build_model(report_file)
+    except ValueError as e:
+        print(f"ERROR: {e}")
+        return 1
+    timings.append(('parse', time.monotonic() - phase_start))
+
+    # Phase 3: add the run to the history, which the trend section and the flakiness analysis read.
+    # The testcases are taken from the model of phase 2, so the report is not parsed again.
+    if args.history:
+        phase_start = time.monotonic()
+        history_directory = os.path.dirname(args.history)
+        if history_directory and not os.path.isdir(history_directory):
+            os.makedirs(history_directory)
+        conn = open_history(args.history)
+        build_id = hash_file(args.binary) if os.path.isfile(args.binary) else ''
+        ingest_report(conn, report_file, build_id, PIPELINE_MODEL['model'])
+        compact_history(conn, args.keep_runs, None)
+        conn.close()
+        timings.append(('history', time.monotonic() - phase_start))
+
+    # Phase 4: write all requested formats concurrently.
+    options = {
+        'history': args.history,
+        'trend_runs': args.trend_runs,
+        'flaky_runs': args.flaky_runs,
+        'baseline': args.baseline,
+        'top_k': args.top_k,
+        'overhead_threshold': args.overhead_threshold,
+        'inline_failures': args.inline_failures,
+        'only': args.only,
+        'table_layout': args.table_layout,
+        'render_workers': args.render_workers,
+        'fragment_cache': args.fragment_cache,
+    }
+    outputs = [(report_format, getattr(args, report_format)) for report_format in REPORT_FORMATS
+               if getattr(args, report_format)]
+    failed_formats = []
+    if outputs:
+        phase_start = time.monotonic()
+        with create_pool(len(outputs)) as pool:
+            futures = [pool.submit(write_report, report_format, output_file, options)
+                       for report_format, output_file in outputs]
+            for future in futures:
+                report_format, seconds, error = future.result()
+                timings.append(('write ' + report_format, seconds))
+                if error is not None:
+                    failed_formats.append(report_format)
+                    print(f"Error writing the {report_format} report: {error}")
+        timings.append(('write all (concurrent)', time.monotonic() - phase_start))
+
+    timings.append(('total', time.monotonic() - pipeline_start))
+    print('Phase timings:')
+    for phase, seconds in timings:
+        print('  {:<24}: {:8.3f} sec'.format(phase, seconds))
+    for report_format, output_file in outputs:
+        if report_format not in failed_formats:
+            print(f"  {report_format:<24}: {output_file}")
+
+    return 1 if failed_formats else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
+    # Entry point of the script. Execute the main() function when the script is run.
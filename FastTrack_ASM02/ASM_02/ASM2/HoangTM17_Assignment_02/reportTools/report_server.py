@@ -0,0 +1,452 @@
+#!/usr/bin/env python3
+# Shebang to specify the interpreter for running the script
+
+import os
+import sys
+import gzip
+import html
+import time
+import fnmatch
+import asyncio
+import hashlib
+import argparse
+import tempfile
+import mimetypes
+import collections
+import urllib.parse
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'convertXMLtoHTML'))
+from templates.html_templates import tmpl_report_index_html, tmpl_report_index_row
+from report_model import build_model
+# Importing required libraries:
+# - os, sys: for file handling, exit codes and the import path of the HTML converter.
+# - gzip: for compressing the responses.
+# - html: for escaping the file names of the report index.
+# - time: for the modification times of the report index and the render time.
+# - fnmatch: for the file name pattern of the reports.
+# - asyncio: for serving many connections while a report is rendered in a thread.
+# - hashlib: for the ETags of the responses.
+# - argparse: for parsing command-line arguments.
+# - tempfile: for the temporary directory a report is rendered into.
+# - mimetypes: for the content type of the rendered files and the report resources.
+# - collections: for the least recently used order of the render cache.
+# - urllib.parse: for decoding the request paths and encoding the links of the report index.
+# - html_templates: the report index page.
+# - report_model: the report model of XML and JSON reports.
+# The HTML converter (xmlTohtml) is imported in render_report(), like in render_benchmark.py.
+
+# Directory of the resources of the HTML report (CSS, JS, fonts), served once for all reports.
+HTML_RESOURCES_DIRECTORY = os.path.realpath(os.path.join(
+    os.path.dirname(os.path.realpath(__file__)), '..', 'convertXMLtoHTML', 'html_resources'))
+
+# URL of HTML_RESOURCES_DIRECTORY; the rendered pages load their resources from here instead of a copy next to them.
+RESOURCE_PREFIX = '/_resources/'
+
+# Default address of the server.
+DEFAULT_SERVER_HOST = '127.0.0.1'
+DEFAULT_SERVER_PORT = 8080
+
+# Report files found for the index: gtest XML and JSON reports whose name matches the pattern.
+DEFAULT_REPORT_PATTERN = 'ReportTest*'
+REPORT_EXTENSIONS = ['.xml', '.json']
+
+# Reports listed on one index page.
+MAX_INDEX_REPORTS = 1000
+
+# Default size of the render cache in MiB (rendered pages, failure details, search indexes and resources,
+# plain and compressed).
+DEFAULT_CACHE_SIZE = 256
+
+# Responses smaller than this (bytes) or of other content types are not compressed.
+GZIP_MIN_SIZE = 1024
+GZIP_CONTENT_TYPES = ['text/html', 'text/css', 'text/plain', 'application/javascript', 'text/javascript',
+                      'image/svg+xml', 'application/json']
+
+# Seconds an idle connection is kept open for the next request of the page.
+KEEP_ALIVE_TIMEOUT = 15
+
+# Longest request line or header line, in bytes.
+MAX_REQUEST_LINE = 64 * 1024
+
+
+def create_render_cache(max_size):
+    # Create the LRU cache of the rendered reports and the report resources.
+    # - entries: {(file path, modification time in ns): entry}, least recently used first. An entry is a dict
+    #   {'files': {relative URL: response}, 'size': bytes}; a resource is an entry with the single file ''.
+    # - paths: the current key of every cached file path, so the entry of a changed file is dropped at once.
+    # - size, max_size: bytes held by the entries and the limit of the cache.
+    # - pending: the renderings in progress by key, awaited by all requests of the same report.
+    # The key contains the modification time, so a report written again is rendered again; an unchanged
+    # report is rendered once, however often it is requested.
+
+    return {
+        'entries': collections.OrderedDict(),
+        'paths': {},
+        'size': 0,
+        'max_size': max_size,
+        'pending': {},
+    }
+
+
+def cache_lookup(cache, key):
+    # Return the entry of `key` and mark it as most recently used, None if it is not cached.
+
+    entry = cache['entries'].get(key)
+    if entry is not None:
+        cache['entries'].move_to_end(key)
+    return entry
+
+
+def cache_remove(cache, key):
+    # Remove the entry of `key` from the cache.
+
+    entry = cache['entries'].pop(key, None)
+    if entry is not None:
+        cache['size'] -= entry['size']
+        if cache['paths'].get(key[0]) == key:
+            del cache['paths'][key[0]]
+
+
+def cache_store(cache, key, entry):
+    # Add an entry and remove the least recently used ones until the cache fits into its size.
+    # The entry just added is kept even if it is larger than the whole cache.
+
+    previous_key = cache['paths'].get(key[0])
+    if previous_key is not None:
+        cache_remove(cache, previous_key)
+    # The entry of the previous version of the file is never used again.
+
+    cache['entries'][key] = entry
+    cache['paths'][key[0]] = key
+    cache['size'] += entry['size']
+    while cache['size'] > cache['max_size'] and len(cache['entries']) > 1:
+        cache_remove(cache, next(iter(cache['entries'])))
+
+
+def make_response(body, content_type):
+    # Prepare a cached response: the body, its gzip compressed form (None if not worth it) and its ETag.
+
+    compressed = None
+    if len(body) >= GZIP_MIN_SIZE and content_type.split(';')[0] in GZIP_CONTENT_TYPES:
+        compressed = gzip.compress(body, 6, mtime=0)
+        if len(compressed) >= len(body):
+            compressed = None
+    # mtime=0 keeps the compressed form of the same body identical.
+
+    return {
+        'body': body,
+        'gzip': compressed,
+        'etag': '"{}"'.format(hashlib.sha256(body).hexdigest()[:32]),
+        'content_type': content_type,
+    }
+
+
+def make_entry(files):
+    # Build a cache entry from a dict {relative URL: response}.
+
+    return {
+        'files': files,
+        'size': sum(len(response['body']) + len(response['gzip'] or b'') for response in files.values()),
+    }
+
+
+def content_type_of(file_name):
+    # Content type of a served file.
+
+    content_type = mimetypes.guess_type(file_name)[0] or 'application/octet-stream'
+    if content_type.startswith('text/') or content_type == 'application/javascript':
+        content_type += '; charset=utf-8'
+    return content_type
+
+
+def report_page_name(report_file):
+    # File name of the rendered page of a report, e.g. 'ReportTest.xml' -> 'ReportTest.html'.
+    # The failure details and the search index are named after it ('ReportTest_failures/', 'ReportTest_search.js').
+
+    return os.path.splitext(os.path.basename(report_file))[0] + '.html'
+
+
+def render_report(report_file):
+    # Render a report with the HTML converter into a temporary directory and return the rendered files as
+    # cache entry. The URLs of the files are relative to the report ('' is the page itself).
+    # Runs in a worker thread; raises ValueError for a file that is no gtest report.
+
+    from xmlTohtml import generate_html
+
+    model = build_model(report_file)
+    # Built here, so an invalid report raises ValueError instead of exiting the converter.
+
+    with tempfile.TemporaryDirectory(prefix='report_server_') as render_directory:
+        page_name = report_page_name(report_file)
+        generate_html(report_file, os.path.join(render_directory, page_name), model=model, resource_prefix=RESOURCE_PREFIX)
+
+        files = {}
+        for directory, _, file_names in os.walk(render_directory):
+            for file_name in file_names:
+                rendered_file = os.path.join(directory, file_name)
+                url = os.path.relpath(rendered_file, render_directory).replace(os.sep, '/')
+                with open(rendered_file, 'rb') as fin:
+                    files['' if url == page_name else url] = make_response(fin.read(), content_type_of(file_name))
+    return make_entry(files)
+
+
+async def rendered_report(cache, report_file, key):
+    # Return the cache entry of a report, rendering it in a thread if it is not cached.
+    # Concurrent requests of the same report wait for one rendering.
+
+    entry = cache_lookup(cache, key)
+    if entry is not None:
+        return entry
+
+    rendering = cache['pending'].get(key)
+    if rendering is None:
+        start_time = time.monotonic()
+        rendering = cache['pending'][key] = asyncio.ensure_future(asyncio.to_thread(render_report, report_file))
+        try:
+            entry = await asyncio.shield(rendering)
+        finally:
+            del cache['pending'][key]
+        cache_store(cache, key, entry)
+        print('Rendered {} in {:.2f} sec ({} file(s), {:.0f} KiB); cache: {} entries, {:.1f} of {:.0f} MiB'.format(
+            report_file, time.monotonic() - start_time, len(entry['files']), entry['size'] / 1024,
+            len(cache['entries']), cache['size'] / 1024 ** 2, cache['max_size'] / 1024 ** 2))
+        return entry
+    return await asyncio.shield(rendering)
+    # shield(): a cancelled request does not cancel the rendering the others wait for.
+
+
+def cached_resource(cache, resource_file):
+    # Return the response of a file below html_resources from the cache, reading it on the first request.
+
+    key = (resource_file, os.stat(resource_file).st_mtime_ns)
+    entry = cache_lookup(cache, key)
+    if entry is None:
+        with open(resource_file, 'rb') as fin:
+            entry = make_entry({'': make_response(fin.read(), content_type_of(resource_file))})
+        cache_store(cache, key, entry)
+    return entry['files']['']
+
+
+def find_reports(directory, pattern):
+    # Report files below `directory` whose name matches `pattern`, as sorted list of (relative path, os.stat).
+    # Hidden directories (e.g. .git) are skipped. At most MAX_INDEX_REPORTS + 1 reports are returned.
+
+    reports = []
+    for parent, directory_names, file_names in os.walk(directory):
+        directory_names[:] = sorted(name for name in directory_names if not name.startswith('.'))
+        for file_name in sorted(file_names):
+            if os.path.splitext(file_name)[1].lower() in REPORT_EXTENSIONS and fnmatch.fnmatch(file_name, pattern):
+                report_file = os.path.join(parent, file_name)
+                reports.append((os.path.relpath(report_file, directory), os.stat(report_file)))
+                if len(reports) > MAX_INDEX_REPORTS:
+                    return reports
+    return reports
+
+
+def generate_report_index(directory, directory_name, pattern):
+    # Generate the index page of the reports below `directory` (`directory_name` relative to the root).
+
+    reports = find_reports(directory, pattern)
+    report_rows = ''.join(tmpl_report_index_row.format(
+        report_url=urllib.parse.quote(report_path.replace(os.sep, '/')) + '/',
+        report_path=html.escape(report_path),
+        modified=time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(report_stat.st_mtime)),
+        size='{:.1f}'.format(report_stat.st_size / 1024),
+    ) for report_path, report_stat in reports[:MAX_INDEX_REPORTS])
+    return tmpl_report_index_html.format(
+        directory_name=html.escape(directory_name),
+        report_count=len(reports) if len(reports) <= MAX_INDEX_REPORTS else 'More than {}'.format(MAX_INDEX_REPORTS),
+        report_rows=report_rows,
+        resource_prefix=RESOURCE_PREFIX,
+    )
+
+
+def accepts_gzip(accept_encoding):
+    # Whether the Accept-Encoding header allows a gzip response ('gzip;q=0' does not).
+
+    for coding in accept_encoding.split(','):
+        name, _, parameters = coding.strip().partition(';')
+        if name.strip().lower() in ['gzip', '*']:
+            return parameters.replace(' ', '') not in ['q=0', 'q=0.0', 'q=0.00', 'q=0.000']
+    return False
+
+
+def write_response(writer, status, headers, body, send_body=True):
+    # Write an HTTP response; the connection stays open for the next request.
+
+    header_lines = ''.join('{}: {}\r\n'.format(name, value) for name, value in headers)
+    writer.write('HTTP/1.1 {}\r\nContent-Length: {}\r\n{}\r\n'.format(status, len(body), header_lines).encode('latin-1'))
+    if send_body:
+        writer.write(body)
+
+
+def write_cached_response(writer, response, request_headers, send_body=True):
+    # Write a cached response: 304 if the browser has it already (If-None-Match), otherwise the body,
+    # gzip compressed if the browser accepts it.
+    # Cache-Control: no-cache lets the browser keep the response but ask again, so a changed report is shown.
+
+    body, etag, encoding_headers = response['body'], response['etag'], []
+    if response['gzip'] is not None and accepts_gzip(request_headers.get('accept-encoding', '')):
+        body, etag, encoding_headers = response['gzip'], response['etag'][:-1] + '-gzip"', [('Content-Encoding', 'gzip')]
+    # The compressed form is another representation and gets its own ETag.
+
+    headers = [('ETag', etag), ('Cache-Control', 'no-cache'), ('Vary', 'Accept-Encoding')]
+    if etag in [tag.strip() for tag in request_headers.get('if-none-match', '').split(',')]:
+        write_response(writer, '304 Not Modified', headers, b'', send_body)
+        return
+    write_response(writer, '200 OK', [('Content-Type', response['content_type'])] + encoding_headers + headers, body, send_body)
+
+
+def write_text_response(writer, status, text, send_body=True):
+    # Write a short plain text response, e.g. an error.
+
+    write_response(writer, status, [('Content-Type', 'text/plain; charset=utf-8')], (text + '\n').encode('utf-8'), send_body)
+
+
+def resolve_path(root, url_path):
+    # Map the path of a request to a file below `root`.
+    # Returns a tuple (file path, rest of the URL): the rest is the file inside a rendered report, e.g.
+    # '/nightly/ReportTest.xml/ReportTest_search.js' -> ('<root>/nightly/ReportTest.xml', 'ReportTest_search.js').
+    # Returns (None, None) for paths outside of `root` or that do not exist.
+
+    parts = [part for part in urllib.parse.unquote(url_path).split('/') if part]
+    path = root
+    for index, part in enumerate(parts):
+        path = os.path.realpath(os.path.join(path, part))
+        if path != root and not path.startswith(root + os.sep):
+            return None, None
+        # Neither '..' nor symbolic links lead outside of the root.
+        if os.path.isfile(path):
+            return path, '/'.join(parts[index + 1:])
+        if not os.path.isdir(path):
+            return None, None
+    return path, ''
+
+
+async def serve_request(options, cache, method, url_path, request_headers, writer):
+    # Answer one request:
+    # - RESOURCE_PREFIX...: a file of html_resources.
+    # - a directory (ending with '/'): the index of the reports below it.
+    # - <report file>/ and the files below it: the rendered report, its failure details and search index.
+
+    send_body = method != 'HEAD'
+    if url_path.startswith(RESOURCE_PREFIX):
+        resource_file = os.path.realpath(os.path.join(HTML_RESOURCES_DIRECTORY, urllib.parse.unquote(url_path[len(RESOURCE_PREFIX):])))
+        if not resource_file.startswith(HTML_RESOURCES_DIRECTORY + os.sep) or not os.path.isfile(resource_file):
+            write_text_response(writer, '404 Not Found', 'Not found.', send_body)
+            return
+        write_cached_response(writer, cached_resource(cache, resource_file), request_headers, send_body)
+        return
+
+    path, rest = resolve_path(options['root'], url_path)
+    if path is None:
+        write_text_response(writer, '404 Not Found', 'Not found.', send_body)
+        return
+    if (os.path.isdir(path) or rest == '') and not url_path.endswith('/'):
+        write_response(writer, '301 Moved Permanently', [('Location', url_path + '/')], b'', send_body)
+        return
+    # A report is served like a directory, so the page finds its failure details and search index by relative URLs.
+
+    if os.path.isdir(path):
+        directory_name = '/' if path == options['root'] else '/' + os.path.relpath(path, options['root']).replace(os.sep, '/')
+        page = generate_report_index(path, directory_name, options['pattern'])
+        write_cached_response(writer, make_response(page.encode('utf-8'), 'text/html; charset=utf-8'), request_headers, send_body)
+        return
+
+    if os.path.splitext(path)[1].lower() not in REPORT_EXTENSIONS:
+        write_text_response(writer, '404 Not Found', 'Not a report.', send_body)
+        return
+    try:
+        entry = await rendered_report(cache, path, (path, os.stat(path).st_mtime_ns))
+    except (ValueError, OSError) as e:
+        write_text_response(writer, '500 Internal Server Error', 'The report could not be rendered: {}'.format(e), send_body)
+        return
+    # An invalid or unreadable report is shown as error; the next request tries again.
+
+    response = entry['files'].get(rest)
+    if response is None:
+        write_text_response(writer, '404 Not Found', 'Not found.', send_body)
+        return
+    write_cached_response(writer, response, request_headers, send_body)
+
+
+async def handle_connection(options, cache, reader, writer):
+    # Answer the requests of one connection until the browser closes it or it is idle for KEEP_ALIVE_TIMEOUT.
+
+    try:
+        while True:
+            try:
+                request_line = await asyncio.wait_for(reader.readline(), KEEP_ALIVE_TIMEOUT)
+            except asyncio.TimeoutError:
+                break
+            if not request_line:
+                break
+            request_headers = {}
+            while True:
+                header_line = (await reader.readline()).decode('latin-1')
+                if header_line in ['\r\n', '\n', '']:
+                    break
+                name, _, value = header_line.partition(':')
+                request_headers[name.strip().lower()] = value.strip()
+            # Only If-None-Match, Accept-Encoding and Connection are used; requests have no body.
+
+            request = request_line.decode('latin-1').split()
+            if len(request) < 3 or request[0] not in ['GET', 'HEAD']:
+                write_text_response(writer, '405 Method Not Allowed', 'Only GET and HEAD are supported.')
+                await writer.drain()
+                break
+            await serve_request(options, cache, request[0], request[1].split('?')[0], request_headers, writer)
+            await writer.drain()
+            if request_headers.get('connection', '').lower() == 'close' or request[2] == 'HTTP/1.0':
+                break
+    except (ConnectionError, ValueError, asyncio.IncompleteReadError):
+        pass
+    # A browser closing its connection (or sending a line over MAX_REQUEST_LINE) is not an error of the server.
+    finally:
+        writer.close()
+
+
+async def serve_reports(options):
+    # Serve the reports below options['root'] at http://host:port/ until the script is interrupted.
+
+    cache = create_render_cache(options['cache_size'] * 1024 ** 2)
+    server = await asyncio.start_server(
+        lambda reader, writer: handle_connection(options, cache, reader, writer),
+        options['host'], options['port'], limit=MAX_REQUEST_LINE)
+    print(f"Serving the reports in {options['root']} at http://{options['host']}:{options['port']}/ (press Ctrl+C to stop)")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    # Command-line entry point: serve the XML and JSON reports of a directory tree as HTML rendered on demand.
+
+    parser = argparse.ArgumentParser(description='Serve gtest XML/JSON reports as HTML reports rendered on demand', allow_abbrev=False)
+    parser.add_argument('--root', type=str, default='.', help="Directory with the reports (searched recursively)")
+    parser.add_argument('--pattern', type=str, default=DEFAULT_REPORT_PATTERN, help="File name pattern of the reports listed in the index")
+    parser.add_argument('--host', type=str, default=DEFAULT_SERVER_HOST, help="Address of the server")
+    parser.add_argument('--port', type=int, default=DEFAULT_SERVER_PORT, help="Port of the server")
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_CACHE_SIZE, help="Size of the render cache in MiB")
+    args = parser.parse_args()
+    # Parse command-line arguments provided by the user.
+
+    if not os.path.isdir(args.root):
+        print(f"ERROR: The report directory {args.root} does not exist.")
+        return 1
+
+    options = {
+        'root': os.path.realpath(args.root),
+        'pattern': args.pattern,
+        'host': args.host,
+        'port': args.port,
+        'cache_size': args.cache_size,
+    }
+    try:
+        asyncio.run(serve_reports(options))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
+    # Entry point of the script. Execute the main() function when the script is run.
@@ -0,0 +1,147 @@
+try:
+    import numpy as np
+except ImportError:
+    np = None
+from report_model import STATUSES, STATUS_CODES
+from gtest_report import STATUS_FAILED, STATUS_NOTRUN
+# Importing required libraries:
+# - numpy (optional): for computing the statistics of all testsuites at once. Without numpy the
+#   converters fall back to their per-row computations.
+# - report_model, gtest_report: the report model and its status codes.
+
+# Upper bounds (seconds) of the duration histogram buckets; the last bucket is open-ended.
+HISTOGRAM_BUCKET_EDGES = [0.001, 0.01, 0.1, 1.0, 10.0]
+
+# Percentiles of the testcase durations computed per testsuite.
+PERCENTILES = [50, 90, 99]
+
+
+def is_available():
+    # The vectorized statistics need numpy.
+
+    return np is not None
+
+
+def model_columns(model):
+    # Return numpy views of the testcase columns of the report model, without copying them:
+    # - time: float64 durations, status: int8 status codes, suite: suite id of every testcase.
+    # - first_case: offsets of the testsuites (the testcases of suite s are first_case[s] .. first_case[s + 1] - 1).
+
+    return {
+        'time': np.frombuffer(model['case_time'], dtype=np.float64),
+        'status': np.frombuffer(model['case_status'], dtype=np.int8),
+        'suite': np.frombuffer(model['case_suite'], dtype=np.intc),
+        'first_case': np.frombuffer(model['suite_first_case'], dtype=np.intc),
+    }
+
+
+def round_rows_to_100(percents):
+    # Round every row of a 2D array of percentages (each row sums to 100) to integers that sum to 100.
+    # Same rule as round_to_100() of the HTML converter, applied to all rows at once: every value is rounded
+    # down and the missing units go to the values whose error (squared rounding error, scaled by
+    # 1 / sqrt(max(value, 1))) grows least when rounded up.
+
+    rounded = np.trunc(percents)
+    up_count = np.rint(100 - rounded.sum(axis=1)).astype(np.int64)
+    divisor = np.sqrt(np.maximum(percents, 1.0))
+    errors = np.abs(rounded + 1 - percents) ** 2 / divisor - np.abs(rounded - percents) ** 2 / divisor
+    rank = np.argsort(np.argsort(errors, axis=1, kind='stable'), axis=1, kind='stable')
+    # Position of every value in its row when sorted by the error growth (ties keep the column order).
+    return (rounded + (rank < up_count[:, None])).astype(np.int64)
+
+
+def progress_percentages(totals):
+    # Rounded (success, failure, disabled) percentages for the progress bars.
+    # - totals: array with one row (tests, failures, disabled) per progress bar.
+    # Rows without tests are returned as (100, 0, 0).
+
+    totals = np.asarray(totals, dtype=np.float64).reshape(-1, 3)
+    tests = totals[:, 0]
+    parts = np.stack([tests - totals[:, 1] - totals[:, 2], totals[:, 1], totals[:, 2]], axis=1)
+    safe_tests = np.where(tests > 0, tests, 1.0)
+    percents = 100.0 * parts / safe_tests[:, None]
+    percents[tests <= 0] = [100.0, 0.0, 0.0]
+    return round_rows_to_100(percents)
+
+
+def compute_suite_stats(model):
+    # Compute the statistics of every testsuite of the report model in vectorized batches.
+    # Returns a dict of arrays indexed by suite id:
+    # - names: the testsuite names of the model.
+    # - counts: testcases per suite and status code (suites x len(STATUSES)).
+    # - tests: testcases per suite; duration: sum of the testcase times per suite.
+    # - percentiles: nearest-rank percentiles of the testcase times (suites x len(PERCENTILES)), NaN for empty suites.
+    # - histograms: testcases per duration bucket (suites x (len(HISTOGRAM_BUCKET_EDGES) + 1)).
+    # - percentages: rounded progress bar percentages from the suite attributes (suites x 3).
+    # - run_percentages: rounded progress bar percentages of the whole run (from the header).
+
+    columns = model_columns(model)
+    suite_count = len(model['suite_name'])
+    first_case = columns['first_case'][:suite_count]
+    tests = np.diff(columns['first_case']).astype(np.int64)
+
+    counts = np.bincount(columns['suite'].astype(np.int64) * len(STATUSES) + columns['status'],
+                         minlength=suite_count * len(STATUSES)).reshape(suite_count, len(STATUSES))
+    duration = np.bincount(columns['suite'], weights=columns['time'], minlength=suite_count)
+
+    order = np.lexsort((columns['time'], columns['suite']))
+    sorted_time = columns['time'][order]
+    # Testcase times sorted by suite, then by time: the times of suite s start at first_case[s].
+    percentiles = np.full((suite_count, len(PERCENTILES)), np.nan)
+    non_empty = tests > 0
+    for idx, percent in enumerate(PERCENTILES):
+        rank = np.maximum(np.ceil(percent / 100.0 * tests), 1).astype(np.int64)
+        percentiles[non_empty, idx] = sorted_time[(first_case + rank - 1)[non_empty]]
+    # One gather per percentile for all suites.
+
+    bucket = np.searchsorted(HISTOGRAM_BUCKET_EDGES, columns['time'], side='right')
+    bucket_count = len(HISTOGRAM_BUCKET_EDGES) + 1
+    histograms = np.bincount(columns['suite'].astype(np.int64) * bucket_count + bucket,
+                             minlength=suite_count * bucket_count).reshape(suite_count, bucket_count)
+
+    suite_totals = np.stack([np.frombuffer(model['suite_tests'], dtype=np.intc),
+                             np.frombuffer(model['suite_failures'], dtype=np.intc),
+                             np.frombuffer(model['suite_disabled'], dtype=np.intc)], axis=1)
+    header = model['header']
+    all_percentages = progress_percentages(np.vstack([
+        suite_totals, [[header['tests'], header['failures'], header['disabled']]]]))
+    # The run percentages are rounded in the same batch as the suites.
+
+    return {
+        'names': model['suite_name'],
+        'counts': counts,
+        'tests': tests,
+        'duration': duration,
+        'percentiles': percentiles,
+        'histograms': histograms,
+        'percentages': all_percentages[:suite_count],
+        'run_percentages': all_percentages[suite_count],
+    }
+
+
+def check_suite_stats(model, stats):
+    # Compare the computed counts with the 'tests', 'failures' and 'disabled' attributes of the report.
+    # gtest counts a testcase with failures as failure and a not run testcase as disabled.
+    # Returns a list of messages, one per mismatch.
+
+    failed = stats['counts'][:, STATUS_CODES[STATUS_FAILED]]
+    notrun = stats['counts'][:, STATUS_CODES[STATUS_NOTRUN]]
+    checks = [
+        ('tests', np.frombuffer(model['suite_tests'], dtype=np.intc), stats['tests']),
+        ('failures', np.frombuffer(model['suite_failures'], dtype=np.intc), failed),
+        ('disabled', np.frombuffer(model['suite_disabled'], dtype=np.intc), notrun),
+    ]
+
+    messages = []
+    for attribute_name, reported, computed in checks:
+        for suite_id in np.flatnonzero(reported != computed):
+            messages.append('Testsuite {!r}: attribute {!r} is {} but {} testcases were found.'.format(
+                model['suite_name'][suite_id], attribute_name, reported[suite_id], computed[suite_id]))
+
+    header = model['header']
+    for attribute_name, computed in [('tests', stats['tests'].sum()), ('failures', failed.sum()), ('disabled', notrun.sum())]:
+        if header[attribute_name] != computed:
+            messages.append('Run: attribute {!r} is {} but {} testcases were found.'.format(
+                attribute_name, header[attribute_name], computed))
+
+    return messages
@@ -0,0 +1,136 @@
+import os
+import sys
+import signal
+import threading
+import subprocess
+import concurrent.futures
+import xml.etree.ElementTree as ET
+from shard_planner import gtest_filter
+from watchdog import write_console_report, is_disabled_test, TIMEOUT_FAILURE_TYPE
+# Importing required libraries:
+# - os, sys: for os.wait4 (resource usage of a finished child process) and the platform.
+# - signal: for recognizing the kill of a timed out test.
+# - threading: for killing a test process after its timeout.
+# - subprocess: for launching the gtest binary.
+# - concurrent.futures: for measuring several tests in parallel.
+# - xml.etree.ElementTree (ET): for attaching the measurements to the testcase XML.
+# - shard_planner, watchdog: --gtest_filter building and reports of killed tests.
+
+# Properties attached to every measured testcase: (property name, column title).
+RESOURCE_PROPERTIES = [
+    ('cpu_user_time', 'CPU user (sec)'),
+    ('cpu_system_time', 'CPU sys (sec)'),
+    ('peak_rss_kb', 'Peak RSS (KiB)'),
+]
+
+
+def is_supported():
+    # Per-process resource usage needs os.wait4 (Linux, macOS, BSD; not Windows).
+
+    return hasattr(os, 'wait4')
+
+
+def rusage_to_properties(rusage):
+    # Convert the rusage of a finished test process into the testcase properties.
+    # ru_maxrss is reported in KiB on Linux and in bytes on macOS.
+
+    peak_rss_kb = rusage.ru_maxrss // 1024 if sys.platform == 'darwin' else rusage.ru_maxrss
+    return {
+        'cpu_user_time': '{:.3f}'.format(rusage.ru_utime),
+        'cpu_system_time': '{:.3f}'.format(rusage.ru_stime),
+        'peak_rss_kb': str(peak_rss_kb),
+    }
+
+
+def add_testcase_properties(xml_file, properties):
+    # Attach `properties` to the testcases of a (single test) XML report as <property> children of
+    # <properties>, the layout gtest uses for RecordProperty values.
+
+    xml_tree = ET.parse(xml_file)
+    for xml_testcase_node in xml_tree.getroot().iter('testcase'):
+        if xml_testcase_node.attrib.get('status') == 'notrun':
+            continue
+        xml_properties_node = xml_testcase_node.find('./properties')
+        if xml_properties_node is None:
+            xml_properties_node = ET.SubElement(xml_testcase_node, 'properties')
+        for name, value in properties.items():
+            ET.SubElement(xml_properties_node, 'property', {'name': name, 'value': value})
+    ET.indent(xml_tree, space='  ')
+    xml_tree.write(xml_file, encoding='utf-8', xml_declaration=True)
+
+
+def run_measured_test(binary, test, xml_file, log_file, test_timeout=None):
+    # Run a single test in its own process and read its CPU time and peak RSS with os.wait4.
+    # The process is killed after `test_timeout` seconds.
+    # Returns a tuple (properties, timed_out).
+
+    with open(log_file, 'w') as fout:
+        process = subprocess.Popen([binary, '--gtest_filter=' + test, '--gtest_output=xml:' + xml_file],
+                                   stdout=fout, stderr=subprocess.STDOUT)
+        killed = threading.Event()
+
+        def kill():
+            killed.set()
+            process.kill()
+
+        killer = threading.Timer(test_timeout, kill) if test_timeout else None
+        if killer is not None:
+            killer.start()
+        pid, status, rusage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status)
+        # The process was reaped by wait4, so Popen must not wait for it again.
+        if killer is not None:
+            killer.cancel()
+
+    timed_out = killed.is_set() and process.returncode == -signal.SIGKILL
+    # Only the kill of the timer is a timeout; a test crashing by a signal (e.g. SIGSEGV, SIGABRT) is not.
+    return rusage_to_properties(rusage), timed_out
+
+
+def run_measured(binary, tests, directory, workers, test_timeout=None):
+    # Run every test in its own process, `workers` at a time, and attach its resource usage as properties.
+    # The process startup of the binary (and the fixture setup of its testsuite) is part of every measurement.
+    # Disabled tests are not measured; they are reported by one extra process.
+    # Returns the list of XML reports (one per test).
+
+    measured_tests = [test for test in tests if not is_disabled_test(test)]
+    disabled_tests = [test for test in tests if is_disabled_test(test)]
+    xml_files = [None] * len(measured_tests)
+    killed = []
+
+    def measure(idx):
+        xml_file = os.path.join(directory, 'test_{}.xml'.format(idx))
+        properties, timed_out = run_measured_test(binary, measured_tests[idx], xml_file,
+                                                  os.path.join(directory, 'test_{}.log'.format(idx)), test_timeout)
+        if timed_out:
+            killed.append((measured_tests[idx], {
+                'status': TIMEOUT_FAILURE_TYPE,
+                'time': test_timeout,
+                'output': '',
+                'message': 'Killed after the timeout of {:.1f} sec'.format(test_timeout),
+            }))
+            print(f"Warning: Test {measured_tests[idx]} timed out and was killed.")
+        elif os.path.isfile(xml_file):
+            add_testcase_properties(xml_file, properties)
+            xml_files[idx] = xml_file
+        else:
+            print(f"Warning: Test {measured_tests[idx]} exited without writing a report.")
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        list(pool.map(measure, range(len(measured_tests))))
+    # The threads only wait for their child processes, so they run the tests in parallel.
+
+    xml_files = [xml_file for xml_file in xml_files if xml_file is not None]
+    if disabled_tests:
+        disabled_xml = os.path.join(directory, 'disabled.xml')
+        subprocess.run([binary, '--gtest_filter=' + gtest_filter(disabled_tests), '--gtest_output=xml:' + disabled_xml],
+                       stdout=subprocess.DEVNULL, stderr=subprocess.STDOUT)
+        if os.path.isfile(disabled_xml):
+            xml_files.append(disabled_xml)
+    if killed:
+        killed_xml = os.path.join(directory, 'killed.xml')
+        write_console_report(killed, killed_xml)
+        xml_files.append(killed_xml)
+
+    return xml_files
+
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# Shebang to specify the interpreter for running the script
+
+import os
+import sys
+import json
+import shutil
+import hashlib
+import argparse
+import subprocess
+from run_history import hash_file
+# Importing required libraries:
+# - os, sys: for file handling and exit codes.
+# - json: for serializing the cache key inputs.
+# - shutil: for copying reports into and out of the cache.
+# - hashlib: for hashing the cache key.
+# - argparse: for parsing command-line arguments.
+# - subprocess: for launching the gtest binary.
+# - run_history: hashing of the test binary.
+
+# Default location of the result cache. Like the run history it is kept outside of the report folder,
+# so `make clean` does not remove it.
+DEFAULT_CACHE_DIRECTORY = 'history/cache'
+
+# Number of cached reports kept; the least recently used ones are removed first.
+DEFAULT_CACHE_ENTRIES = 20
+
+
+def cache_environment():
+    # Return the environment variables that change the test results: all GTEST_* variables
+    # (sharding, filter, repeat, ...) as a sorted list of (name, value).
+
+    return sorted((name, value) for name, value in os.environ.items() if name.startswith('GTEST_'))
+
+
+def cache_key(binary, test_filter='*', options=()):
+    # Build the cache key of a test run: sha256 over the hash of the binary, its environment,
+    # the --gtest_filter and further options that change the report (e.g. the watchdog timeouts).
+
+    key_inputs = {
+        'binary': hash_file(binary),
+        'environment': cache_environment(),
+        'filter': test_filter,
+        'options': list(options),
+    }
+    return hashlib.sha256(json.dumps(key_inputs, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def cached_report_path(cache_directory, key, extension):
+    # Location of the cached report of a key, e.g. 'history/cache/<key>.xml'.
+
+    return os.path.join(cache_directory, key + extension)
+
+
+def restore_report(cache_directory, key, output_file):
+    # Copy the cached report of `key` to `output_file`.
+    # Returns True on a cache hit, False if there is no cached report in the format of `output_file`.
+
+    cached_report = cached_report_path(cache_directory, key, os.path.splitext(output_file)[1].lower())
+    if not os.path.isfile(cached_report):
+        return False
+
+    output_directory = os.path.dirname(output_file)
+    if output_directory and not os.path.isdir(output_directory):
+        os.makedirs(output_directory)
+    shutil.copyfile(cached_report, output_file)
+    os.utime(cached_report)
+    # Touch the entry, so the eviction removes the least recently used reports first.
+    return True
+
+
+def store_report(cache_directory, key, report_file, max_entries=DEFAULT_CACHE_ENTRIES):
+    # Store a report under `key` and remove the least recently used entries beyond `max_entries`.
+
+    if not os.path.isdir(cache_directory):
+        os.makedirs(cache_directory)
+    shutil.copyfile(report_file, cached_report_path(cache_directory, key, os.path.splitext(report_file)[1].lower()))
+
+    entries = sorted((os.path.join(cache_directory, entry) for entry in os.listdir(cache_directory)),
+                     key=os.path.getmtime, reverse=True)
+    for entry in entries[max_entries:]:
+        os.remove(entry)
+
+
+def run_cached(binary, output_file, test_filter='*', cache_directory=DEFAULT_CACHE_DIRECTORY, force=False):
+    # Run the gtest binary once with --gtest_output in the format of `output_file` (xml or json),
+    # unless the cache holds a report of the same binary, environment and filter.
+    # Returns the exit code of the test run, or 0 for a cache hit.
+
+    key = cache_key(binary, test_filter)
+    if not force and restore_report(cache_directory, key, output_file):
+        print(f"Reusing cached results for {output_file} (use --force to rerun the tests)")
+        return 0
+
+    output_format = 'json' if os.path.splitext(output_file)[1].lower() == '.json' else 'xml'
+    result = subprocess.run([binary, '--gtest_filter=' + test_filter,
+                             '--gtest_output={}:{}'.format(output_format, output_file)])
+    if os.path.isfile(output_file):
+        store_report(cache_directory, key, output_file)
+    # A failing test is a regular result and cached as well; a crash without report is not.
+
+    return result.returncode
+
+
+def main():
+    # Command-line entry point: run the gtest binary through the result cache.
+
+    parser = argparse.ArgumentParser(description='Run a gtest binary or reuse its cached XML/JSON report', allow_abbrev=False)
+    parser.add_argument('--binary', type=str, default='build/Report_Program', metavar="build/Report_Program", help="Location of the gtest binary")
+    parser.add_argument('--output', '-o', type=str, default='report/ReportTest.xml', metavar="report/ReportTest.xml", help="Location of the XML/JSON report")
+    parser.add_argument('--filter', type=str, default='*', help="--gtest_filter of the run")
+    parser.add_argument('--cache-dir', type=str, default=DEFAULT_CACHE_DIRECTORY, metavar=DEFAULT_CACHE_DIRECTORY, help="Location of the result cache")
+    parser.add_argument('--force', action='store_true', help="Rerun the tests even if a cached report exists")
+    args = parser.parse_args()
+    # Parse command-line arguments provided by the user.
+
+    if not os.path.isfile(args.binary):
+        print(f"ERROR: The test binary {args.binary} does not exist.")
+        return 1
+
+    return run_cached(args.binary, args.output, args.filter, args.cache_dir, args.force)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
+    # Entry point of the script. Execute the main() function when the script is run.
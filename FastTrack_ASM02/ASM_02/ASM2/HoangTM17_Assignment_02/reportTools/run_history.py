@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+# Shebang to specify the interpreter for running the script
+
+import os
+import sys
+import argparse
+import hashlib
+import sqlite3
+from datetime import datetime
+from gtest_report import read_report, testcase_key, STATUS_PASSED, STATUS_FAILED
+from report_model import read_model
+# Importing required libraries:
+# - os, sys: for file path handling and exit codes.
+# - argparse: for parsing command-line arguments.
+# - hashlib: for hashing the test binary into a build id.
+# - sqlite3: for the local run-history database.
+# - datetime: for the ingestion timestamp.
+# - gtest_report: streaming reader for gtest XML/JSON reports.
+# - report_model: the same records read from a report model the caller already built.
+
+# Default location of the run-history database. It is kept outside of the report folder,
+# so `make clean` does not remove it.
+DEFAULT_HISTORY_DB = 'history/ReportHistory.db'
+
+# Database schema.
+# - runs: one row per ingested report.
+# - testcases: one row per testcase of a run.
+# - metrics: one row per numeric RecordProperty value of a testcase of a run.
+# The indexes keep the trend and per-test queries independent of the number of stored runs.
+HISTORY_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS runs (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp   TEXT NOT NULL,
+    ingested_at TEXT NOT NULL,
+    report_file TEXT NOT NULL,
+    build_id    TEXT NOT NULL DEFAULT '',
+    tests       INTEGER NOT NULL,
+    failures    INTEGER NOT NULL,
+    disabled    INTEGER NOT NULL,
+    time        REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS testcases (
+    run_id      INTEGER NOT NULL REFERENCES runs(id),
+    classname   TEXT NOT NULL,
+    name        TEXT NOT NULL,
+    timestamp   TEXT NOT NULL,
+    status      TEXT NOT NULL,
+    time        REAL NOT NULL,
+    failures    INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS metrics (
+    run_id      INTEGER NOT NULL REFERENCES runs(id),
+    classname   TEXT NOT NULL,
+    name        TEXT NOT NULL,
+    metric      TEXT NOT NULL,
+    value       REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_testcases_key ON testcases(classname, name, timestamp);
+CREATE INDEX IF NOT EXISTS idx_testcases_status ON testcases(status);
+CREATE INDEX IF NOT EXISTS idx_testcases_run ON testcases(run_id, classname);
+CREATE INDEX IF NOT EXISTS idx_runs_timestamp ON runs(timestamp);
+CREATE INDEX IF NOT EXISTS idx_metrics_run ON metrics(run_id);
+'''
+
+
+def hash_file(file_path):
+    # Return the sha256 hex digest of a file, read in blocks to keep memory usage constant.
+
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as fin:
+        for block in iter(lambda: fin.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def open_history(db_path):
+    # Open (and create if necessary) the run-history database and make sure the schema exists.
+
+    db_directory = os.path.dirname(db_path)
+    if db_directory and not os.path.isdir(db_directory):
+        os.makedirs(db_directory)
+
+    conn = sqlite3.connect(db_path)
+    conn.executescript(HISTORY_SCHEMA)
+    return conn
+
+
+def ingest_report(conn, report_file, build_id='', model=None):
+    # Append all testcases of one gtest XML/JSON report as a new run.
+    # The testcases are streamed from the report directly into the database. With `model`
+    # (report_model.build_model of `report_file`), they are read from its columns instead of parsing the report.
+    # Returns the id of the new run, or of the existing run if the report was ingested before.
+
+    header, testcases = read_report(report_file) if model is None else read_model(model)
+
+    run_timestamp = header['timestamp'] or datetime.now().isoformat(timespec='seconds')
+    # Fall back to the ingestion time if the report carries no timestamp.
+
+    if header['timestamp']:
+        row = conn.execute('SELECT id FROM runs WHERE timestamp = ? AND build_id = ? AND tests = ?',
+                           (run_timestamp, build_id, header['tests'])).fetchone()
+        if row is not None:
+            print(f"Run of {run_timestamp} is already in the history (run {row[0]}), not ingested again.")
+            return row[0]
+    # A report reused from the result cache is the same run and must not count twice (e.g. for flakiness).
+
+    with conn:
+        cursor = conn.execute(
+            'INSERT INTO runs (timestamp, ingested_at, report_file, build_id, tests, failures, disabled, time) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (run_timestamp, datetime.now().isoformat(timespec='seconds'), os.path.abspath(report_file),
+             build_id, header['tests'], header['failures'], header['disabled'], header['time']))
+        run_id = cursor.lastrowid
+
+        metric_rows = []
+
+        def testcase_rows():
+            # Testcase rows for `executemany`; the metrics of the testcases are collected on the way.
+            for testcase in testcases:
+                metric_rows.extend((run_id, testcase['classname'], testcase['name'], metric, value)
+                                   for metric, value in testcase['metrics'].items())
+                yield (run_id, testcase['classname'], testcase['name'], testcase['timestamp'] or run_timestamp,
+                       testcase['status'], testcase['time'], len(testcase['failures']))
+
+        conn.executemany(
+            'INSERT INTO testcases (run_id, classname, name, timestamp, status, time, failures) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)', testcase_rows())
+        # `executemany` consumes the generator, so the report is never fully loaded into memory.
+
+        conn.executemany(
+            'INSERT INTO metrics (run_id, classname, name, metric, value) VALUES (?, ?, ?, ?, ?)', metric_rows)
+        # Only the testcases recording properties have metrics, so this list stays small.
+
+    return run_id
+
+
+def compact_history(conn, keep_runs=None, max_age_days=None, vacuum=True):
+    # Apply the retention policy to the run-history database.
+    # - keep_runs: keep only the newest N runs (None = no limit).
+    # - max_age_days: remove runs older than N days (None = no limit).
+    # - vacuum: rebuild the database file afterwards to give the space back.
+    # Returns the number of removed runs.
+
+    conditions = []
+    params = []
+    if keep_runs is not None:
+        conditions.append('id NOT IN (SELECT id FROM runs ORDER BY id DESC LIMIT ?)')
+        params.append(keep_runs)
+    if max_age_days is not None:
+        conditions.append("julianday(timestamp) < julianday('now', ?)")
+        params.append('-{} days'.format(max_age_days))
+
+    if not conditions:
+        return 0
+
+    with conn:
+        expired_run_ids = [row[0] for row in conn.execute(
+            'SELECT id FROM runs WHERE ' + ' OR '.join(conditions), params)]
+        conn.executemany('DELETE FROM testcases WHERE run_id = ?', ((run_id,) for run_id in expired_run_ids))
+        conn.executemany('DELETE FROM metrics WHERE run_id = ?', ((run_id,) for run_id in expired_run_ids))
+        conn.executemany('DELETE FROM runs WHERE id = ?', ((run_id,) for run_id in expired_run_ids))
+
+    if vacuum and expired_run_ids:
+        conn.execute('VACUUM')
+
+    return len(expired_run_ids)
+
+
+def query_recent_runs(conn, last_runs):
+    # Return the newest `last_runs` runs as list of (run_id, timestamp), oldest first.
+
+    rows = conn.execute('SELECT id, timestamp FROM runs ORDER BY id DESC LIMIT ?', (last_runs,)).fetchall()
+    return list(reversed(rows))
+
+
+def query_suite_trends(conn, last_runs):
+    # Compute pass rate and duration per testsuite for the newest `last_runs` runs.
+    # Returns a tuple (runs, trends):
+    # - runs: list of (run_id, timestamp), oldest first.
+    # - trends: dict {classname: {run_id: (tests, passed, duration)}}.
+    # The aggregation runs inside SQLite on the (run_id, classname) index; no report is parsed again.
+
+    runs = query_recent_runs(conn, last_runs)
+    trends = {}
+    if not runs:
+        return runs, trends
+
+    rows = conn.execute(
+        'SELECT run_id, classname, COUNT(*), SUM(status = ?), SUM(time) FROM testcases '
+        'WHERE run_id >= ? GROUP BY run_id, classname',
+        (STATUS_PASSED, runs[0][0]))
+    for run_id, classname, tests, passed, duration in rows:
+        trends.setdefault(classname, {})[run_id] = (tests, passed, duration)
+
+    return runs, trends
+
+
+def query_metric_history(conn, last_runs):
+    # Read the RecordProperty metrics of the newest `last_runs` runs.
+    # Returns a tuple (runs, history):
+    # - runs: list of (run_id, timestamp), oldest first.
+    # - history: dict {('classname::name', metric): {run_id: value}}.
+
+    runs = query_recent_runs(conn, last_runs)
+    history = {}
+    if not runs:
+        return runs, history
+
+    rows = conn.execute('SELECT run_id, classname, name, metric, value FROM metrics WHERE run_id >= ?', (runs[0][0],))
+    for run_id, classname, name, metric, value in rows:
+        history.setdefault((testcase_key(classname, name), metric), {})[run_id] = value
+
+    return runs, history
+
+
+def detect_flaky_tests(conn, recent_runs=20, min_flips=1):
+    # Flag tests whose outcome flips between passed and failed across recent runs of the same build.
+    # - recent_runs: number of newest runs to analyse.
+    # - min_flips: minimum number of flips for a test to be reported as flaky.
+    # Returns a dict {'classname::name': (flip_count, flip_rate)} where flip_rate is the share of
+    # consecutive same-build run pairs in which the outcome changed.
+    #
+    # The rows are read in one sweep ordered by test and time (served by the idx_testcases_key index).
+    # Only the state of the current test is kept, so the pass is linear in the history size.
+
+    runs = query_recent_runs(conn, recent_runs)
+    flaky_tests = {}
+    if not runs:
+        return flaky_tests
+
+    rows = conn.execute(
+        'SELECT t.classname, t.name, r.build_id, t.status FROM testcases t JOIN runs r ON r.id = t.run_id '
+        'WHERE t.run_id >= ? AND t.status IN (?, ?) ORDER BY t.classname, t.name, t.timestamp, t.run_id',
+        (runs[0][0], STATUS_PASSED, STATUS_FAILED))
+    # Skipped and not run testcases carry no outcome and are ignored.
+
+    current_key = None
+    last_status_per_build = {}
+    flip_count = 0
+    pair_count = 0
+
+    def flush():
+        # Store the result of the finished test if it flipped often enough.
+        if current_key is not None and flip_count >= min_flips and pair_count > 0:
+            flaky_tests[current_key] = (flip_count, flip_count / pair_count)
+
+    for classname, name, build_id, status in rows:
+        key = testcase_key(classname, name)
+        if key != current_key:
+            flush()
+            current_key = key
+            last_status_per_build = {}
+            flip_count = 0
+            pair_count = 0
+        # A new test starts: reset the per-test state.
+
+        last_status = last_status_per_build.get(build_id)
+        if last_status is not None:
+            pair_count += 1
+            if last_status != status:
+                flip_count += 1
+        last_status_per_build[build_id] = status
+        # Only compare with the previous run of the same build, a changed binary may change the outcome legitimately.
+
+    flush()
+    return flaky_tests
+
+
+def main():
+    # Command-line entry point: ingest reports, apply the retention policy or print suite trends.
+
+    parser = argparse.ArgumentParser(description='Store gtest results in a local run-history database', allow_abbrev=False)
+    parser.add_argument('--db', type=str, default=DEFAULT_HISTORY_DB, metavar=DEFAULT_HISTORY_DB, help="Location of the history database")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    ingest_parser = subparsers.add_parser('ingest', help='Append the testcases of gtest report(s) as new run(s)')
+    ingest_parser.add_argument('input', type=str, metavar="report/ReportTest.xml", nargs="+", help="Location of the report file(s) to ingest")
+    ingest_parser.add_argument('--build-id', type=str, default='', help="Identifier of the tested build")
+    ingest_parser.add_argument('--binary', type=str, metavar="build/Report_Program", help="Use the hash of this test binary as build id")
+    ingest_parser.add_argument('--keep-runs', type=int, help="Keep only the newest N runs after ingesting")
+    ingest_parser.add_argument('--max-age-days', type=int, help="Remove runs older than N days after ingesting")
+
+    compact_parser = subparsers.add_parser('compact', help='Apply the retention policy and compact the database')
+    compact_parser.add_argument('--keep-runs', type=int, help="Keep only the newest N runs")
+    compact_parser.add_argument('--max-age-days', type=int, help="Remove runs older than N days")
+
+    trend_parser = subparsers.add_parser('trend', help='Print pass rate and duration per testsuite')
+    trend_parser.add_argument('--runs', type=int, default=10, help="Number of recent runs to show")
+
+    flaky_parser = subparsers.add_parser('flaky', help='Print tests whose outcome flips across runs of the same build')
+    flaky_parser.add_argument('--runs', type=int, default=20, help="Number of recent runs to analyse")
+    flaky_parser.add_argument('--min-flips', type=int, default=1, help="Minimum number of flips to report a test")
+
+    args = parser.parse_args()
+    # Parse command-line arguments provided by the user.
+
+    conn = open_history(args.db)
+
+    if args.command == 'ingest':
+        build_id = args.build_id
+        if not build_id and args.binary:
+            if os.path.isfile(args.binary):
+                build_id = hash_file(args.binary)
+            else:
+                print(f"Warning: Binary {args.binary} does not exist. The run is stored without build id.")
+        # The build id identifies runs of the same binary, which the flakiness analysis relies on.
+
+        for f in args.input:
+            if not os.path.isfile(f):
+                print(f"File {f} does not exist. Skipping.")
+                continue
+            try:
+                run_id = ingest_report(conn, f, build_id)
+            except (ValueError, OSError) as e:
+                print(f"Error ingesting file {f}: {e}. Skipping.")
+                continue
+            print(f"Ingested {f} as run {run_id} into {args.db}")
+
+        removed = compact_history(conn, args.keep_runs, args.max_age_days)
+        if removed:
+            print(f"Removed {removed} expired run(s)")
+
+    elif args.command == 'compact':
+        removed = compact_history(conn, args.keep_runs, args.max_age_days)
+        print(f"Removed {removed} expired run(s) from {args.db}")
+
+    elif args.command == 'trend':
+        runs, trends = query_suite_trends(conn, args.runs)
+        for classname in sorted(trends):
+            print(classname)
+            for run_id, timestamp in runs:
+                if run_id in trends[classname]:
+                    tests, passed, duration = trends[classname][run_id]
+                    print(f"  run {run_id} ({timestamp}): {100.0 * passed / tests:.1f}% passed, {duration:.3f} sec")
+
+    elif args.command == 'flaky':
+        flaky_tests = detect_flaky_tests(conn, args.runs, args.min_flips)
+        for key, (flip_count, flip_rate) in sorted(flaky_tests.items(), key=lambda item: -item[1][1]):
+            print(f"{key}: {flip_count} flip(s), flip rate {100.0 * flip_rate:.1f}%")
+        if not flaky_tests:
+            print("No flaky tests found.")
+
+    conn.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
+    # Entry point of the script. Execute the main() function when the script is run.
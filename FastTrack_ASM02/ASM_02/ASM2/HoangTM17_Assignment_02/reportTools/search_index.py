@@ -0,0 +1,112 @@
+import re
+import json
+# Importing required libraries:
+# - re: for splitting names, tags and failure messages into tokens.
+# - json: for serializing the index.
+
+# Words of a text: runs of letters and digits ('TestCase_02_PrimeNumberTest' -> 'TestCase', '02', 'PrimeNumberTest').
+WORD_PATTERN = re.compile(r'[A-Za-z0-9]+')
+
+# Parts of a camel case word ('PrimeNumberTest' -> 'Prime', 'Number', 'Test'), so a search for 'number' finds it.
+CAMEL_CASE_PATTERN = re.compile(r'[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|[0-9]+')
+
+# Tokens outside these lengths are not indexed.
+MIN_TOKEN_LENGTH = 2
+MAX_TOKEN_LENGTH = 40
+
+
+def tokenize(text):
+    # Split a text into its lower case search tokens: every word and its camel case parts.
+
+    tokens = set()
+    for word in WORD_PATTERN.findall(text):
+        for token in [word] + CAMEL_CASE_PATTERN.findall(word):
+            if MIN_TOKEN_LENGTH <= len(token) <= MAX_TOKEN_LENGTH:
+                tokens.add(token.lower())
+    return tokens
+
+
+def add_postings(postings, tokens, case_id):
+    # Add a testcase to the posting lists {token: [case ids]} of its tokens.
+    # Testcases are added in ascending order, so the posting lists stay sorted.
+
+    for token in tokens:
+        case_ids = postings.get(token)
+        if case_ids is None:
+            postings[token] = [case_id]
+        elif case_ids[-1] != case_id:
+            case_ids.append(case_id)
+
+
+def encode_postings(case_ids):
+    # Delta-encode a sorted posting list, e.g. [100, 101, 105] -> [100, 1, 4]; small gaps need few digits.
+
+    return [case_id - previous for previous, case_id in zip([0] + case_ids[:-1], case_ids)]
+
+
+def serialize_index(postings, dropped=None):
+    # Serialize posting lists as JSON object {'tokens': [sorted tokens], 'postings': [delta-encoded lists]}.
+    # The tokens are sorted, so all tokens starting with a prefix are found by a binary search.
+    # The kinds of tokens dropped to limit the size (`dropped`) are listed in 'dropped', so the page knows
+    # that the index is incomplete and searches its rows as well.
+
+    tokens = sorted(postings)
+    index = {
+        'tokens': tokens,
+        'postings': [encode_postings(postings[token]) for token in tokens],
+    }
+    if dropped:
+        index['dropped'] = dropped
+    return json.dumps(index, separators=(',', ':'))
+
+
+def estimate_size(token, case_ids):
+    # Estimated serialized size of one token and its posting list.
+
+    return len(token) + 4 + len(','.join(str(delta) for delta in encode_postings(case_ids)))
+
+
+def build_search_index(model, case_ids, max_size=None):
+    # Build the search index of the testcases `case_ids` of the report model (in ascending order) over
+    # their classname, name, tags and failure messages.
+    # With `max_size` (characters), the index is reduced until it fits: first the failure message tokens
+    # are dropped, then the tokens with the largest posting lists (the least selective ones).
+    # Returns a tuple (JSON text, list of the dropped kinds of tokens for the warning).
+
+    name_postings = {}
+    failure_postings = {}
+    token_cache = {}
+    first_failure = model['case_first_failure']
+    for case_id in case_ids:
+        texts = (model['case_classname'][case_id], model['case_tags'][case_id])
+        tokens = token_cache.get(texts)
+        if tokens is None:
+            tokens = token_cache[texts] = tokenize(' '.join(texts))
+        # The classname and tags repeat for every testcase of a testsuite; each distinct pair is tokenized once.
+        add_postings(name_postings, tokens | tokenize(model['case_name'][case_id]), case_id)
+        for failure_id in range(first_failure[case_id], first_failure[case_id + 1]):
+            add_postings(failure_postings, tokenize(model['failure_message'][failure_id]), case_id)
+
+    postings = dict(name_postings)
+    for token, failure_case_ids in failure_postings.items():
+        postings[token] = sorted(set(postings.get(token, [])) | set(failure_case_ids))
+    index_text = serialize_index(postings)
+    if max_size is None or len(index_text) <= max_size:
+        return index_text, []
+
+    dropped = ['failure tokens']
+    postings = name_postings
+    index_text = serialize_index(postings, dropped)
+    if len(index_text) <= max_size:
+        return index_text, dropped
+
+    dropped.append('frequent tokens')
+    size = len(index_text)
+    postings = dict(postings)
+    for token in sorted(postings, key=lambda token: len(postings[token]), reverse=True):
+        if size <= max_size:
+            break
+        size -= estimate_size(token, postings.pop(token))
+    # Drop the tokens matching most testcases until the estimated size fits.
+
+    return serialize_index(postings, dropped), dropped
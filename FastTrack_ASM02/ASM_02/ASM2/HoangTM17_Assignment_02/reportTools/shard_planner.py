@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# Shebang to specify the interpreter for running the script
+
+import os
+import sys
+import heapq
+import argparse
+import subprocess
+from gtest_report import read_report
+# Importing required libraries:
+# - os, sys: for file handling and exit codes.
+# - heapq: for the worker loads of the LPT bin-packing.
+# - argparse: for parsing command-line arguments.
+# - subprocess: for listing the tests of the gtest binary.
+# - gtest_report: streaming reader for gtest XML/JSON reports.
+
+# Duration assumed for tests without history, if no test has a known duration either.
+DEFAULT_TEST_DURATION = 1.0
+
+
+def gtest_name(classname, name):
+    # Full gtest name of a testcase as used by --gtest_filter, e.g. 'TestSuiteAssignment_02.TestCase_01_ReverseStringTest'.
+
+    return '{}.{}'.format(classname, name)
+
+
+def list_tests(binary):
+    # Return the full names of all tests of a gtest binary in registration order (--gtest_list_tests).
+    #   TestSuiteAssignment_02.
+    #     TestCase_01_ReverseStringTest
+    #     TestCase_02_PrimeNumberTest
+    # Comments (e.g. '# GetParam() = 3' of parameterized tests) are stripped.
+
+    output = subprocess.run([binary, '--gtest_list_tests'], capture_output=True, text=True, check=True).stdout
+    return list(parse_test_list(output.splitlines()))
+
+
+def parse_test_list(lines):
+    # Yield the full test names of the --gtest_list_tests output `lines` (see list_tests()).
+    # The lines may also be read from the running process, so the list is never held as a whole.
+
+    suite_name = None
+    for line in lines:
+        content = line.split('#')[0].rstrip()
+        if not content:
+            continue
+        if not line.startswith(' '):
+            if content.endswith('.'):
+                suite_name = content[:-1]
+            # Lines without indentation name the testsuite (other lines like 'Running main()' are skipped).
+        elif suite_name is not None:
+            yield gtest_name(suite_name, content.strip())
+
+
+def load_durations(report_files):
+    # Read the testcase durations from previous gtest XML/JSON reports.
+    # Returns a dict {gtest name: duration}; the mean is used if a test occurs in several reports.
+
+    duration_sums = {}
+    duration_counts = {}
+    for report_file in report_files:
+        if not os.path.isfile(report_file):
+            print(f"Warning: Report {report_file} does not exist. Skipping.")
+            continue
+        header, testcases = read_report(report_file)
+        for testcase in testcases:
+            key = gtest_name(testcase['classname'], testcase['name'])
+            duration_sums[key] = duration_sums.get(key, 0.0) + testcase['time']
+            duration_counts[key] = duration_counts.get(key, 0) + 1
+    return {key: duration_sums[key] / duration_counts[key] for key in duration_sums}
+
+
+def estimate_durations(tests, durations):
+    # Assign a duration to every test: its historical duration if known, otherwise the median of the
+    # known durations (new tests are assumed to be typical ones).
+    # Returns a list of (test name, duration) in the order of `tests`.
+
+    known_durations = sorted(durations[test] for test in tests if test in durations)
+    default_duration = known_durations[len(known_durations) // 2] if known_durations else DEFAULT_TEST_DURATION
+    return [(test, durations.get(test, default_duration)) for test in tests]
+
+
+def plan_shards(test_durations, workers):
+    # Distribute the tests onto `workers` shards with the LPT (longest processing time first) heuristic:
+    # the tests are sorted by duration descending and every test goes to the currently least loaded shard.
+    # - test_durations: list of (test name, duration).
+    # Returns a list of shards, each a dict {'tests': [test names in original order], 'load': predicted duration}.
+    # The predicted makespan is the largest shard load.
+
+    workers = max(1, min(workers, len(test_durations)))
+    order = {test: idx for idx, (test, duration) in enumerate(test_durations)}
+
+    shards = [{'tests': [], 'load': 0.0} for idx in range(workers)]
+    loads = [(0.0, idx) for idx in range(workers)]
+    # Min-heap of (load, shard index): the root is always the least loaded shard.
+
+    for test, duration in sorted(test_durations, key=lambda item: (-item[1], order[item[0]])):
+        load, idx = heapq.heappop(loads)
+        shards[idx]['tests'].append(test)
+        shards[idx]['load'] = load + duration
+        heapq.heappush(loads, (load + duration, idx))
+
+    for shard in shards:
+        shard['tests'].sort(key=lambda test: order[test])
+    # Keep the registration order inside every shard, so the merged report stays ordered like a serial run.
+
+    return shards
+
+
+def predicted_makespan(shards):
+    # Predicted wall time of the sharded run: the load of the slowest shard.
+
+    return max([shard['load'] for shard in shards] or [0.0])
+
+
+def gtest_filter(tests):
+    # Build the --gtest_filter value selecting exactly the given tests.
+
+    return ':'.join(tests)
+
+
+def make_plan(binary, report_files, workers):
+    # List the tests of the binary, estimate their durations from the reports and plan the shards.
+
+    tests = list_tests(binary)
+    return plan_shards(estimate_durations(tests, load_durations(report_files)), workers)
+
+
+def main():
+    # Command-line entry point: print the balanced --gtest_filter sets and the predicted makespan.
+
+    parser = argparse.ArgumentParser(description='Balance gtest execution across workers from historical durations', allow_abbrev=False)
+    parser.add_argument('--binary', type=str, default='build/Report_Program', metavar="build/Report_Program", help="Location of the gtest binary")
+    parser.add_argument('--workers', '-j', type=int, default=os.cpu_count() or 1, help="Number of workers (default: number of cores)")
+    parser.add_argument('reports', type=str, metavar="report/ReportTest.xml", nargs="*", help="Previous gtest XML/JSON report(s) with testcase durations")
+    args = parser.parse_args()
+    # Parse command-line arguments provided by the user.
+
+    shards = make_plan(args.binary, args.reports, args.workers)
+    serial_time = sum(shard['load'] for shard in shards)
+
+    for idx, shard in enumerate(shards):
+        print(f"Shard {idx}: {len(shard['tests'])} test(s), predicted {shard['load']:.3f} sec")
+        print(f"  --gtest_filter={gtest_filter(shard['tests'])}")
+    print(f"Predicted makespan: {predicted_makespan(shards):.3f} sec (serial: {serial_time:.3f} sec)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
+    # Entry point of the script. Execute the main() function when the script is run.
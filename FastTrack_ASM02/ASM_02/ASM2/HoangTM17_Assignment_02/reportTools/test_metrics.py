@@ -0,0 +1,98 @@
+import math
+# Importing required libraries:
+# - math: for rejecting NaN and infinite metric values.
+
+# Attributes gtest writes on a <testcase> node (plus 'tags' of this report generator).
+# Every other attribute of a testcase is a value recorded by the test with RecordProperty().
+KNOWN_TESTCASE_ATTRIBUTES = ['name', 'file', 'line', 'status', 'result', 'time', 'timestamp', 'classname',
+                             'type_param', 'value_param', 'tags']
+
+# Keys of a testcase object in a JSON report that are not RecordProperty values.
+KNOWN_JSON_TESTCASE_KEYS = KNOWN_TESTCASE_ATTRIBUTES + ['failures']
+
+
+def parse_metric_value(value):
+    # Convert a recorded property value to float.
+    # Returns None for values that are no finite numbers (e.g. a recorded build label), which are no metrics.
+
+    try:
+        number = float(str(value).strip())
+    except ValueError:
+        return None
+    return number if math.isfinite(number) else None
+
+
+def read_testcase_properties(xml_testcase_node):
+    # Collect the RecordProperty values of a <testcase> node as dict {property name: value string}.
+    # Depending on the gtest version they are written as extra attributes of the testcase or as
+    # <property name="..." value="..."/> children of its <properties> node; both are read.
+
+    properties = {name: value for name, value in xml_testcase_node.attrib.items()
+                  if name not in KNOWN_TESTCASE_ATTRIBUTES}
+    if not len(xml_testcase_node):
+        return properties
+    for xml_property_node in xml_testcase_node.findall('./properties/property'):
+        if xml_property_node.attrib.get('name'):
+            properties[xml_property_node.attrib['name']] = xml_property_node.attrib.get('value', '')
+    return properties
+
+
+def metrics_from_properties(properties):
+    # Keep the numeric values of a dict {property name: value string} as dict {metric name: float}.
+
+    metrics = {}
+    for name, value in properties.items():
+        number = parse_metric_value(value)
+        if number is not None:
+            metrics[name] = number
+    return metrics
+
+
+def read_testcase_metrics(xml_testcase_node):
+    # Collect the numeric RecordProperty values of a <testcase> node as dict {metric name: float}.
+
+    return metrics_from_properties(read_testcase_properties(xml_testcase_node))
+
+
+def read_json_testcase_metrics(json_testcase):
+    # Collect the numeric RecordProperty values of a testcase of a JSON report, where gtest writes them
+    # as extra keys of the testcase object.
+
+    metrics = {}
+    for name, value in json_testcase.items():
+        if name not in KNOWN_JSON_TESTCASE_KEYS and not isinstance(value, (list, dict, bool)):
+            number = parse_metric_value(value)
+            if number is not None:
+                metrics[name] = number
+    return metrics
+
+
+def aggregate_metrics(testcase_metrics):
+    # Aggregate the metrics of several testcases (e.g. of one testsuite).
+    # - testcase_metrics: iterable of dicts {metric name: float}.
+    # Returns a dict {metric name: {'count', 'sum', 'mean', 'min', 'max'}}; a testcase without
+    # a metric does not count for it.
+
+    aggregates = {}
+    for metrics in testcase_metrics:
+        for name, value in metrics.items():
+            aggregate = aggregates.get(name)
+            if aggregate is None:
+                aggregates[name] = {'count': 1, 'sum': value, 'min': value, 'max': value}
+            else:
+                aggregate['count'] += 1
+                aggregate['sum'] += value
+                aggregate['min'] = min(aggregate['min'], value)
+                aggregate['max'] = max(aggregate['max'], value)
+
+    for aggregate in aggregates.values():
+        aggregate['mean'] = aggregate['sum'] / aggregate['count']
+    return aggregates
+
+
+def format_metric_value(value):
+    # Format a metric for the reports: integers without decimals, other values with up to 6 significant digits.
+
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return '{:.6g}'.format(value)
@@ -0,0 +1,477 @@
+#!/usr/bin/env python3
+# Shebang to specify the interpreter for running the script
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+import subprocess
+import xml.etree.ElementTree as ET
+from xml.sax.saxutils import quoteattr
+from gtest_report import parse_time, read_report, STATUS_FAILED, STATUS_NOTRUN
+from shard_planner import list_tests, estimate_durations, load_durations, plan_shards, predicted_makespan, gtest_filter
+from watchdog import watch_tests, is_disabled_test
+from result_cache import cache_key, restore_report, store_report, DEFAULT_CACHE_DIRECTORY
+import resource_usage
+# Importing required libraries:
+# - os, sys, shutil, tempfile: for file handling and the temporary shard directory.
+# - json: for merging rerun results into gtest JSON reports.
+# - threading: for watching the shards concurrently.
+# - time: for measuring the wall time of the run.
+# - argparse: for parsing command-line arguments.
+# - subprocess: for launching the gtest binary and the report converters.
+# - xml.etree.ElementTree (ET): for streaming the shard XML reports.
+# - quoteattr: for writing XML attributes of the merged report.
+# - gtest_report: shared helpers for gtest reports.
+# - shard_planner: LPT planning of the shards.
+# - watchdog: per-test and whole-run timeouts.
+# - result_cache: reuse of the report of an unchanged binary.
+# - resource_usage: per-test CPU time and peak RSS.
+
+# Directory of this script and of the report converters.
+TOOLS_DIRECTORY = os.path.dirname(os.path.realpath(__file__))
+HTML_CONVERTER = os.path.join(TOOLS_DIRECTORY, '..', 'convertXMLtoHTML', 'xmlTohtml.py')
+XLSX_CONVERTER = os.path.join(TOOLS_DIRECTORY, '..', 'convertXMLtoXLSX', 'xmlToxlsx.py')
+
+
+def run_shards(binary, shard_count, shard_directory, shard_filters=None):
+    # Launch `shard_count` gtest processes concurrently and wait for all of them.
+    # - shard_filters: one --gtest_filter per shard (planned shards). Without filters the tests are split
+    #   by gtest itself through the GTEST_TOTAL_SHARDS/GTEST_SHARD_INDEX environment variables.
+    # Every shard writes its own XML report and console log into `shard_directory`.
+    # Returns the list of shard XML reports that were written.
+
+    processes = []
+    for idx in range(shard_count):
+        shard_xml = os.path.join(shard_directory, 'shard_{}.xml'.format(idx))
+        shard_log = open(os.path.join(shard_directory, 'shard_{}.log'.format(idx)), 'w')
+        command = [binary, '--gtest_output=xml:' + shard_xml]
+        environment = None
+        if shard_filters is not None:
+            command.append('--gtest_filter=' + shard_filters[idx])
+        else:
+            environment = dict(os.environ, GTEST_TOTAL_SHARDS=str(shard_count), GTEST_SHARD_INDEX=str(idx))
+        processes.append((subprocess.Popen(command, stdout=shard_log, stderr=subprocess.STDOUT, env=environment),
+                          shard_log, shard_xml))
+    # All shards are started before the first one is waited for, so they run in parallel.
+
+    shard_xmls = []
+    for process, shard_log, shard_xml in processes:
+        process.wait()
+        shard_log.close()
+        if os.path.isfile(shard_xml):
+            shard_xmls.append(shard_xml)
+        else:
+            print(f"Warning: Shard {shard_xml} exited with code {process.returncode} without writing a report.")
+    # gtest exits with 1 if a test failed, which is a regular result here.
+
+    return shard_xmls
+
+
+def run_watched_shards(binary, shard_tests, shard_directory, test_timeout=None, run_timeout=None):
+    # Run every list of `shard_tests` concurrently under the watchdog (see watchdog.watch_tests).
+    # All shards share one whole-run deadline, so the wall time of the run is bounded by `run_timeout`.
+    # Returns the list of XML reports of all shards.
+
+    run_deadline = time.monotonic() + run_timeout if run_timeout else None
+    shard_results = [[] for tests in shard_tests]
+
+    def watch_shard(idx):
+        shard_results[idx] = watch_tests(binary, shard_tests[idx], os.path.join(shard_directory, 'shard_{}'.format(idx)),
+                                         test_timeout, run_deadline)
+
+    threads = [threading.Thread(target=watch_shard, args=(idx,)) for idx in range(len(shard_tests))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # One thread per shard follows the console output of its test process.
+
+    return [xml_file for xml_files in shard_results for xml_file in xml_files]
+
+
+def merge_xml_reports(xml_files, output_file, run_time=None, test_order=None, skip_tests=None):
+    # Merge several gtest XML reports (e.g. the shards of one run) into one valid report.
+    # Testsuites with the same name are combined and all 'tests'/'failures'/'disabled'/'errors'/'skipped'/'time'
+    # totals are recomputed from the testcases.
+    # - run_time: wall time of the whole run; defaults to the longest report time (the shards ran in parallel).
+    # - test_order: full gtest names in registration order (--gtest_list_tests). If given, testsuites and
+    #   testcases are written in this order like in a serial run, otherwise in order of appearance.
+    # - skip_tests: dict {xml file: set of full gtest names} of testcases left out of that report
+    #   (e.g. superseded by a rerun); their time is subtracted from the testsuite time.
+    #
+    # The reports are streamed: every finished <testsuite> is serialized into a spool file and cleared,
+    # only its offsets and counters stay in memory. The merged file is then written from the spool,
+    # so the memory usage depends on the number of testsuites, not on the number of testcases.
+
+    suites = {}
+    suite_order = []
+    test_index = {name: idx for idx, name in enumerate(test_order or [])}
+    skip_tests = skip_tests or {}
+    run_name = 'AllTests'
+    run_timestamp = None
+    longest_time = 0.0
+
+    with tempfile.TemporaryFile() as spool:
+        for xml_file in xml_files:
+            skipped_tests = skip_tests.get(xml_file, set())
+            context = ET.iterparse(xml_file, events=('start', 'end'))
+            event, xml_root = next(context)
+            run_name = xml_root.attrib.get('name', run_name)
+            longest_time = max(longest_time, parse_time(xml_root.attrib.get('time', 0)))
+            if xml_root.attrib.get('timestamp') and (run_timestamp is None or xml_root.attrib['timestamp'] < run_timestamp):
+                run_timestamp = xml_root.attrib['timestamp']
+            # The merged run starts with the earliest shard.
+
+            for event, xml_node in context:
+                if event != 'end' or xml_node.tag != 'testsuite':
+                    continue
+
+                suite_name = xml_node.attrib.get('name', '')
+                if suite_name not in suites:
+                    suites[suite_name] = {'chunks': [], 'tests': 0, 'failures': 0, 'disabled': 0, 'errors': 0,
+                                          'skipped': 0, 'time': 0.0, 'timestamp': xml_node.attrib.get('timestamp', '')}
+                    suite_order.append(suite_name)
+                suite = suites[suite_name]
+
+                for xml_testcase_node in xml_node.findall('./testcase'):
+                    test = '{}.{}'.format(xml_testcase_node.attrib.get('classname', suite_name), xml_testcase_node.attrib.get('name', ''))
+                    if test in skipped_tests:
+                        suite['time'] -= parse_time(xml_testcase_node.attrib.get('time', 0))
+                        continue
+                    suite['tests'] += 1
+                    if xml_testcase_node.find('./failure') is not None:
+                        suite['failures'] += 1
+                    if xml_testcase_node.attrib.get('status') == 'notrun':
+                        suite['disabled'] += 1
+                    if xml_testcase_node.attrib.get('result') == 'skipped':
+                        suite['skipped'] += 1
+                    if xml_testcase_node.find('./error') is not None:
+                        suite['errors'] += 1
+                    xml_testcase_node.tail = '\n    '
+                    chunk = ('    ' + ET.tostring(xml_testcase_node, encoding='unicode').rstrip() + '\n').encode('utf-8')
+                    order_key = test_index.get(test, len(test_index) + len(suite['chunks']))
+                    suite['chunks'].append((order_key, spool.tell(), len(chunk)))
+                    spool.write(chunk)
+                # Count the testcases and spool their serialized XML.
+
+                suite['time'] += parse_time(xml_node.attrib.get('time', 0))
+                xml_node.clear()
+
+        if test_index:
+            for suite in suites.values():
+                suite['chunks'].sort()
+            suite_order.sort(key=lambda suite_name: suites[suite_name]['chunks'][0][0] if suites[suite_name]['chunks'] else 0)
+        # Restore the registration order; unknown testcases keep their order of appearance behind the known ones.
+
+        totals = {key: sum(suite[key] for suite in suites.values())
+                  for key in ['tests', 'failures', 'disabled', 'errors', 'skipped']}
+        run_time = longest_time if run_time is None else run_time
+
+        with open(output_file, 'wb') as fout:
+            fout.write('<?xml version="1.0" encoding="UTF-8"?>\n'.encode('utf-8'))
+            fout.write('<testsuites tests="{tests}" failures="{failures}" disabled="{disabled}" errors="{errors}" time="{time:.3f}" timestamp={timestamp} name={name}>\n'.format(
+                time=run_time, timestamp=quoteattr(run_timestamp or ''), name=quoteattr(run_name), **totals).encode('utf-8'))
+            for suite_name in suite_order:
+                suite = suites[suite_name]
+                fout.write('  <testsuite name={name} tests="{tests}" failures="{failures}" disabled="{disabled}" skipped="{skipped}" errors="{errors}" time="{time:.3f}" timestamp={timestamp}>\n'.format(
+                    name=quoteattr(suite_name), tests=suite['tests'], failures=suite['failures'], disabled=suite['disabled'],
+                    skipped=suite['skipped'], errors=suite['errors'], time=suite['time'],
+                    timestamp=quoteattr(suite['timestamp'])).encode('utf-8'))
+                for order_key, offset, length in suite['chunks']:
+                    spool.seek(offset)
+                    fout.write(spool.read(length))
+                fout.write('  </testsuite>\n'.encode('utf-8'))
+            fout.write('</testsuites>\n'.encode('utf-8'))
+        # Header with the recomputed totals first, then every testsuite copied from the spool.
+
+    return totals
+
+
+def xml_testcase_to_json(xml_testcase_node):
+    # Convert a <testcase> node of an XML report into the testcase object of a gtest JSON report.
+
+    json_testcase = dict(xml_testcase_node.attrib)
+    json_testcase.update({
+        'name': xml_testcase_node.attrib.get('name', ''),
+        'status': xml_testcase_node.attrib.get('status', 'run').upper(),
+        'result': xml_testcase_node.attrib.get('result', 'completed').upper(),
+        'timestamp': xml_testcase_node.attrib.get('timestamp', ''),
+        'time': '{}s'.format(xml_testcase_node.attrib.get('time', '0')),
+        'classname': xml_testcase_node.attrib.get('classname', ''),
+    })
+    if json_testcase.get('line', '').isdigit():
+        json_testcase['line'] = int(json_testcase['line'])
+    # Further attributes (e.g. 'file', 'line', RecordProperty values) are kept like gtest does.
+    failures = [{'failure': xml_failure_node.text or xml_failure_node.attrib.get('message', ''),
+                 'type': xml_failure_node.attrib.get('type', '')}
+                for xml_failure_node in xml_testcase_node.findall('./failure')]
+    if failures:
+        json_testcase['failures'] = failures
+    return json_testcase
+
+
+def merge_rerun_into_json(json_file, rerun_xml, output_file):
+    # Replace the testcases of the gtest JSON report `json_file` by their results in the XML report `rerun_xml`
+    # and write the result with recomputed testsuite and run totals to `output_file`.
+    # The rerun report only holds the rerun testcases, so it is small and read as a whole.
+
+    rerun_testcases = {}
+    for xml_testcase_node in ET.parse(rerun_xml).getroot().iter('testcase'):
+        json_testcase = xml_testcase_to_json(xml_testcase_node)
+        rerun_testcases[(json_testcase['classname'], json_testcase['name'])] = json_testcase
+
+    with open(json_file, 'r') as fin:
+        json_root = json.load(fin)
+
+    totals = {'tests': 0, 'failures': 0, 'disabled': 0, 'errors': 0}
+    for json_testsuite in json_root.get('testsuites', []):
+        suite_time = parse_time(json_testsuite.get('time', 0))
+        json_testcases = json_testsuite.get('testsuite', [])
+        for idx, json_testcase in enumerate(json_testcases):
+            rerun_testcase = rerun_testcases.get((json_testcase.get('classname', ''), json_testcase.get('name', '')))
+            if rerun_testcase is not None:
+                suite_time += parse_time(rerun_testcase['time']) - parse_time(json_testcase.get('time', 0))
+                json_testcases[idx] = rerun_testcase
+        # Replace the rerun testcases in place, so the order of the report stays the same.
+
+        json_testsuite['tests'] = len(json_testcases)
+        json_testsuite['failures'] = sum(1 for json_testcase in json_testcases if json_testcase.get('failures'))
+        json_testsuite['disabled'] = sum(1 for json_testcase in json_testcases if json_testcase.get('status') == 'NOTRUN')
+        json_testsuite['time'] = '{:.3f}s'.format(max(suite_time, 0.0))
+        for key in totals:
+            totals[key] += json_testsuite.get(key, 0)
+
+    json_root.update(totals)
+    with open(output_file, 'w') as fout:
+        json.dump(json_root, fout, indent=2)
+
+    return totals
+
+
+def convert_reports(xml_file, html_file=None, xlsx_file=None):
+    # Feed a (merged) XML report into the existing HTML and XLSX converters.
+    # The HTML converter also reads JSON reports (report_model.build_json_model).
+
+    if html_file:
+        subprocess.run([sys.executable, HTML_CONVERTER, xml_file, html_file], check=False)
+    if xlsx_file:
+        subprocess.run([sys.executable, XLSX_CONVERTER, xml_file, '--output', xlsx_file], check=False)
+
+
+def run_and_merge(binary, output_file, tests, shard_count, shard_tests=None, keep_shards=False,
+                  test_timeout=None, run_timeout=None):
+    # Run the shards in a temporary directory and merge their reports into `output_file`.
+    # - shard_tests: the tests of every shard; without them gtest's built-in sharding is used.
+    # - test_timeout, run_timeout: run the shards under the watchdog.
+    # Returns the recomputed totals of the merged report.
+
+    shard_directory = tempfile.mkdtemp(prefix='gtest_shards_')
+    start_time = time.monotonic()
+    if test_timeout or run_timeout:
+        if shard_tests is None:
+            shard_tests = [tests[idx::shard_count] for idx in range(shard_count)]
+        # The watchdog needs to know the tests of every shard: split them round-robin like gtest does.
+        shard_xmls = run_watched_shards(binary, shard_tests, shard_directory, test_timeout, run_timeout)
+    else:
+        shard_filters = None if shard_tests is None else [gtest_filter(tests) for tests in shard_tests]
+        shard_xmls = run_shards(binary, shard_count, shard_directory, shard_filters)
+    run_time = time.monotonic() - start_time
+    # Measure the wall time of the parallel run for the merged report.
+
+    totals = merge_xml_reports(shard_xmls, output_file, run_time, tests)
+    print(f"Merged {len(shard_xmls)} shard report(s) into {output_file} in {run_time:.3f} sec: "
+          f"{totals['tests']} test(s), {totals['failures']} failure(s)")
+
+    if keep_shards:
+        print(f"Shard reports and logs are kept in {shard_directory}")
+    else:
+        shutil.rmtree(shard_directory, ignore_errors=True)
+
+    return totals
+
+
+def run_sharded(binary, output_file, workers, keep_shards=False, test_timeout=None, run_timeout=None):
+    # Run the tests of `binary` in `workers` shards split by gtest (GTEST_TOTAL_SHARDS/GTEST_SHARD_INDEX)
+    # and merge the shard reports into `output_file`.
+
+    tests = list_tests(binary)
+    shard_count = max(1, min(workers, len(tests)))
+    # More shards than tests would only start empty processes.
+    print(f"Running {len(tests)} test(s) in {shard_count} gtest shard(s)")
+
+    return run_and_merge(binary, output_file, tests, shard_count, None, keep_shards, test_timeout, run_timeout)
+
+
+def run_planned(binary, output_file, workers, history_reports, keep_shards=False, test_timeout=None, run_timeout=None):
+    # Run the tests of `binary` in `workers` LPT-balanced shards (planned from `history_reports`)
+    # and merge the shard reports into `output_file`.
+
+    tests = list_tests(binary)
+    shards = [shard for shard in plan_shards(estimate_durations(tests, load_durations(history_reports)), workers)
+              if shard['tests']]
+    print(f"Running {sum(len(shard['tests']) for shard in shards)} test(s) in {len(shards)} shard(s), "
+          f"predicted makespan {predicted_makespan(shards):.3f} sec")
+
+    return run_and_merge(binary, output_file, tests, len(shards), [shard['tests'] for shard in shards],
+                         keep_shards, test_timeout, run_timeout)
+
+
+def select_rerun_tests(report_file):
+    # Return the full gtest names of the failed and not run testcases of a previous XML/JSON report.
+    # Disabled tests are left out, gtest would not run them anyway.
+
+    header, testcases = read_report(report_file)
+    return ['{}.{}'.format(testcase['classname'], testcase['name']) for testcase in testcases
+            if testcase['status'] in [STATUS_FAILED, STATUS_NOTRUN]
+            and not is_disabled_test('{}.{}'.format(testcase['classname'], testcase['name']))]
+
+
+def rerun_failed(binary, report_file, workers, keep_shards=False, test_timeout=None, run_timeout=None):
+    # Rerun only the failed and not run testcases of the previous XML/JSON report `report_file` and
+    # merge the new results back into it, so the report stays complete without running the passing tests again.
+    # Returns the totals of the merged report.
+
+    rerun_tests = select_rerun_tests(report_file)
+    if not rerun_tests:
+        print(f"No failed or not run tests in {report_file}, nothing to rerun.")
+        return {'failures': 0}
+
+    shard_count = max(1, min(workers, len(rerun_tests)))
+    print(f"Rerunning {len(rerun_tests)} test(s) of {report_file} in {shard_count} shard(s)")
+    rerun_directory = tempfile.mkdtemp(prefix='gtest_rerun_')
+    rerun_xml = os.path.join(rerun_directory, 'rerun.xml')
+    run_and_merge(binary, rerun_xml, rerun_tests, shard_count, [rerun_tests[idx::shard_count] for idx in range(shard_count)],
+                  keep_shards, test_timeout, run_timeout)
+    # The testcases to rerun are named explicitly, split round-robin onto the shards.
+
+    if os.path.splitext(report_file)[1].lower() == '.json':
+        totals = merge_rerun_into_json(report_file, rerun_xml, report_file)
+    else:
+        rerun_names = {'{}.{}'.format(xml_testcase_node.attrib.get('classname', ''), xml_testcase_node.attrib.get('name', ''))
+                       for xml_testcase_node in ET.parse(rerun_xml).getroot().iter('testcase')}
+        merged_xml = os.path.join(rerun_directory, 'merged.xml')
+        totals = merge_xml_reports([report_file, rerun_xml], merged_xml, None, list_tests(binary), {report_file: rerun_names})
+        shutil.move(merged_xml, report_file)
+    # Only the testcases that were actually rerun replace their previous results.
+
+    shutil.rmtree(rerun_directory, ignore_errors=True)
+    print(f"Merged the rerun results into {report_file}: {totals['failures']} failure(s) left")
+    return totals
+
+
+def run_measured(binary, output_file, workers, keep_shards=False, test_timeout=None):
+    # Run every test of `binary` in its own process (`workers` in parallel), attach its CPU user/system
+    # time and peak RSS as testcase properties and merge the reports into `output_file`.
+
+    tests = list_tests(binary)
+    print(f"Running {len(tests)} test(s) one per process to measure their resource usage")
+
+    shard_directory = tempfile.mkdtemp(prefix='gtest_measured_')
+    start_time = time.monotonic()
+    xml_files = resource_usage.run_measured(binary, tests, shard_directory, workers, test_timeout)
+    run_time = time.monotonic() - start_time
+
+    totals = merge_xml_reports(xml_files, output_file, run_time, tests)
+    print(f"Merged {len(xml_files)} report(s) into {output_file} in {run_time:.3f} sec: "
+          f"{totals['tests']} test(s), {totals['failures']} failure(s)")
+
+    if keep_shards:
+        print(f"Test reports and logs are kept in {shard_directory}")
+    else:
+        shutil.rmtree(shard_directory, ignore_errors=True)
+
+    return totals
+
+
+def run_tests(binary, output_file, workers, plan_from=None, keep_shards=False, test_timeout=None, run_timeout=None,
+              cache_directory=DEFAULT_CACHE_DIRECTORY, force=False, measure_resources=False):
+    # Run all tests of `binary` in `workers` shards into the XML report `output_file`, or reuse the cached report
+    # of the same binary and environment unless `force` is set.
+    # - plan_from: list of previous XML/JSON reports to balance the shards with (None: gtest's built-in sharding).
+    # - measure_resources: run every test in its own process and record its CPU time and peak RSS.
+    # Returns the totals of the report.
+
+    if measure_resources and not resource_usage.is_supported():
+        print("Warning: Resource usage cannot be measured on this platform, the tests run without it.")
+        measure_resources = False
+
+    key = cache_key(binary, '*', [test_timeout, run_timeout] + (['resource-usage'] if measure_resources else []))
+    # The watchdog timeouts change the results of hanging tests, so they are part of the key.
+
+    if not force and restore_report(cache_directory, key, output_file):
+        print(f"Reusing cached results for {output_file} (use --force to rerun the tests)")
+        header, testcases = read_report(output_file)
+        return header
+    # An unchanged binary in an unchanged environment gives the same results: skip the run.
+
+    if measure_resources:
+        totals = run_measured(binary, output_file, workers, keep_shards, test_timeout)
+    elif plan_from is not None:
+        history_reports = [report for report in plan_from if os.path.isfile(report)]
+        # The previous report is read before the new run overwrites it.
+        totals = run_planned(binary, output_file, workers, history_reports, keep_shards, test_timeout, run_timeout)
+    else:
+        totals = run_sharded(binary, output_file, workers, keep_shards, test_timeout, run_timeout)
+
+    if os.path.isfile(output_file):
+        store_report(cache_directory, key, output_file)
+    return totals
+
+
+def main():
+    # Command-line entry point: run the gtest binary in parallel shards and generate the reports.
+    # Without --plan-from the tests are split by gtest's built-in sharding.
+
+    parser = argparse.ArgumentParser(description='Run a gtest binary in parallel shards and merge the results', allow_abbrev=False)
+    parser.add_argument('--binary', type=str, default='build/Report_Program', metavar="build/Report_Program", help="Location of the gtest binary")
+    parser.add_argument('--output', '-o', type=str, default='report/ReportTest.xml', metavar="report/ReportTest.xml", help="Location of the merged XML report")
+    parser.add_argument('--workers', '-j', type=int, default=os.cpu_count() or 1, help="Number of parallel shards (default: number of cores)")
+    parser.add_argument('--plan-from', type=str, nargs='*', metavar="report/ReportTest.xml", help="Balance the shards by the testcase durations of previous XML/JSON report(s) instead of gtest's own sharding")
+    parser.add_argument('--html', type=str, metavar="report/ReportTest.html", help="Convert the merged report to HTML")
+    parser.add_argument('--xlsx', type=str, metavar="report/ReportTest.xlsx", help="Convert the merged report to XLSX")
+    parser.add_argument('--keep-shards', action='store_true', help="Keep the shard reports and logs")
+    parser.add_argument('--rerun-failed', action='store_true', help="Rerun only the failed and not run tests of the existing --output report (XML or JSON) and merge the results into it")
+    parser.add_argument('--test-timeout', type=float, help="Kill a test after this many seconds, record it as a 'timeout' failure and rerun the remaining tests")
+    parser.add_argument('--run-timeout', type=float, help="Stop the whole run after this many seconds; tests that did not start are recorded as not run")
+    parser.add_argument('--resource-usage', action='store_true', help="Run every test in its own process and record its CPU time and peak RSS")
+    parser.add_argument('--cache-dir', type=str, default=DEFAULT_CACHE_DIRECTORY, metavar=DEFAULT_CACHE_DIRECTORY, help="Location of the result cache")
+    parser.add_argument('--force', action='store_true', help="Run the tests even if the result cache holds a report of the same binary")
+    args = parser.parse_args()
+    # Parse command-line arguments provided by the user.
+
+    if not os.path.isfile(args.binary):
+        print(f"ERROR: The test binary {args.binary} does not exist.")
+        return 1
+
+    output_directory = os.path.dirname(args.output)
+    if output_directory and not os.path.isdir(output_directory):
+        os.makedirs(output_directory)
+
+    if args.rerun_failed:
+        if not os.path.isfile(args.output):
+            print(f"ERROR: The report {args.output} does not exist.")
+            return 1
+        totals = rerun_failed(args.binary, args.output, args.workers, args.keep_shards,
+                              args.test_timeout, args.run_timeout)
+    else:
+        totals = run_tests(args.binary, args.output, args.workers, args.plan_from, args.keep_shards,
+                           args.test_timeout, args.run_timeout, args.cache_dir, args.force, args.resource_usage)
+
+    if os.path.splitext(args.output)[1].lower() == '.json':
+        if args.xlsx:
+            print("Warning: The XLSX converter reads XML reports only, --xlsx is ignored for a JSON report.")
+        convert_reports(args.output, args.html)
+    else:
+        convert_reports(args.output, args.html, args.xlsx)
+    return 1 if totals['failures'] else 0
+    # Exit like gtest: 1 if a test failed.
+
+
+if __name__ == '__main__':
+    sys.exit(main())
+    # Entry point of the script. Execute the main() function when the script is run.
@@ -0,0 +1,218 @@
+import os
+import re
+import time
+import queue
+import datetime
+import threading
+import subprocess
+from xml.sax.saxutils import quoteattr
+from shard_planner import gtest_filter
+# Importing required libraries:
+# - os: for file handling.
+# - re: for parsing the gtest console output.
+# - time, datetime: for the per-test and whole-run deadlines and the report timestamp.
+# - queue, threading: for reading the console output of the test process without blocking.
+# - subprocess: for launching the gtest binary.
+# - quoteattr: for writing the XML report of the tests recorded from the console.
+# - shard_planner: --gtest_filter building.
+
+# Failure type of a testcase that was killed by the watchdog.
+TIMEOUT_FAILURE_TYPE = 'timeout'
+
+# gtest console lines, e.g. '[ RUN      ] Suite.Test' or '[  FAILED  ] Suite.Test (30 ms)'.
+# The results of parameterized tests name the parameter, e.g. '[  FAILED  ] Run/Suite.Test/3, where GetParam() = 3 (30 ms)'.
+CONSOLE_LINE_PATTERN = re.compile(r'^\[\s*(RUN|OK|FAILED|SKIPPED)\s*\] ([^\s,]+)(?:, where .*?)?(?: \((\d+) ms\))?$')
+
+
+def split_gtest_name(test):
+    # Split a full gtest name 'Suite.Test' into (classname, name).
+
+    classname, separator, name = test.partition('.')
+    return classname, name
+
+
+def is_disabled_test(test):
+    # gtest does not run tests whose suite or test name starts with 'DISABLED_'.
+
+    classname, name = split_gtest_name(test)
+    return classname.startswith('DISABLED_') or name.startswith('DISABLED_')
+
+
+def read_console(stream, lines):
+    # Forward the console output of the test process line by line into the queue `lines`.
+    # None marks the end of the output.
+
+    for line in stream:
+        lines.put(line)
+    lines.put(None)
+
+
+def run_attempt(binary, tests, attempt_xml, log_file, test_timeout, run_deadline):
+    # Run `tests` of the gtest binary in one process and follow its console output.
+    # The process is killed if a single test (or the gap between two tests, e.g. a hanging fixture)
+    # exceeds `test_timeout` seconds, or if the whole run passes `run_deadline` (time.monotonic()).
+    # Returns a tuple (completed, finished, hung, hung_time):
+    # - completed: True if the process exited by itself (its XML report contains all `tests`).
+    # - finished: dict {test: record} of the tests finished before a kill, recorded from the console.
+    # - hung: the test that was running when the process was killed, or None.
+    # - hung_time: seconds since the last test started or ended when the process was killed.
+
+    command = [binary, '--gtest_filter=' + gtest_filter(tests), '--gtest_output=xml:' + attempt_xml, '--gtest_color=no']
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, errors='replace')
+    lines = queue.Queue()
+    reader = threading.Thread(target=read_console, args=(process.stdout, lines), daemon=True)
+    reader.start()
+    # The output is read by a separate thread, so the deadlines can be checked while the process is silent.
+
+    finished = {}
+    current_test = None
+    current_output = []
+    last_event = time.monotonic()
+    test_deadline = last_event + test_timeout if test_timeout else None
+
+    while True:
+        deadline = min([value for value in [test_deadline, run_deadline] if value is not None] or [None])
+        try:
+            line = lines.get(timeout=None if deadline is None else max(deadline - time.monotonic(), 0))
+        except queue.Empty:
+            process.kill()
+            process.wait()
+            log_file.write('[ WATCHDOG ] Killed after timeout\n')
+            return False, finished, current_test, time.monotonic() - last_event
+        # No output until the nearest deadline: the test (or the run) hangs.
+
+        if line is None:
+            break
+        log_file.write(line)
+
+        match = CONSOLE_LINE_PATTERN.match(line)
+        if match is None:
+            if current_test is not None:
+                current_output.append(line)
+            # Lines between RUN and the result of a test are its failure output.
+            continue
+
+        event, test, milliseconds = match.groups()
+        if event == 'RUN':
+            current_test = test
+            current_output = []
+        elif test == current_test and milliseconds is not None:
+            finished[test] = {
+                'status': 'passed' if event == 'OK' else event.lower(),
+                'time': int(milliseconds) / 1000.0,
+                'output': ''.join(current_output).strip(),
+            }
+            current_test = None
+        # The result line of the running test ends it; the summary lines at the end of the run have no time.
+
+        last_event = time.monotonic()
+        if test_timeout:
+            test_deadline = last_event + test_timeout
+        # Every test start and end restarts the per-test timer.
+
+    process.wait()
+    return True, finished, None, 0.0
+
+
+def write_console_report(records, xml_file, timestamp=''):
+    # Write the testcases recorded from the console (tests finished in a killed process, hung tests
+    # and tests not run anymore) as a gtest XML report, so they can be merged with the regular reports.
+    # - records: list of (test, record) with record keys 'status', 'time', 'output' and optionally 'message'.
+    # - timestamp: start of the run in the gtest format, e.g. '2024-05-01T10:00:00.000'.
+
+    suites = {}
+    for test, record in records:
+        suites.setdefault(split_gtest_name(test)[0], []).append((test, record))
+
+    with open(xml_file, 'w', encoding='utf-8') as fout:
+        fout.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        fout.write('<testsuites tests="{}" failures="0" disabled="0" errors="0" time="0" timestamp={} name="AllTests">\n'.format(len(records), quoteattr(timestamp)))
+        for suite_name, suite_records in suites.items():
+            fout.write('  <testsuite name={} tests="{}" failures="0" disabled="0" skipped="0" errors="0" time="{:.3f}" timestamp={}>\n'.format(
+                quoteattr(suite_name), len(suite_records), sum(record['time'] for test, record in suite_records), quoteattr(timestamp)))
+            for test, record in suite_records:
+                classname, name = split_gtest_name(test)
+                status, result = ('notrun', 'suppressed') if record['status'] == 'notrun' else ('run', 'completed')
+                if record['status'] == 'skipped':
+                    result = 'skipped'
+                fout.write('    <testcase name={} status="{}" result="{}" time="{:.3f}" timestamp="" classname={}'.format(
+                    quoteattr(name), status, result, record['time'], quoteattr(classname)))
+                if record['status'] in ['failed', TIMEOUT_FAILURE_TYPE]:
+                    failure_type = TIMEOUT_FAILURE_TYPE if record['status'] == TIMEOUT_FAILURE_TYPE else ''
+                    message = record.get('message') or record['output']
+                    fout.write('>\n      <failure message={} type={}><![CDATA[{}]]></failure>\n    </testcase>\n'.format(
+                        quoteattr(message), quoteattr(failure_type), record['output'].replace(']]>', ']]]]><![CDATA[>')))
+                else:
+                    fout.write(' />\n')
+            fout.write('  </testsuite>\n')
+        fout.write('</testsuites>\n')
+    # The totals are recomputed when the reports are merged.
+
+
+def watch_tests(binary, tests, shard_prefix, test_timeout=None, run_deadline=None):
+    # Run `tests` under the watchdog until every test has a result.
+    # After a kill the remaining tests are rerun with a --gtest_filter that excludes the finished tests
+    # and the hung one; the hung test is recorded as a failure of type "timeout". If the whole run passes
+    # `run_deadline`, the tests that did not start anymore are recorded as not run.
+    # Every attempt writes '<shard_prefix>_<attempt>.xml' and all console output goes to '<shard_prefix>.log'.
+    # Returns the list of XML reports that together contain all `tests`.
+
+    xml_files = []
+    console_records = []
+    remaining = list(tests)
+    attempt = 0
+    timestamp = datetime.datetime.now().isoformat(timespec='milliseconds')
+
+    with open(shard_prefix + '.log', 'w') as log_file:
+        while remaining:
+            if run_deadline is not None and time.monotonic() >= run_deadline:
+                break
+            attempt_xml = '{}_{}.xml'.format(shard_prefix, attempt)
+            completed, finished, hung, hung_time = run_attempt(binary, remaining, attempt_xml, log_file, test_timeout, run_deadline)
+            attempt += 1
+
+            if completed:
+                if os.path.isfile(attempt_xml):
+                    xml_files.append(attempt_xml)
+                else:
+                    print(f"Warning: {binary} exited without writing {attempt_xml}.")
+                remaining = []
+                break
+            # A process that exited by itself has reported all of its tests.
+
+            console_records.extend(finished.items())
+            if hung is None:
+                hung = next((test for test in remaining if test not in finished and not is_disabled_test(test)), None)
+            # Killed between two tests (fixture setup/teardown): blame the next test that would have run.
+
+            if hung is None:
+                print(f"Warning: {binary} hung after its last test, the remaining tests are not rerun.")
+                remaining = [test for test in remaining if test not in finished and not is_disabled_test(test)]
+                break
+            # Only the tests without result are recorded as not run below; the finished ones are already in
+            # console_records and disabled tests are never run.
+            console_records.append((hung, {
+                'status': TIMEOUT_FAILURE_TYPE,
+                'time': hung_time,
+                'output': '',
+                'message': 'Killed by the watchdog after {:.1f} sec without result'.format(hung_time),
+            }))
+            print(f"Warning: Test {hung} timed out and was killed.")
+            remaining = [test for test in remaining if test not in finished and test != hung]
+
+        for test in remaining:
+            console_records.append((test, {
+                'status': 'notrun',
+                'time': 0.0,
+                'output': '',
+            }))
+        if remaining:
+            print(f"Warning: {len(remaining)} test(s) were not run before the watchdog gave up.")
+        # Tests that did not start before the whole-run deadline.
+
+    if console_records:
+        console_xml = shard_prefix + '_console.xml'
+        write_console_report(console_records, console_xml, timestamp)
+        xml_files.append(console_xml)
+
+    return xml_files